@@ -29,6 +29,7 @@ const localizer = momentLocalizer(moment);
 const Appointments = () => {
   const { user } = useAuth();
   const [appointments, setAppointments] = useState([]);
+  const [summaries, setSummaries] = useState([]);
   const [filteredAppointments, setFilteredAppointments] = useState([]);
   const [doctors, setDoctors] = useState([]);
   const [patients, setPatients] = useState([]);
@@ -58,17 +59,16 @@ const Appointments = () => {
     fetchData();
   }, []);
 
+  useEffect(() => {
+    fetchCalendar();
+  }, [view, date]);
+
   useEffect(() => {
     const filtered = appointments.filter(appt => {
-      const matchesSearch =
+      return (
         appt.patient_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        (appt.doctor && `${appt.doctor.first_name} ${appt.doctor.last_name}`.toLowerCase().includes(searchTerm.toLowerCase())) ||
-        appt.reason.toLowerCase().includes(searchTerm.toLowerCase());
-
-      if (user.role === 'doctor') {
-        return matchesSearch && appt.doctor?.id === user.id;
-      }
-      return matchesSearch;
+        (appt.doctor_name || '').toLowerCase().includes(searchTerm.toLowerCase())
+      );
     });
     setFilteredAppointments(filtered);
   }, [appointments, searchTerm, user]);
@@ -76,23 +76,13 @@ const Appointments = () => {
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [apptsData, doctorsData, patientsData] = await Promise.all([
-        AppointmentService.getAll(),
+      const [doctorsData, patientsData] = await Promise.all([
         UserService.getAll({ role: 'doctor' }),
         PatientService.getAll()
       ]);
 
-      const formattedAppts = apptsData.map(appt => ({
-        ...appt,
-        id: appt.id,
-        title: `${appt.patient_name} - ${appt.reason}`,
-        start: new Date(`${appt.date}T${appt.time}`),
-        end: moment(`${appt.date}T${appt.time}`).add(appt.duration, 'minutes').toDate(),
-      }));
-
-      setAppointments(formattedAppts);
-      setDoctors(doctorsData);
-      setPatients(patientsData);
+      setDoctors(doctorsData.data);
+      setPatients(patientsData.data);
       setError(null);
     } catch (err) {
       setError('Failed to load appointments. Please try again.');
@@ -102,11 +92,49 @@ const Appointments = () => {
     }
   };
 
+  // Month and week views show per-day counts from the calendar endpoint;
+  // a day's appointments are only fetched when that day is opened.
+  const fetchCalendar = async () => {
+    const day = moment(date).format('YYYY-MM-DD');
+    const params = user.role === 'doctor' ? { doctor_id: user.id } : {};
+    try {
+      if (view === Views.DAY) {
+        const response = await AppointmentService.calendar({ ...params, day });
+        setAppointments(response.data.map(appt => ({
+          ...appt,
+          title: appt.patient_name,
+          start: new Date(`${appt.date}T${appt.time}`),
+          end: moment(`${appt.date}T${appt.time}`).add(30, 'minutes').toDate(),
+        })));
+        return;
+      }
+      const window = view === Views.WEEK ? { week: day } : { month: moment(date).format('YYYY-MM') };
+      const response = await AppointmentService.calendar({ ...params, ...window });
+      setSummaries(response.data.days.map(summary => ({
+        id: `day-${summary.date}`,
+        summary: true,
+        title: `${summary.total} appointment${summary.total === 1 ? '' : 's'}`,
+        counts: summary.counts,
+        start: moment(summary.date).toDate(),
+        end: moment(summary.date).toDate(),
+        allDay: true,
+      })));
+    } catch (err) {
+      setError('Failed to load appointments. Please try again.');
+      console.error('Error fetching calendar:', err);
+    }
+  };
+
   const handleSelectEvent = (event) => {
+    if (event.summary) {
+      setDate(event.start);
+      setView(Views.DAY);
+      return;
+    }
     setSelectedEvent(event);
     setFormData({
       patient: event.patient_id || '',
-      doctor: event.doctor?.id || '',
+      doctor: event.doctor || '',
       date: new Date(event.start),
       time: new Date(event.start),
       duration: moment(event.end).diff(moment(event.start), 'minutes'),
@@ -151,7 +179,7 @@ const Appointments = () => {
         setSuccess('Appointment created successfully');
       }
 
-      fetchData();
+      fetchCalendar();
       setOpenModal(false);
     } catch (err) {
       setError(err.response?.data?.message || 'Failed to save appointment');
@@ -163,7 +191,7 @@ const Appointments = () => {
       await AppointmentService.delete(selectedAppointment);
       setSuccess('Appointment deleted successfully');
       setOpenDeleteDialog(false);
-      fetchData();
+      fetchCalendar();
     } catch (err) {
       setError('Failed to delete appointment');
     }
@@ -205,12 +233,19 @@ const Appointments = () => {
     };
   };
 
-  const renderEvent = (event) => {
+  const renderEvent = ({ event }) => {
+    if (event.summary) {
+      return (
+        <Tooltip title={Object.entries(event.counts).map(([status, count]) => `${count} ${status}`).join(', ')}>
+          <div>{event.title}</div>
+        </Tooltip>
+      );
+    }
     return (
-      <Tooltip title={`${event.patient_name} with ${event.doctor ? `Dr. ${event.doctor.last_name}` : 'No doctor'} - ${event.reason}`}>
+      <Tooltip title={`${event.patient_name} with ${event.doctor_name ? `Dr. ${event.doctor_name}` : 'No doctor'} - ${event.status}`}>
         <div>
           <strong>{event.patient_name}</strong>
-          <div>{event.reason}</div>
+          <div>{event.status}</div>
           <div>{moment(event.start).format('h:mm a')}</div>
         </div>
       </Tooltip>
@@ -264,11 +299,11 @@ const Appointments = () => {
           {tabValue === 0 && (
             <Calendar
               localizer={localizer}
-              events={filteredAppointments}
+              events={view === Views.DAY ? filteredAppointments : summaries}
               startAccessor="start"
               endAccessor="end"
               views={['month', 'week', 'day']}
-              defaultView={view}
+              view={view}
               date={date}
               onNavigate={handleDateChange}
               onView={handleViewChange}
@@ -3,56 +3,37 @@ import { Link } from "react-router-dom";
 import axios from "axios";
 import { TextField, Button, Box, Typography, Snackbar, Alert } from "@mui/material";
 
+const ALERT_LABELS = {
+  low_stock: "Low stock",
+  expiring: "Expiring soon",
+  expired: "Expired",
+};
+
 function DoctorDashboard() {
-  const [patients, setPatients] = useState([]);
-  const [appointments, setAppointments] = useState([]);
-  const [inventory, setInventory] = useState([]);
+  const [dashboard, setDashboard] = useState(null);
   const [editingPatient, setEditingPatient] = useState(null);
   const [editedPatientData, setEditedPatientData] = useState({ name: "", age: "", contact: "", email: "", medical_history: "" });
   const [snackbar, setSnackbar] = useState({ open: false, message: "", severity: "success" });
 
   useEffect(() => {
-    fetchPatients();
-    fetchAppointments();
-    fetchInventory();
+    fetchDashboard();
   }, []);
 
-  const fetchPatients = async () => {
-    try {
-      const response = await axios.get("http://127.0.0.1:8000/api/patients/", {
-        headers: {
-          Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
-        },
-      });
-      setPatients(response.data);
-    } catch (error) {
-      console.error("Error fetching patients:", error);
-    }
-  };
-
-  const fetchAppointments = async () => {
-    try {
-      const response = await axios.get("http://127.0.0.1:8000/api/appointments/", {
-        headers: {
-          Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
-        },
-      });
-      setAppointments(response.data);
-    } catch (error) {
-      console.error("Error fetching appointments:", error);
-    }
-  };
+  const patients = dashboard?.patients.recent || [];
+  const appointments = dashboard?.appointments.rows || [];
+  const alerts = dashboard?.inventory.alerts || [];
 
-  const fetchInventory = async () => {
+  // One request for the whole dashboard: counts plus the top rows of each section.
+  const fetchDashboard = async () => {
     try {
-      const response = await axios.get("http://127.0.0.1:8000/api/inventory/", {
+      const response = await axios.get("http://127.0.0.1:8000/api/dashboard/", {
         headers: {
           Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
         },
       });
-      setInventory(response.data);
+      setDashboard(response.data);
     } catch (error) {
-      console.error("Error fetching inventory:", error);
+      console.error("Error fetching dashboard:", error);
     }
   };
 
@@ -75,7 +56,7 @@ function DoctorDashboard() {
       });
       setEditingPatient(null);
       setSnackbar({ open: true, message: "Patient record updated successfully!", severity: "success" });
-      fetchPatients();
+      fetchDashboard();
     } catch (error) {
       console.error("Error updating patient record:", error);
       setSnackbar({ open: true, message: "Failed to update patient record", severity: "error" });
@@ -89,6 +70,7 @@ function DoctorDashboard() {
       {/* Patient Records */}
       <div>
         <h3>Patient Records</h3>
+        {dashboard && <p>{dashboard.patients.total} patients, {dashboard.patients.with_allergies} with allergies</p>}
         <ul>
           {patients.map((patient) => (
             <li key={patient.id}>
@@ -116,24 +98,36 @@ function DoctorDashboard() {
 
       {/* Appointments */}
       <div>
-        <h3>Appointments</h3>
+        <h3>Today's Appointments</h3>
+        {dashboard && (
+          <p>
+            {dashboard.appointments.today_scheduled} scheduled, {dashboard.appointments.today_completed} completed today;
+            {" "}{dashboard.appointments.next_7_days} in the next 7 days
+          </p>
+        )}
         <ul>
           {appointments.map((appointment) => (
             <li key={appointment.id}>
-              {appointment.date} - {appointment.patient_name} with {appointment.doctor_name}
+              {appointment.time} - {appointment.patient_name} ({appointment.status})
             </li>
           ))}
         </ul>
         <Link to="/appointments">View All Appointments</Link>
       </div>
 
-      {/* Inventory */}
+      {/* Inventory Alerts */}
       <div>
-        <h3>Inventory</h3>
+        <h3>Inventory Alerts</h3>
+        {dashboard && (
+          <p>
+            {dashboard.inventory.low_stock} low on stock, {dashboard.inventory.expiring} expiring soon,
+            {" "}{dashboard.inventory.expired} expired
+          </p>
+        )}
         <ul>
-          {inventory.map((item) => (
-            <li key={item.id}>
-              {item.name} - {item.quantity} in stock
+          {alerts.map((alert) => (
+            <li key={alert.id}>
+              {alert.medicine_name} - {ALERT_LABELS[alert.kind]} ({alert.quantity} in stock, expires {alert.expiry_date})
             </li>
           ))}
         </ul>
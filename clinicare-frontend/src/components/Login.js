@@ -61,6 +61,9 @@ function Login() {
       if (err.response) {
         if (err.response.status === 400) {
           errorMessage = "Incorrect email or password.";
+        } else if (err.response.status === 429) {
+          const wait = err.response.headers["retry-after"];
+          errorMessage = `Too many sign-in attempts. Try again in ${wait || "a few"} seconds.`;
         } else if (err.response.status === 500) {
           errorMessage = "Server error. Try again later.";
         }
@@ -7,7 +7,7 @@ import {
   Chip, LinearProgress, Box, Typography, Menu, MenuItem
 } from '@mui/material';
 import {
-  Add, Delete, Edit, Search, FilterList,
+  Add, Delete, Edit, Remove, Search, FilterList,
   Inventory, Warning, CheckCircle
 } from '@mui/icons-material';
 import { DatePicker } from '@mui/x-date-pickers';
@@ -91,7 +91,9 @@ const ManageInventory = () => {
     e.preventDefault();
     try {
       if (editMode) {
-        await API.put(`/inventory/${currentItem.id}/`, formData);
+        // Quantities only change through stock movements, so concurrent dispenses are never overwritten.
+        const { quantity, ...changes } = formData;
+        await API.patch(`/inventory/${currentItem.id}/`, changes);
         setSuccess('Item updated successfully');
       } else {
         await API.post('/inventory/', formData);
@@ -104,6 +106,18 @@ const ManageInventory = () => {
     }
   };
 
+  const handleMovement = async (item, kind) => {
+    const units = parseInt(window.prompt(`Units to ${kind === 'dispense' ? 'dispense' : 'receive'}:`, '1'), 10);
+    if (!units || units < 1) return;
+    try {
+      await API.post('/stock-movements/', { item: item.id, kind, quantity: units });
+      setSuccess(kind === 'dispense' ? `Dispensed ${units}` : `Received ${units}`);
+      fetchInventory();
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Failed to record stock movement');
+    }
+  };
+
   const handleDelete = async (id) => {
     try {
       await API.delete(`/inventory/${id}/`);
@@ -147,6 +161,16 @@ const ManageInventory = () => {
                     <TableCell>{new Date(item.expiryDate).toLocaleDateString()}</TableCell>
                     <TableCell>${parseFloat(item.cost).toFixed(2)}</TableCell>
                     <TableCell>
+                      <Tooltip title="Dispense">
+                        <IconButton onClick={() => handleMovement(item, 'dispense')}>
+                          <Remove />
+                        </IconButton>
+                      </Tooltip>
+                      <Tooltip title="Receive">
+                        <IconButton onClick={() => handleMovement(item, 'receipt')}>
+                          <Add />
+                        </IconButton>
+                      </Tooltip>
                       <IconButton onClick={() => handleDelete(item.id)}>
                         <Delete color="error" />
                       </IconButton>
@@ -2,38 +2,33 @@ import React, { useState, useEffect } from "react";
 import { Link } from "react-router-dom";
 import axios from "axios";
 
+const ALERT_LABELS = {
+  low_stock: "Low stock",
+  expiring: "Expiring soon",
+  expired: "Expired",
+};
+
 function NurseDashboard() {
-  const [patients, setPatients] = useState([]);
-  const [inventory, setInventory] = useState([]);
+  const [dashboard, setDashboard] = useState(null);
 
   useEffect(() => {
-    fetchPatients();
-    fetchInventory();
+    fetchDashboard();
   }, []);
 
-  const fetchPatients = async () => {
-    try {
-      const response = await axios.get("http://127.0.0.1:8000/api/patients/", {
-        headers: {
-          Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
-        },
-      });
-      setPatients(response.data);
-    } catch (error) {
-      console.error("Error fetching patients:", error);
-    }
-  };
+  const patients = dashboard?.patients.recent || [];
+  const alerts = dashboard?.inventory.alerts || [];
 
-  const fetchInventory = async () => {
+  // One request for the whole dashboard: counts plus the top rows of each section.
+  const fetchDashboard = async () => {
     try {
-      const response = await axios.get("http://127.0.0.1:8000/api/inventory/", {
+      const response = await axios.get("http://127.0.0.1:8000/api/dashboard/", {
         headers: {
           Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
         },
       });
-      setInventory(response.data);
+      setDashboard(response.data);
     } catch (error) {
-      console.error("Error fetching inventory:", error);
+      console.error("Error fetching dashboard:", error);
     }
   };
 
@@ -43,7 +38,8 @@ function NurseDashboard() {
 
       {/* Patient Records */}
       <div>
-        <h3>Patient Records</h3>
+        <h3>Recent Patients</h3>
+        {dashboard && <p>{dashboard.patients.total} patients, {dashboard.patients.with_allergies} with allergies</p>}
         <ul>
           {patients.map((patient) => (
             <li key={patient.id}>
@@ -54,13 +50,19 @@ function NurseDashboard() {
         <Link to="/patients">View All Patients</Link>
       </div>
 
-      {/* Inventory */}
+      {/* Inventory Alerts */}
       <div>
-        <h3>Inventory</h3>
+        <h3>Inventory Alerts</h3>
+        {dashboard && (
+          <p>
+            {dashboard.inventory.low_stock} low on stock, {dashboard.inventory.expiring} expiring soon,
+            {" "}{dashboard.inventory.expired} expired
+          </p>
+        )}
         <ul>
-          {inventory.map((item) => (
-            <li key={item.id}>
-              {item.name} - {item.quantity} in stock
+          {alerts.map((alert) => (
+            <li key={alert.id}>
+              {alert.medicine_name} - {ALERT_LABELS[alert.kind]} ({alert.quantity} in stock, expires {alert.expiry_date})
             </li>
           ))}
         </ul>
@@ -26,7 +26,9 @@ const Patients = () => {
   useEffect(() => {
     const fetchPatients = async () => {
       try {
-        const data = await PatientService.getAll();
+        const data = await PatientService.getAll(
+          user?.role === 'doctor' ? { fields: 'id,name,age,gender,contact,medical_history' } : undefined
+        );
         setPatients(data);
       } catch (error) {
         console.error('Error fetching patients:', error);
@@ -3,39 +3,26 @@ import { Link } from "react-router-dom";
 import axios from "axios";
 
 function StaffDashboard() {
-  const [patients, setPatients] = useState([]);
-  const [appointments, setAppointments] = useState([]);
+  const [dashboard, setDashboard] = useState(null);
 
   useEffect(() => {
-    fetchPatients();
-    fetchAppointments();
+    fetchDashboard();
   }, []);
 
-  // Fetch Patients
-  const fetchPatients = async () => {
-    try {
-      const response = await axios.get("http://127.0.0.1:8000/api/patients/", {
-        headers: {
-          Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
-        },
-      });
-      setPatients(response.data);
-    } catch (error) {
-      console.error("Error fetching patients:", error);
-    }
-  };
+  const patients = dashboard?.patients.recent || [];
+  const appointments = dashboard?.appointments.rows || [];
 
-  // Fetch Appointments
-  const fetchAppointments = async () => {
+  // One request for the whole dashboard: counts plus the top rows of each section.
+  const fetchDashboard = async () => {
     try {
-      const response = await axios.get("http://127.0.0.1:8000/api/appointments/", {
+      const response = await axios.get("http://127.0.0.1:8000/api/dashboard/", {
         headers: {
           Authorization: `Bearer ${localStorage.getItem("accessToken")}`,
         },
       });
-      setAppointments(response.data);
+      setDashboard(response.data);
     } catch (error) {
-      console.error("Error fetching appointments:", error);
+      console.error("Error fetching dashboard:", error);
     }
   };
 
@@ -46,6 +33,7 @@ function StaffDashboard() {
       {/* Manage Patients */}
       <div>
         <h3>Manage Patients</h3>
+        {dashboard && <p>{dashboard.patients.total} patients registered</p>}
         <Link to="/patients/add">
           <button>Add New Patient</button>
         </Link>
@@ -64,13 +52,19 @@ function StaffDashboard() {
       {/* Manage Appointments */}
       <div>
         <h3>Manage Appointments</h3>
+        {dashboard && (
+          <p>
+            {dashboard.appointments.today} today ({dashboard.appointments.today_scheduled} still scheduled),
+            {" "}{dashboard.appointments.next_7_days} in the next 7 days
+          </p>
+        )}
         <Link to="/appointments/add">
           <button>Add New Appointment</button>
         </Link>
         <ul>
           {appointments.map((appointment) => (
             <li key={appointment.id}>
-              {appointment.date} - {appointment.patient_name}
+              {appointment.time} - {appointment.patient_name}
               <Link to={`/appointments/edit/${appointment.id}`}>
                 <button>Edit</button>
               </Link>
@@ -86,6 +86,7 @@ export const setupRealtimeConnection = (eventTypes, onUpdate) => {
     // Subscribe to specific event types
     socket.send(JSON.stringify({
       type: 'subscribe',
+      token: localStorage.getItem('accessToken'),
       events: Array.isArray(eventTypes) ? eventTypes : [eventTypes]
     }));
   };
@@ -136,6 +137,11 @@ export const PatientService = {
   stats: () => API.get('/patients/stats/'),
 };
 
+// Dashboard Service
+export const DashboardService = {
+  get: () => API.get('/dashboard/'),
+};
+
 // Appointment Service
 export const AppointmentService = {
   getAll: (params) => API.get('/appointments/', { params }),
@@ -158,6 +164,13 @@ export const UserService = {
   delete: (id) => API.delete(`/users/${id}/`),
   doctors: () => API.get('/users/doctors/'),
   staff: () => API.get('/users/staff/'),
+  // `roster` is a CSV/JSON File, or an array of user objects.
+  provision: (roster) => {
+    if (Array.isArray(roster)) return API.post('/users/provision/', roster);
+    const data = new FormData();
+    data.append('roster', roster);
+    return API.post('/users/provision/', data);
+  },
 };
 
 // Inventory Service
@@ -169,7 +182,14 @@ export const InventoryService = {
   delete: (id) => API.delete(`/inventory/${id}/`),
   categories: () => API.get('/inventory/categories/'),
   lowStock: () => API.get('/inventory/low-stock/'),
+  expiring: (days) => API.get('/inventory/expiring/', { params: { days } }),
   expired: () => API.get('/inventory/expired/'),
+  alerts: (params) => API.get('/inventory-alerts/', { params }),
+  alertSummary: () => API.get('/inventory-alerts/summary/'),
+  consumption: (days) => API.get('/inventory/consumption/', { params: { days } }),
+  movements: (itemId) => API.get('/stock-movements/', { params: { item: itemId } }),
+  dispense: (itemId, quantity, note) => API.post('/stock-movements/', { item: itemId, kind: 'dispense', quantity, note }),
+  receive: (itemId, quantity, note) => API.post('/stock-movements/', { item: itemId, kind: 'receipt', quantity, note }),
   stats: () => API.get('/inventory/stats/'),
 };
 
@@ -1,18 +1,78 @@
 from django.contrib import admin
-from .models import User, Patient, Appointment, Inventory, Prescription
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
+from . import stock
+from .models import User, Patient, Appointment, Inventory, InventoryAlert, Prescription, StockMovement
+
+
+class NeedsRestockFilter(admin.SimpleListFilter):
+    title = 'needs restock'
+    parameter_name = 'needs_restock'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Yes'), ('no', 'No'))
+
+    def queryset(self, request, queryset):
+        # The partial inventory_restock_idx covers quantity <= threshold.
+        if self.value() == 'yes':
+            return queryset.filter(quantity__lte=F('threshold'))
+        if self.value() == 'no':
+            return queryset.filter(quantity__gt=F('threshold'))
+        return queryset
 
 
 class InventoryAdmin(admin.ModelAdmin):
     list_display = ('medicine_name', 'quantity', 'threshold', 'expiry_date', 'needs_restock')
-    list_filter = ('medicine_name',)
+    list_filter = (NeedsRestockFilter, 'medicine_name')
     search_fields = ('medicine_name',)
     date_hierarchy = 'expiry_date'
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            restock=ExpressionWrapper(Q(quantity__lte=F('threshold')), output_field=BooleanField())
+        )
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            if change:
+                stock.save_details(obj)
+            else:
+                super().save_model(request, obj, form, change)
+                stock.record_opening([obj], request.user)
+
+    def get_readonly_fields(self, request, obj=None):
+        # After creation the quantity follows the stock movement ledger.
+        return ('quantity',) if obj is not None else ()
+
+    @admin.display(boolean=True, description='Needs Restock', ordering='restock')
     def needs_restock(self, obj):
-        return obj.quantity <= obj.threshold
+        return obj.restock
+
+
+@admin.register(InventoryAlert)
+class InventoryAlertAdmin(admin.ModelAdmin):
+    list_display = ('item', 'kind', 'raised_at', 'resolved_at')
+    list_filter = ('kind', ('resolved_at', admin.EmptyFieldListFilter))
+    search_fields = ('item__medicine_name',)
+    list_select_related = ('item',)
+    raw_id_fields = ('item',)
+    date_hierarchy = 'raised_at'
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('item', 'kind', 'change', 'balance', 'user', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('item__medicine_name', 'note')
+    list_select_related = ('item', 'user')
+    date_hierarchy = 'created_at'
+
+    # The ledger is append-only; movements are recorded through the API so quantities stay in step.
+    def has_add_permission(self, request):
+        return False
 
-    needs_restock.boolean = True
-    needs_restock.short_description = 'Needs Restock'
+    def has_change_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(User)
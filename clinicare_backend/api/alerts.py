@@ -0,0 +1,195 @@
+"""
+Inventory alerts.
+
+Three views over the inventory, each answered from an index: low stock
+(``quantity <= threshold``) reads the partial ``inventory_restock_idx``, and
+expiring (within ``INVENTORY_ALERTS['EXPIRING_DAYS']``) and expired are
+ranges on ``inventory_expiry_idx``.
+
+Open alerts are stored in :class:`~api.models.InventoryAlert`, one per item
+and kind, so dashboards read a handful of rows instead of the inventory.
+Saving an item re-evaluates that item only; writes that bypass signals
+(``bulk_create``, ``bulk_update``) must call :func:`evaluate` (or
+:func:`evaluate_created` for new rows) themselves.
+Alerts also change as days pass without any write, which is what
+``manage.py inventory_alerts`` is for: it re-evaluates only the items whose
+expiry date crossed a window boundary since its previous run, found with two
+range scans on the expiry index, so a run costs the number of changes rather
+than the size of the inventory. :func:`rebuild` evaluates everything.
+"""
+import datetime
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate
+from .models import Inventory, InventoryAlert, InventoryAlertRun
+from .realtime import publish_changes
+
+EVALUATE_BATCH = 500
+
+
+def expiring_days():
+    return getattr(settings, 'INVENTORY_ALERTS', {}).get('EXPIRING_DAYS', 30)
+
+
+def low_stock(queryset):
+    return queryset.filter(quantity__lte=F('threshold'))
+
+
+def expired(queryset, today=None):
+    return queryset.filter(expiry_date__lt=today or timezone.localdate())
+
+
+def expiring(queryset, days=None, today=None):
+    today = today or timezone.localdate()
+    days = expiring_days() if days is None else days
+    return queryset.filter(expiry_date__gte=today, expiry_date__lte=today + datetime.timedelta(days=days))
+
+
+def kinds(item, today, days):
+    """The alert kinds an item's ``(quantity, threshold, expiry_date)`` calls for."""
+    quantity, threshold, expiry_date = item
+    wanted = set()
+    if quantity <= threshold:
+        wanted.add('low_stock')
+    if expiry_date < today:
+        wanted.add('expired')
+    elif expiry_date <= today + datetime.timedelta(days=days):
+        wanted.add('expiring')
+    return wanted
+
+
+def _sync(apps, pks, today, days):
+    """Raise and resolve alerts for the items ``pks``; returns ``(raised, resolved)`` alert lists."""
+    Item, Alert = apps.get_model('api', 'Inventory'), apps.get_model('api', 'InventoryAlert')
+    now = timezone.now()
+    raised, resolved = [], []
+    pks = list(pks)
+    for start in range(0, len(pks), EVALUATE_BATCH):
+        batch = pks[start:start + EVALUATE_BATCH]
+        items = {
+            pk: kinds(values, today, days)
+            for pk, *values in Item.objects.filter(pk__in=batch).values_list(
+                'pk', 'quantity', 'threshold', 'expiry_date'
+            )
+        }
+        open_alerts = Alert.objects.filter(item_id__in=batch, resolved_at__isnull=True)
+        current = {(alert.item_id, alert.kind): alert for alert in open_alerts}
+        wanted = {(pk, kind) for pk, item_kinds in items.items() for kind in item_kinds}
+
+        stale = [alert for key, alert in current.items() if key not in wanted]
+        for alert in stale:
+            alert.resolved_at = now
+        Alert.objects.filter(pk__in=[alert.pk for alert in stale]).update(resolved_at=now)
+        resolved += stale
+        new = [Alert(item_id=pk, kind=kind, raised_at=now) for pk, kind in sorted(wanted - current.keys())]
+        if new:
+            try:
+                with transaction.atomic():
+                    raised += Alert.objects.bulk_create(new)
+            except IntegrityError:
+                # A concurrent evaluation of the same items raised them first.
+                pass
+    return raised, resolved
+
+
+def evaluate(pks, today=None, days=None):
+    """Bring the alerts of the items ``pks`` up to date; returns ``(raised, resolved)``."""
+    today = today or timezone.localdate()
+    days = expiring_days() if days is None else days
+    with transaction.atomic(savepoint=False):
+        raised, resolved = _sync(global_apps, pks, today, days)
+        publish_changes(InventoryAlert, raised, 'created')
+        publish_changes(InventoryAlert, resolved, 'updated')
+    if raised or resolved:
+        invalidate(InventoryAlert)
+    return raised, resolved
+
+
+def _values(item):
+    """``(quantity, threshold, expiry_date)`` of an instance, which may still hold unconverted input."""
+    opts = item._meta
+    names = ('quantity', 'threshold', 'expiry_date')
+    return tuple(opts.get_field(name).to_python(getattr(item, name)) for name in names)
+
+
+def evaluate_created(items, today=None, days=None):
+    """:func:`evaluate` for items created in the current transaction, which have no alerts yet."""
+    today = today or timezone.localdate()
+    days = expiring_days() if days is None else days
+    now = timezone.now()
+    raised = InventoryAlert.objects.bulk_create(
+        InventoryAlert(item_id=item.pk, kind=kind, raised_at=now)
+        for item in items
+        for kind in sorted(kinds(_values(item), today, days))
+    )
+    publish_changes(InventoryAlert, raised, 'created')
+    if raised:
+        invalidate(InventoryAlert)
+    return raised
+
+
+def crossed(since, today, days):
+    """Items whose expiry date crossed a window boundary between the days ``since`` and ``today``."""
+    window = datetime.timedelta(days=days)
+    return Inventory.objects.filter(
+        Q(expiry_date__gte=since, expiry_date__lt=today)
+        | Q(expiry_date__gt=since + window, expiry_date__lte=today + window)
+    ).values_list('pk', flat=True)
+
+
+def advance(today=None, full=False):
+    """
+    Evaluate what changed since the previous run and record this one. Runs
+    everything when there is no previous run, ``EXPIRING_DAYS`` changed or
+    ``full`` is set. Returns the :class:`~api.models.InventoryAlertRun`.
+    """
+    today = today or timezone.localdate()
+    days = expiring_days()
+    previous = InventoryAlertRun.objects.first()
+    if full or previous is None or previous.expiring_days != days:
+        pks = Inventory.objects.values_list('pk', flat=True)
+    elif previous.checked_on >= today:
+        pks = []
+    else:
+        pks = crossed(previous.checked_on, today, days)
+    pks = list(pks)
+
+    with transaction.atomic():
+        raised, resolved = evaluate(pks, today, days)
+        return InventoryAlertRun.objects.create(
+            checked_on=today, expiring_days=days,
+            examined=len(pks), raised=len(raised), resolved=len(resolved),
+        )
+
+
+def rebuild(apps=global_apps):
+    """Evaluate every item; used to backfill alerts when the table is created."""
+    Item = apps.get_model('api', 'Inventory')
+    _sync(apps, Item.objects.values_list('pk', flat=True), timezone.localdate(), expiring_days())
+
+
+def summary():
+    """Open alert counts by kind."""
+    counts = {kind: 0 for kind, _ in InventoryAlert.KIND_CHOICES}
+    counts.update(
+        InventoryAlert.objects.filter(resolved_at__isnull=True).order_by()
+        .values_list('kind').annotate(count=Count('id'))
+    )
+    return counts
+
+
+@receiver(post_save, sender=Inventory)
+def _evaluate_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        evaluate_created([instance])
+    else:
+        evaluate([instance.pk])
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Imported for their signal receivers.
+        from . import (  # noqa: F401
+            alerts, authentication, cache, db, metrics, realtime, rollups, search,
+        )
+        post_migrate.connect(search.ensure_installed, sender=self)
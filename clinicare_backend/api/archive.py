@@ -0,0 +1,164 @@
+"""
+Hot/cold archival of finished history.
+
+Appointments that are completed or cancelled and prescriptions that are no
+longer active stop changing, yet every list, calendar and report query over
+the hot tables still has to step over them. ``manage.py archive_history``
+moves those older than ``settings.ARCHIVE["RETENTION_DAYS"]`` into
+:class:`~api.models.ArchivedAppointment` and
+:class:`~api.models.ArchivedPrescription`, keeping their ids, so the hot
+tables and their indexes only hold the rows people still work with.
+
+Rows move in batches of ``BATCH_SIZE``, each copied and deleted in one short
+transaction, so bookings and prescriptions keep being written while a large
+backlog drains. The copy carries every field the rollups track and the hot
+row is deleted without signals, so the report counters need no change: a
+moved row keeps counting under the archive model (see ``rollups.COUNTERS``).
+
+Lists and detail routes read the hot table only; ``?include_archived=true``
+(:class:`ArchiveMixin`) adds the archive.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from .cache import invalidate
+from .db import writer_slot
+from .fastpath import compile_serializer
+from .metrics import serializing
+from .models import Appointment, ArchivedAppointment, ArchivedPrescription, Prescription
+from .pagination import KeysetPagination
+
+FINISHED_STATUSES = ('completed', 'cancelled')
+ARCHIVES = {
+    Appointment: ArchivedAppointment,
+    Prescription: ArchivedPrescription,
+}
+DEFAULTS = {'RETENTION_DAYS': 365, 'BATCH_SIZE': 1000}
+
+
+def get_setting(name):
+    return {**DEFAULTS, **getattr(settings, 'ARCHIVE', {})}[name]
+
+
+def cutoff(days=None, today=None):
+    """The first day that is kept hot."""
+    days = get_setting('RETENTION_DAYS') if days is None else days
+    return (today or timezone.localdate()) - datetime.timedelta(days=days)
+
+
+def due(model, first_kept):
+    """The hot rows of ``model`` that are finished and dated before ``first_kept``."""
+    if model is Appointment:
+        return Appointment.objects.filter(status__in=FINISHED_STATUSES, date__lt=first_kept)
+    start = datetime.datetime.combine(first_kept, datetime.time.min)
+    if settings.USE_TZ:
+        start = timezone.make_aware(start)
+    return Prescription.objects.filter(is_active=False, date_prescribed__lt=start)
+
+
+def move(queryset, batch_size=None):
+    """Move the rows of ``queryset`` to the model's archive table; returns how many moved."""
+    model = queryset.model
+    archive_model = ARCHIVES[model]
+    batch_size = batch_size or get_setting('BATCH_SIZE')
+    columns = [field.attname for field in model._meta.concrete_fields]
+    moved = 0
+    while True:
+        with writer_slot(), transaction.atomic():
+            rows = list(queryset.select_for_update().order_by('pk').values(*columns)[:batch_size])
+            if not rows:
+                break
+            archived_at = timezone.now()
+            archive_model.objects.bulk_create(archive_model(**row, archived_at=archived_at) for row in rows)
+            # A plain DELETE: the rows live on in the archive, so the rollup,
+            # cache and realtime delete handlers must not see them go.
+            model.objects.filter(pk__in=[row['id'] for row in rows])._raw_delete(model.objects.db)
+        moved += len(rows)
+    if moved:
+        invalidate(model, archive_model)
+    return moved
+
+
+def archive(days=None, batch_size=None, today=None, dry_run=False):
+    """Archive every model's finished history; returns ``{model: rows}`` (to be) moved."""
+    first_kept = cutoff(days, today)
+    if dry_run:
+        return {model: due(model, first_kept).count() for model in ARCHIVES}
+    return {model: move(due(model, first_kept), batch_size) for model in ARCHIVES}
+
+
+class ArchiveMixin:
+    """
+    ``?include_archived=true`` makes ``list`` and ``retrieve`` read
+    ``archive_model`` as well as the hot table. Such lists come from one
+    ``UNION ALL`` in the model's ordering, paged by the same keyset cursors
+    as the hot list; views whose lists filter on query parameters override
+    :meth:`get_archive_queryset` to apply the same filters.
+    """
+    archive_model = None
+
+    def include_archived(self):
+        return (
+            self.archive_model is not None
+            and self.request.method in SAFE_METHODS
+            and self.request.query_params.get('include_archived', '').lower() == 'true'
+        )
+
+    def get_archive_queryset(self):
+        return self.archive_model._default_manager.all()
+
+    def list(self, request, *args, **kwargs):
+        if not self.include_archived():
+            return super().list(request, *args, **kwargs)
+        hot = self.filter_queryset(self.get_queryset())
+        cold = self.get_archive_queryset()
+        serializer_class = self.get_serializer_class()
+        compiled = compile_serializer(serializer_class)
+        paginator = self.paginator
+        if compiled is None:
+            # Rare: the list serializers compile, so only odd ?fields= selections land here.
+            paging = (getattr(paginator, 'cursor_query_param', None), getattr(paginator, 'page_size_query_param', None))
+            if any(name and name in request.query_params for name in paging):
+                raise ValidationError({'include_archived': ['This selection of fields cannot be paginated.']})
+            data = serializer_class(list(hot), many=True, context=self.get_serializer_context()).data
+            data += serializer_class(list(cold), many=True, context=self.get_serializer_context()).data
+            return Response(data)
+
+        if isinstance(paginator, KeysetPagination):
+            rows = paginator.paginate_union_values([hot, cold], request, compiled.lookups, self)
+            if rows is not None:
+                with serializing():
+                    data = compiled.to_representation(rows)
+                return self.get_paginated_response(data)
+
+        ordering = [*hot.model._meta.ordering, 'id']
+        columns = list(compiled.lookups)
+        # Sort columns the serializer does not show ride along at the end,
+        # where to_representation ignores them.
+        columns += [name for name in dict.fromkeys(field.lstrip('-') for field in ordering) if name not in columns]
+        rows = (
+            hot.order_by().values_list(*columns)
+            .union(cold.order_by().values_list(*columns), all=True)
+            .order_by(*ordering)
+        )
+        with serializing():
+            return Response(compiled.to_representation(rows))
+
+    def get_object(self):
+        try:
+            return super().get_object()
+        except Http404:
+            if not self.include_archived():
+                raise
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = get_object_or_404(self.get_archive_queryset(), **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,184 @@
+"""
+Async-native variants of the hot read endpoints, mounted under ``/api/async/``.
+
+They return the same JSON as their DRF counterparts but are plain ``async def``
+Django views. Under ASGI a sync view runs start to finish in a thread, while
+these await each database round trip, so short requests interleave with long
+ones instead of queueing behind them. Rows are fetched with the async ORM
+(``aiterator``, ``aget``, ``ain_bulk``) and serialized with the same list
+serializers as the ViewSets, honouring ``?fields=``/``?exclude=``, once
+everything they touch is loaded; the unpaginated appointment list is
+serialized and streamed chunk by chunk. Patient search still runs its
+raw full-text SQL through ``sync_to_async``, since Django has no async cursor.
+
+These views skip the response cache and support only token authentication.
+``manage.py benchmark_async`` compares them with the DRF views under load.
+"""
+import json
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import CachedJWTAuthentication
+from .availability import aavailability
+from .mixins import eager_loading_paths, load_only, requested_serializer
+from .models import Appointment, Patient
+from .pagination import KeysetPagination
+from .reports import REPORTS, areport_rows
+from .search import search_patient_ids
+from .serializers import (
+    AppointmentListSerializer, AppointmentSerializer, PatientListSerializer, PatientSerializer,
+)
+from .throttling import ReadWriteThrottle
+from .views import (
+    BulkDoctorAvailabilityView, working_hours, active_doctors, availability_grid_data, filter_appointments,
+    parse_availability_day, parse_availability_range, parse_doctor_ids,
+)
+
+
+CHUNK_SIZE = 500
+# Same encoding as DRF's JSONRenderer.
+JSON_OPTIONS = {'ensure_ascii': False, 'separators': (',', ':')}
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder, json_dumps_params=JSON_OPTIONS)
+
+
+async def serialized_chunks(queryset, serializer_class, context):
+    """Serialize ``queryset`` a fetched chunk at a time, so no single step holds the event loop for long."""
+    chunk = []
+    async for instance in queryset.aiterator(chunk_size=CHUNK_SIZE):
+        chunk.append(instance)
+        if len(chunk) == CHUNK_SIZE:
+            yield serializer_class(chunk, many=True, context=context).data
+            chunk = []
+    if chunk:
+        yield serializer_class(chunk, many=True, context=context).data
+
+
+async def json_array(chunks):
+    separator = '['
+    async for items in chunks:
+        if items:
+            yield separator + json.dumps(items, cls=JSONEncoder, **JSON_OPTIONS)[1:-1]
+            separator = ','
+    yield '[]' if separator == '[' else ']'
+
+
+def streaming_json_list(queryset, serializer_class, request):
+    """A JSON array response streamed while the rows are still being fetched."""
+    chunks = serialized_chunks(queryset, serializer_class, {'request': request})
+    return StreamingHttpResponse(json_array(chunks), content_type='application/json')
+
+
+def eager_queryset(model, serializer_class):
+    select, prefetch = eager_loading_paths(serializer_class)
+    queryset = model.objects.all()
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return load_only(queryset, serializer_class)
+
+
+def async_api_view(view):
+    """GET-only, authenticated async view; API exceptions become DRF-shaped errors."""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return json_response(
+                {'detail': f'Method "{request.method}" not allowed.'}, status.HTTP_405_METHOD_NOT_ALLOWED
+            )
+        try:
+            result = await CachedJWTAuthentication().aauthenticate(request)
+            if result is None:
+                raise exceptions.NotAuthenticated()
+            # A DRF request for query_params and absolute URLs; authentication is already done.
+            api_request = Request(request, authenticators=())
+            api_request.user, api_request.auth = result
+            # The throttle's cache round trip blocks, so it runs in a thread like the search SQL.
+            throttle = ReadWriteThrottle()
+            if not await sync_to_async(throttle.allow_request)(api_request, None):
+                raise exceptions.Throttled(throttle.wait())
+            return await view(api_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            response = json_response(detail, exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                response['WWW-Authenticate'] = 'Bearer realm="api"'
+            if isinstance(exc, exceptions.Throttled) and exc.wait:
+                response['Retry-After'] = str(math.ceil(exc.wait))
+            return response
+    return wrapper
+
+
+@async_api_view
+async def appointment_list(request):
+    serializer_class = requested_serializer(AppointmentSerializer, request.query_params, AppointmentListSerializer)
+    queryset = filter_appointments(eager_queryset(Appointment, serializer_class), request.query_params)
+    paginator = KeysetPagination()
+    page = await paginator.apaginate_queryset(queryset, request)
+    if page is not None:
+        data = serializer_class(page, many=True, context={'request': request}).data
+        return json_response(paginator.get_paginated_data(data))
+    return streaming_json_list(queryset, serializer_class, request)
+
+
+@async_api_view
+async def patient_search(request):
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return json_response({'error': 'limit must be an integer'}, status.HTTP_400_BAD_REQUEST)
+
+    ids = await sync_to_async(search_patient_ids)(request.query_params.get('q', ''), limit=limit)
+    serializer_class = requested_serializer(PatientSerializer, request.query_params, PatientListSerializer)
+    patients = await eager_queryset(Patient, serializer_class).ain_bulk(ids)
+    ranked = [patients[pk] for pk in ids if pk in patients]
+    return json_response(serializer_class(ranked, many=True, context={'request': request}).data)
+
+
+@async_api_view
+async def doctor_availability(request, doctor_id):
+    try:
+        date = parse_availability_day(request.query_params)
+        hours = working_hours(request)
+    except ValueError as exc:
+        return json_response({'error': str(exc)}, status.HTTP_400_BAD_REQUEST)
+
+    grid = await aavailability([doctor_id], date, date, hours)
+    return json_response({
+        'doctor_id': doctor_id,
+        'date': request.query_params['date'],
+        'available_slots': grid[doctor_id][date],
+    })
+
+
+@async_api_view
+async def bulk_doctor_availability(request):
+    try:
+        start_date, end_date = parse_availability_range(
+            request.query_params, BulkDoctorAvailabilityView.max_days
+        )
+        hours = working_hours(request)
+        doctor_ids = parse_doctor_ids(request.query_params)
+    except ValueError as exc:
+        return json_response({'error': str(exc)}, status.HTTP_400_BAD_REQUEST)
+    if doctor_ids is None:
+        doctor_ids = [pk async for pk in active_doctors()]
+
+    grid = await aavailability(doctor_ids, start_date, end_date, hours)
+    return json_response(availability_grid_data(grid, start_date, end_date, hours))
+
+
+@async_api_view
+async def report(request, name):
+    if name not in REPORTS:
+        raise exceptions.NotFound()
+    return json_response(await areport_rows(name))
@@ -0,0 +1,151 @@
+"""
+JWT authentication without a user query on reads.
+
+:class:`CachedJWTAuthentication` validates the token exactly like simplejwt's
+``JWTAuthentication``. For safe methods (GET, HEAD, OPTIONS) it then takes the
+user from a bounded in-process LRU keyed by the token's ``user_id`` claim
+instead of querying the database. Writes always load the user from the
+database and refresh the cached copy, so they never act on stale identity.
+
+Cached entries expire after ``AUTH_USER_CACHE["TIMEOUT"]`` seconds and are
+dropped as soon as the user is saved or deleted in this process, which covers
+deactivation, role and password changes. Other workers notice within the
+timeout. ``QuerySet.update`` on users sends no signal, so callers must use
+:func:`forget_user` after it. Async views authenticate through
+:meth:`CachedJWTAuthentication.aauthenticate`, which only awaits the database
+on a cache miss.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+
+class UserCache:
+    """Thread-safe LRU of user field values with a per-entry time to live."""
+
+    def __init__(self, max_entries=10_000, timeout=60):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fields = [field.attname for field in User._meta.concrete_fields]
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, db, values = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # A fresh instance per request, so nothing a view does to it leaks into the cache.
+        return User.from_db(db, self._fields, values)
+
+    def put(self, user):
+        key = str(getattr(user, api_settings.USER_ID_FIELD))
+        values = [getattr(user, name) for name in self._fields]
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, user._state.db, values)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_user_cache = None
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        options = getattr(settings, 'AUTH_USER_CACHE', {})
+        _user_cache = UserCache(
+            max_entries=options.get('MAX_ENTRIES', 10_000), timeout=options.get('TIMEOUT', 60)
+        )
+    return _user_cache
+
+
+def forget_user(user_id):
+    get_user_cache().discard(user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _forget_on_write(sender, instance, **kwargs):
+    user_id = getattr(instance, api_settings.USER_ID_FIELD)
+    forget_user(user_id)
+    # Again after commit, in case a read re-cached the old row in between.
+    transaction.on_commit(lambda: forget_user(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def authenticate(self, request):
+        # DRF builds authenticators per request, so this is request-local.
+        self.read_only = request.method in SAFE_METHODS
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        cache = get_user_cache()
+        user = cache.get(self.get_user_id(validated_token)) if getattr(self, 'read_only', False) else None
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.put(user)
+            return user
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """``authenticate`` for async views: ``(user, token)`` or ``None``."""
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user_id = self.get_user_id(validated_token)
+        cache = get_user_cache()
+        user = cache.get(user_id)
+        if user is None:
+            try:
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed('User not found', code='user_not_found')
+            self.check_user(user, validated_token)
+            cache.put(user)
+            return user, validated_token
+        return self.check_user(user, validated_token), validated_token
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+        return user
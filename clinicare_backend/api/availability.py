@@ -0,0 +1,113 @@
+"""
+Appointment slot availability.
+
+Each doctor-day is a bitset with one bit per slot of the working day, filled
+from a single query over every requested doctor and date, so a clinic-wide
+week grid costs the same one query as a single doctor's day.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+from .models import Appointment
+
+DEFAULT_HOURS = {
+    "START": "09:00",
+    "END": "17:00",
+    "SLOT_MINUTES": 30,
+}
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+class WorkingHours:
+    """Working day split into fixed-length slots, from ``settings.CLINIC_HOURS``."""
+
+    def __init__(self, start, end, slot_minutes):
+        self.start = _minutes(datetime.strptime(start, "%H:%M")) if isinstance(start, str) else _minutes(start)
+        self.end = _minutes(datetime.strptime(end, "%H:%M")) if isinstance(end, str) else _minutes(end)
+        self.slot_minutes = int(slot_minutes)
+        if self.slot_minutes <= 0:
+            raise ValueError("Slot length must be a positive number of minutes")
+        if self.end <= self.start:
+            raise ValueError("Working hours must end after they start")
+        self.slot_count = (self.end - self.start) // self.slot_minutes
+        self.full_mask = (1 << self.slot_count) - 1
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        config = {**DEFAULT_HOURS, **getattr(settings, "CLINIC_HOURS", {})}
+        config.update({key.upper(): value for key, value in overrides.items() if value})
+        return cls(config["START"], config["END"], config["SLOT_MINUTES"])
+
+    def labels(self):
+        return [
+            "%02d:%02d" % divmod(self.start + index * self.slot_minutes, 60)
+            for index in range(self.slot_count)
+        ]
+
+    def mask_for(self, value):
+        """Bits of the slots overlapped by an appointment starting at ``value``."""
+        begin = _minutes(value) - self.start
+        end = begin + self.slot_minutes
+        first = max(begin // self.slot_minutes, 0)
+        last = min(-(-end // self.slot_minutes), self.slot_count)
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+
+
+def _booked_rows(doctor_ids, start_date, end_date):
+    return (
+        Appointment.objects.filter(doctor_id__in=doctor_ids, date__range=(start_date, end_date))
+        .exclude(status="cancelled")
+        .exclude(time__isnull=True)
+        .order_by()
+        .values_list("doctor_id", "date", "time")
+    )
+
+
+def _fold_masks(rows, hours):
+    masks = defaultdict(int)
+    for doctor_id, date, time in rows:
+        masks[doctor_id, date] |= hours.mask_for(time)
+    return masks
+
+
+def booked_masks(doctor_ids, start_date, end_date, hours):
+    """Map ``(doctor_id, date)`` to the bitset of booked slots."""
+    return _fold_masks(_booked_rows(doctor_ids, start_date, end_date), hours)
+
+
+async def abooked_masks(doctor_ids, start_date, end_date, hours):
+    rows = [row async for row in _booked_rows(doctor_ids, start_date, end_date)]
+    return _fold_masks(rows, hours)
+
+
+def free_slots(mask, hours, labels=None):
+    labels = labels or hours.labels()
+    free = hours.full_mask & ~mask
+    return [labels[index] for index in range(hours.slot_count) if free >> index & 1]
+
+
+def _grid(masks, doctor_ids, start_date, end_date, hours):
+    labels = hours.labels()
+    days = [start_date + timedelta(days=offset) for offset in range((end_date - start_date).days + 1)]
+    return {
+        doctor_id: {day: free_slots(masks.get((doctor_id, day), 0), hours, labels) for day in days}
+        for doctor_id in doctor_ids
+    }
+
+
+def availability(doctor_ids, start_date, end_date, hours):
+    """Free slot labels per doctor per day: ``{doctor_id: {date: [...]}}``."""
+    masks = booked_masks(doctor_ids, start_date, end_date, hours)
+    return _grid(masks, doctor_ids, start_date, end_date, hours)
+
+
+async def aavailability(doctor_ids, start_date, end_date, hours):
+    masks = await abooked_masks(doctor_ids, start_date, end_date, hours)
+    return _grid(masks, doctor_ids, start_date, end_date, hours)
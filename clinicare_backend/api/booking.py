@@ -0,0 +1,145 @@
+"""
+Appointment booking that stays consistent under concurrent front-desk load.
+
+The slot itself is guarded by the ``appointment_unique_active_slot``
+constraint, so a double booking fails at the database no matter how the
+requests interleave. Patient resolution by name has no natural key, so it is
+serialized per name instead: PostgreSQL takes a transaction-scoped advisory
+lock and SQLite relies on ``BEGIN IMMEDIATE`` transactions (see
+``DATABASES['default']['OPTIONS']``), which admit one writer at a time.
+"""
+import zlib
+
+from django.db import IntegrityError, connection, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import rollups
+from .cache import invalidate
+from .db import writer_slot
+from .realtime import publish_changes
+from .models import Appointment, Patient
+
+class SlotUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This doctor already has an appointment at that time.'
+    default_code = 'slot_unavailable'
+
+
+def _lock_patient_name(name):
+    if connection.vendor == 'postgresql':
+        key = zlib.crc32(name.strip().lower().encode('utf-8'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s, %s)', [0x636c, key - (1 << 31)])
+
+
+def resolve_patient(name, age=0):
+    """Race-safe ``Patient.objects.get_or_create(name=...)``; call inside a transaction."""
+    _lock_patient_name(name)
+    patient = Patient.objects.filter(name=name).order_by('id').first()
+    if patient is None:
+        patient = Patient.objects.create(name=name, age=age)
+    return patient
+
+
+def resolve_patients(ages_by_name):
+    """Bulk ``resolve_patient``: map each name to its patient, creating the missing ones."""
+    for name in sorted(ages_by_name):
+        _lock_patient_name(name)
+    patients = {}
+    for patient in Patient.objects.filter(name__in=list(ages_by_name)).order_by('-id'):
+        patients[patient.name] = patient
+    missing = [Patient(name=name, age=age) for name, age in ages_by_name.items() if name not in patients]
+    if missing:
+        created = Patient.objects.bulk_create(missing)
+        for patient in created:
+            patients[patient.name] = patient
+        publish_changes(Patient, created, 'created')
+        invalidate(Patient)
+    return patients
+
+
+def slot_conflicts(slots, exclude_pks=()):
+    """
+    Flag each ``(doctor_id, date, time)`` that is already booked or repeats an
+    earlier one; appointments in ``exclude_pks`` (being moved) do not count.
+    """
+    wanted = [slot for slot in slots if slot[0] is not None and slot[2] is not None]
+    taken = set()
+    if wanted:
+        taken = set(
+            Appointment.objects.filter(
+                doctor_id__in={slot[0] for slot in wanted}, date__in={slot[1] for slot in wanted},
+            ).exclude(status='cancelled').exclude(pk__in=exclude_pks).values_list('doctor_id', 'date', 'time')
+        )
+    conflicts = []
+    for slot in slots:
+        conflicts.append(slot in taken)
+        if slot[0] is not None and slot[2] is not None:
+            taken.add(slot)
+    return conflicts
+
+
+def slot_taken(doctor_id, date, time, exclude_pk=None):
+    """Whether another active appointment holds the slot, i.e. whether an ``IntegrityError`` was a clash."""
+    if doctor_id is None or time is None:
+        return False
+    taken = Appointment.objects.filter(doctor_id=doctor_id, date=date, time=time).exclude(status='cancelled')
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    return taken.exists()
+
+
+def claim_slot(**fields):
+    """Insert the appointment, raising ``SlotUnavailable`` if the slot is already taken."""
+    try:
+        with transaction.atomic():
+            return Appointment.objects.create(**fields)
+    except IntegrityError:
+        if slot_taken(fields.get('doctor_id'), fields['date'], fields['time']):
+            raise SlotUnavailable()
+        raise
+
+
+def book_appointment(date, time, patient_name, doctor_id=None, age=0):
+    with writer_slot(), transaction.atomic():
+        patient = resolve_patient(patient_name, age)
+        return claim_slot(
+            date=date,
+            time=time,
+            patient=patient,
+            doctor_id=doctor_id or None,
+        )
+
+
+def book_appointments(items):
+    """
+    Bulk ``book_appointment`` in one transaction. ``items`` are dicts with
+    ``date``, ``time``, ``patient_name`` and optional ``doctor_id`` and ``age``.
+    Rollups, cached lists and realtime subscribers are updated here since
+    ``bulk_create`` sends no signals.
+    """
+    ages_by_name = {}
+    for item in items:
+        ages_by_name.setdefault(item['patient_name'], item.get('age') or 0)
+
+    with writer_slot(), transaction.atomic():
+        patients = resolve_patients(ages_by_name)
+        try:
+            with transaction.atomic():
+                appointments = Appointment.objects.bulk_create([
+                    Appointment(
+                        date=item['date'],
+                        time=item['time'],
+                        patient=patients[item['patient_name']],
+                        doctor_id=item.get('doctor_id') or None,
+                    )
+                    for item in items
+                ])
+        except IntegrityError:
+            raise SlotUnavailable()
+        for appointment in appointments:
+            rollups.record(Appointment, None, rollups.snapshot(appointment))
+        publish_changes(Appointment, appointments, 'created')
+    invalidate(Appointment)
+    return appointments
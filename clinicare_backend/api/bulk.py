@@ -0,0 +1,175 @@
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from . import rollups
+from .cache import invalidate
+from .mixins import eager_loading_paths
+from .realtime import publish_changes
+
+
+class BulkConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The batch conflicts with existing data.'
+    default_code = 'bulk_conflict'
+
+
+class BulkModelMixin:
+    """
+    ``/bulk/`` route accepting arrays: POST creates, PATCH updates (each item
+    carries its ``id``) and DELETE removes ``{"ids": [...]}``. Each batch is
+    validated as a whole and written in one transaction with
+    ``bulk_create``/``bulk_update``; when any item is invalid nothing is written
+    and ``errors`` lists one entry per item (``{}`` for the valid ones).
+    """
+    bulk_max_items = 1000
+    bulk_conflict_exception = BulkConflict
+
+    @action(detail=False, methods=['post', 'patch', 'delete'], url_path='bulk')
+    def bulk(self, request):
+        if request.method == 'POST':
+            return self.create_many(request)
+        if request.method == 'PATCH':
+            return self.update_many(request)
+        return self.destroy_many(request)
+
+    def get_bulk_items(self, data):
+        if not isinstance(data, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        if not data:
+            raise ValidationError({'non_field_errors': ['The list is empty.']})
+        if len(data) > self.bulk_max_items:
+            raise ValidationError({'non_field_errors': [f'At most {self.bulk_max_items} items per request.']})
+        return data
+
+    def bulk_error_response(self, errors):
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    def reload(self, objects):
+        """Re-read written rows with the serializer's eager loading, in input order."""
+        model = self.get_queryset().model
+        select, prefetch = eager_loading_paths(self.get_serializer_class())
+        rows = model._default_manager.select_related(*select).prefetch_related(*prefetch).in_bulk(
+            [obj.pk for obj in objects]
+        )
+        return [rows[obj.pk] for obj in objects]
+
+    def create_many(self, request):
+        serializer = self.get_serializer(data=self.get_bulk_items(request.data), many=True)
+        if not serializer.is_valid():
+            return self.bulk_error_response(serializer.errors)
+        objects = self.perform_create_many(serializer.validated_data)
+        return Response(
+            self.get_serializer(self.reload(objects), many=True).data, status=status.HTTP_201_CREATED
+        )
+
+    def perform_create_many(self, validated_items):
+        model = self.get_queryset().model
+        try:
+            with transaction.atomic():
+                objects = model._default_manager.bulk_create([model(**item) for item in validated_items])
+                self.record_rollups(model, [(None, obj) for obj in objects])
+                self.bulk_written(objects, created=True)
+                publish_changes(model, objects, 'created')
+        except IntegrityError:
+            raise self.bulk_conflict_exception()
+        invalidate(model)
+        return objects
+
+    def update_many(self, request):
+        items = self.get_bulk_items(request.data)
+        ids = [self.item_id(item) for item in items]
+        instances = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+        errors, changes = [], []
+        for item, pk in zip(items, ids):
+            if pk is None:
+                errors.append({'id': ['Expected an integer id.']})
+                continue
+            instance = instances.get(pk)
+            if instance is None:
+                errors.append({'id': ['Not found.']})
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True)
+            if serializer.is_valid():
+                errors.append({})
+                changes.append((instance, serializer.validated_data))
+            else:
+                errors.append(serializer.errors)
+        if any(errors):
+            return self.bulk_error_response(errors)
+        errors = self.update_conflicts(changes)
+        if any(errors):
+            return self.bulk_error_response(errors)
+
+        objects = self.perform_update_many(changes)
+        return Response(self.get_serializer(self.reload(objects), many=True).data)
+
+    @staticmethod
+    def integer_id(value):
+        """``value`` if it is an integer id (JSON ``true`` is not), else ``None``."""
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    def item_id(self, item):
+        """The integer ``id`` of a bulk update item, or ``None``."""
+        return self.integer_id(item.get('id')) if isinstance(item, dict) else None
+
+    def perform_update_many(self, changes):
+        model = self.get_queryset().model
+        fields, pairs = set(), []
+        for instance, data in changes:
+            before = rollups.snapshot(instance) if model in rollups.TRACKED_FIELDS else None
+            for name, value in data.items():
+                setattr(instance, name, value)
+                fields.add(name)
+            pairs.append((before, instance))
+        objects = [instance for instance, _ in changes]
+        if fields:
+            try:
+                with transaction.atomic():
+                    model._default_manager.bulk_update(objects, sorted(fields), batch_size=500)
+                    self.record_rollups(model, pairs)
+                    self.bulk_written(objects, created=False)
+                    publish_changes(model, objects, 'updated')
+            except IntegrityError:
+                # A clash written between the check and the update; anything else is a bug.
+                if any(self.update_conflicts(changes)):
+                    raise self.bulk_conflict_exception()
+                raise
+            invalidate(model)
+        return objects
+
+    def update_conflicts(self, changes):
+        """
+        Per-item errors (``{}`` when fine) for valid ``(instance, validated_data)``
+        updates that would clash with each other or with other rows on a
+        unique constraint; checked before writing.
+        """
+        return [{} for _ in changes]
+
+    def destroy_many(self, request):
+        data = request.data.get('ids') if isinstance(request.data, dict) else request.data
+        ids = [self.integer_id(pk) for pk in self.get_bulk_items(data)]
+        found = set(
+            self.get_queryset().filter(pk__in=[pk for pk in ids if pk is not None]).values_list('pk', flat=True)
+        )
+        errors = [
+            {'id': ['Expected an integer id.']} if pk is None else {} if pk in found else {'id': ['Not found.']}
+            for pk in ids
+        ]
+        if any(errors):
+            return self.bulk_error_response(errors)
+        with transaction.atomic():
+            # QuerySet.delete() sends post_delete per row, which keeps rollups and caches current.
+            self.get_queryset().model._default_manager.filter(pk__in=ids).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def record_rollups(self, model, pairs):
+        if model not in rollups.TRACKED_FIELDS:
+            return
+        for before, after in pairs:
+            rollups.record(model, before, rollups.snapshot(after))
+
+    def bulk_written(self, objects, created):
+        """Hook for other derived state of rows written by ``bulk_create``/``bulk_update``, in their transaction."""
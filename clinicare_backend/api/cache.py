@@ -0,0 +1,142 @@
+"""
+Response cache for list and report endpoints.
+
+Cached bodies are keyed on the path, query string, renderer and the user's
+role (or the user, for responses built for one user), plus a version token
+per model the response depends on. Saving or deleting one of those models
+replaces its token, which orphans exactly the responses built from it.
+Responses carry an ETag so clients revalidating with ``If-None-Match`` get a
+bodiless 304.
+
+Signals do not fire for ``QuerySet.update`` or ``bulk_create``; code using
+those must call :func:`invalidate` itself. The default local-memory backend is
+per process, so multi-worker deployments should point ``CACHES`` at the file
+or Redis backend.
+"""
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+
+from .models import User, Patient, Appointment, ArchivedAppointment, ArchivedPrescription, Inventory, Prescription
+
+CACHED_MODELS = (User, Patient, Appointment, ArchivedAppointment, Inventory, Prescription, ArchivedPrescription)
+
+
+def get_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(model):
+    return f'response-version:{model._meta.label_lower}'
+
+
+def versions(models):
+    cache = get_cache()
+    keys = [_version_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # A fresh random token rather than a counter, so an evicted
+            # version can never line up with an old entry again.
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def invalidate(*models):
+    cache = get_cache()
+    for model in models:
+        cache.set(_version_key(model), uuid.uuid4().hex, None)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def _invalidate_on_write(sender, **kwargs):
+    if sender in CACHED_MODELS:
+        invalidate(sender)
+        # Bump again once the write is visible, so a reader that cached the
+        # pre-commit rows in between is discarded too.
+        transaction.on_commit(lambda: invalidate(sender))
+
+
+def _cache_key(request, models, per_user=False):
+    role = getattr(request.user, 'role', None) or 'anonymous'
+    if per_user:
+        role = f'{role}:{request.user.pk}'
+    query = request.query_params.urlencode() if hasattr(request, 'query_params') else request.GET.urlencode()
+    raw = '|'.join([request.path, query, request.accepted_renderer.format, role, *versions(models)])
+    return 'response:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _etag(content):
+    return '"%s"' % hashlib.sha1(content).hexdigest()
+
+
+def _not_modified(request, etag):
+    candidates = request.META.get('HTTP_IF_NONE_MATCH', '')
+    return etag in [candidate.strip() for candidate in candidates.split(',')]
+
+
+def _render(request, response):
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = {'request': request, 'response': response}
+    return response.render()
+
+
+def cached_response(request, models, produce, per_user=False):
+    """
+    Serve ``produce()``'s response from the cache when possible; ``per_user``
+    keeps one entry per user instead of per role.
+    """
+    if request.method != 'GET' or request.accepted_renderer.format != 'json':
+        return produce()
+
+    cache = get_cache()
+    key = _cache_key(request, models, per_user)
+    entry = cache.get(key)
+    if entry is None:
+        response = produce()
+        if response.status_code != 200:
+            return response
+        _render(request, response)
+        entry = {
+            'content': response.content,
+            'content_type': response['Content-Type'],
+            'etag': _etag(response.content),
+        }
+        cache.set(key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+
+    if _not_modified(request, entry['etag']):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def cache_response(*models):
+    """Cache a function-based API view; goes beneath ``@api_view``."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            return cached_response(request, models, lambda: view(request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+class CachedListMixin:
+    """Cache ``list`` responses; ``cache_models`` names every model the list renders."""
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        models = self.cache_models or (self.get_queryset().model,)
+        return cached_response(request, models, lambda: super(CachedListMixin, self).list(request, *args, **kwargs))
@@ -0,0 +1,89 @@
+"""
+Appointment calendar.
+
+A month or week of appointments summarized as counts by status per day and
+per doctor, from one grouped query over the window (a range scan on
+``appointment_date_time_idx``), so a month view is one small response instead
+of every appointment. A single day's rows are fetched separately when the
+user drills down.
+"""
+import datetime
+
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Appointment
+
+STATUSES = tuple(value for value, _ in Appointment._meta.get_field('status').choices)
+MAX_DAYS = 42
+
+
+def parse_day(params, name):
+    try:
+        return datetime.date.fromisoformat(params[name])
+    except ValueError:
+        raise ValidationError({name: ['Expected a date as YYYY-MM-DD.']})
+
+
+def window(params, today=None):
+    """
+    ``(first, last)`` day of ``?month=YYYY-MM``, of the Monday-to-Sunday
+    ``?week=`` containing the given day, or of ``?from=&to=`` (at most
+    :data:`MAX_DAYS` days). Defaults to the current month.
+    """
+    if 'week' in params:
+        day = parse_day(params, 'week')
+        first = day - datetime.timedelta(days=day.weekday())
+        try:
+            return first, first + datetime.timedelta(days=6)
+        except OverflowError:
+            raise ValidationError({'week': ['Expected a week within the calendar.']})
+    if 'from' in params or 'to' in params:
+        if not ('from' in params and 'to' in params):
+            raise ValidationError({'non_field_errors': ['Pass both from and to.']})
+        first, last = parse_day(params, 'from'), parse_day(params, 'to')
+        if not 0 <= (last - first).days < MAX_DAYS:
+            raise ValidationError({'to': [f'Expected a day on or after from, at most {MAX_DAYS} days later.']})
+        return first, last
+    if 'month' in params:
+        try:
+            first = datetime.datetime.strptime(params['month'], '%Y-%m').date()
+        except ValueError:
+            raise ValidationError({'month': ['Expected a month as YYYY-MM.']})
+    else:
+        first = (today or timezone.localdate()).replace(day=1)
+    if first.month == 12:
+        return first, first.replace(day=31)
+    return first, first.replace(month=first.month + 1) - datetime.timedelta(days=1)
+
+
+def _bucket():
+    return {'total': 0, 'counts': dict.fromkeys(STATUSES, 0)}
+
+
+def counts(queryset, first, last):
+    """Per-day status counts, with a per-doctor breakdown, for the days of the window that have appointments."""
+    rows = (
+        queryset.filter(date__range=(first, last)).order_by()
+        .values_list('date', 'doctor', 'status').annotate(count=Count('id'))
+    )
+    days = {}
+    for date, doctor, status, count in rows:
+        day = days.setdefault(date, {**_bucket(), 'doctors': {}})
+        doctor_bucket = day['doctors'].setdefault(doctor, _bucket())
+        for bucket in (day, doctor_bucket):
+            bucket['total'] += count
+            bucket['counts'][status] = bucket['counts'].get(status, 0) + count
+    return [
+        {
+            'date': date,
+            'total': day['total'],
+            'counts': day['counts'],
+            'doctors': [
+                {'doctor': doctor, **bucket}
+                for doctor, bucket in sorted(day['doctors'].items(), key=lambda item: (item[0] is None, item[0] or 0))
+            ],
+        }
+        for date, day in sorted(days.items())
+    ]
@@ -0,0 +1,148 @@
+"""
+Role dashboards.
+
+``GET /api/dashboard/`` returns the KPIs and the few rows the requesting
+user's role dashboard shows, in one response. Each section costs a fixed
+number of queries whatever the table sizes: one conditional aggregate for its
+counts and one ``LIMIT``-ed read of its top rows through the compiled
+serializers. The per-model ``stats`` actions serve the counts on their own.
+"""
+import datetime
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from . import alerts
+from .cache import cached_response
+from .fastpath import compile_serializer
+from .metrics import serializing
+from .models import User, Patient, Appointment, Inventory, InventoryAlert
+from .serializers import AppointmentListSerializer, InventoryAlertSerializer, PatientListSerializer
+
+TOP_N = 5
+
+# Sections shown per role, in display order.
+ROLE_SECTIONS = {
+    'admin': ('users', 'patients', 'appointments', 'inventory'),
+    'doctor': ('patients', 'appointments', 'inventory'),
+    'nurse': ('patients', 'inventory'),
+    'staff': ('patients', 'appointments'),
+    'patient': ('appointments',),
+}
+
+
+def _top(serializer_class, queryset):
+    with serializing():
+        return compile_serializer(serializer_class).serialize(queryset[:TOP_N])
+
+
+def user_stats():
+    counts = dict.fromkeys((role for role, _ in User.ROLE_CHOICES), 0)
+    counts.update(User.objects.order_by().values_list('role').annotate(count=Count('id')))
+    return {'total': sum(counts.values()), 'by_role': counts}
+
+
+def patient_stats(queryset=None):
+    return (queryset if queryset is not None else Patient.objects.all()).aggregate(
+        total=Count('id'),
+        with_allergies=Count('id', filter=~Q(allergies='')),
+        with_chronic_conditions=Count('id', filter=~Q(chronic_conditions='')),
+        uninsured=Count('id', filter=Q(insurance_provider='')),
+    )
+
+
+def appointment_stats(queryset=None, today=None):
+    today = today or timezone.localdate()
+    return (queryset if queryset is not None else Appointment.objects.all()).aggregate(
+        today=Count('id', filter=Q(date=today)),
+        today_scheduled=Count('id', filter=Q(date=today, status='scheduled')),
+        today_completed=Count('id', filter=Q(date=today, status='completed')),
+        today_cancelled=Count('id', filter=Q(date=today, status='cancelled')),
+        upcoming=Count('id', filter=Q(date__gt=today, status='scheduled')),
+        next_7_days=Count(
+            'id', filter=Q(date__gt=today, date__lte=today + datetime.timedelta(days=7), status='scheduled')
+        ),
+    )
+
+
+def inventory_stats(today=None, days=None):
+    today = today or timezone.localdate()
+    days = alerts.expiring_days() if days is None else days
+    return Inventory.objects.aggregate(
+        items=Count('id'),
+        low_stock=Count('id', filter=Q(quantity__lte=F('threshold'))),
+        expired=Count('id', filter=Q(expiry_date__lt=today)),
+        expiring=Count('id', filter=Q(
+            expiry_date__gte=today, expiry_date__lte=today + datetime.timedelta(days=days)
+        )),
+    )
+
+
+def _appointments_of(user):
+    queryset = Appointment.objects.all()
+    if user.role == 'doctor':
+        return queryset.filter(doctor=user)
+    if user.role == 'patient':
+        return queryset.filter(patient__user=user)
+    return queryset
+
+
+def _patients_of(user):
+    queryset = Patient.objects.all()
+    if user.role == 'doctor':
+        return queryset.filter(pk__in=Appointment.objects.filter(doctor=user).values('patient'))
+    return queryset
+
+
+def _users_section(user, today):
+    return user_stats()
+
+
+def _patients_section(user, today):
+    queryset = _patients_of(user)
+    # No registration date on Patient; the newest rows have the highest ids.
+    return {**patient_stats(queryset), 'recent': _top(PatientListSerializer, queryset.order_by('-id'))}
+
+
+def _appointments_section(user, today):
+    queryset = _appointments_of(user)
+    if user.role == 'patient':
+        rows = queryset.filter(date__gte=today, status='scheduled').order_by('date', 'time')
+    else:
+        rows = queryset.filter(date=today).order_by('time')
+    return {**appointment_stats(queryset, today), 'rows': _top(AppointmentListSerializer, rows)}
+
+
+def _inventory_section(user, today):
+    open_alerts = InventoryAlert.objects.filter(resolved_at__isnull=True).order_by('-raised_at')
+    return {**inventory_stats(today), 'alerts': _top(InventoryAlertSerializer, open_alerts)}
+
+
+SECTIONS = {
+    'users': _users_section,
+    'patients': _patients_section,
+    'appointments': _appointments_section,
+    'inventory': _inventory_section,
+}
+
+
+def build(user, today=None):
+    """The dashboard of ``user``'s role."""
+    today = today or timezone.localdate()
+    data = {'role': user.role, 'date': today}
+    for name in ROLE_SECTIONS.get(user.role, ()):
+        data[name] = SECTIONS[name](user, today)
+    return data
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    """KPIs and top rows for the requesting user's role dashboard."""
+    return cached_response(
+        request, (User, Patient, Appointment, Inventory, InventoryAlert),
+        lambda: Response(build(request.user)), per_user=True,
+    )
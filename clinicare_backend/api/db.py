@@ -0,0 +1,40 @@
+"""
+Per-connection database setup.
+
+SQLite keeps most tuning in per-connection PRAGMAs, so every new connection
+runs the ``PRAGMAS`` entry of its ``DATABASES`` profile (see
+``DATABASE_PROFILES`` in settings). ``journal_mode=WAL`` is persistent in the
+database file; the rest apply to the connection only.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_sqlite_writer = threading.Lock()
+
+
+@receiver(connection_created)
+def apply_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS') or {}
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@contextmanager
+def writer_slot():
+    """Queue this process's SQLite writers; a no-op on other databases."""
+    # SQLite admits a single writer; queueing threads here is far cheaper
+    # than letting them spin in the busy handler's sleep/back-off loop.
+    if connection.vendor == 'sqlite':
+        with _sqlite_writer:
+            yield
+    else:
+        yield
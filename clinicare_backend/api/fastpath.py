@@ -0,0 +1,255 @@
+"""
+Read-only serialization fast path for list endpoints.
+
+:func:`compile_serializer` turns a serializer's field set into a flat
+transform over ``values_list()`` rows: one column per field, an identity
+pass for values the database already returns in their JSON form (including
+string choice fields such as ``status``, ``role`` and ``gender``), lookup
+tables precomputed from the model's choices for other choice fields and
+``get_<field>_display`` sources, and the field's own ``to_representation``
+for everything else (dates, decimals). No model instances or serializer instances are created
+per row, and the output is identical to ``serializer.data``.
+
+Serializers with fields that need a model instance (nested serializers,
+method fields, to-many relations, properties without an annotation) do not
+compile, and :class:`FastListMixin` falls back to the regular path for them.
+
+:class:`FastJSONRenderer` encodes with ``orjson`` when it is installed and
+produces the same bytes as DRF's compact ``JSONRenderer``.
+"""
+import json
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .metrics import TimedJSONRenderer, serializing
+from .mixins import SERIALIZER_CACHE_SIZE, column_lookup
+from .pagination import KeysetPagination
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Serializer fields that represent database values of these types as the value itself.
+IDENTITY_FIELDS = {
+    serializers.BooleanField: (bool,),
+    serializers.CharField: (str,),
+    serializers.IntegerField: (int,),
+}
+ITERATOR_CHUNK_SIZE = 2000
+
+
+def _encode_default(value):
+    return JSONEncoder().default(value)
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def dumps(data):
+        """Compact JSON bytes, as DRF's ``JSONRenderer`` would write them."""
+        try:
+            content = orjson.dumps(data, default=_encode_default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits, non-string keys and the like.
+            return _dumps(data)
+        if b'\xe2\x80\xa8' in content or b'\xe2\x80\xa9' in content:
+            content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return content
+else:  # pragma: no cover - optional dependency
+    def dumps(data):
+        return _dumps(data)
+
+
+def _dumps(data):
+    content = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    return content.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
+
+
+class FastJSONRenderer(TimedJSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        plain = self.compact and self.strict and not self.ensure_ascii and self.encoder_class is JSONEncoder
+        if not plain or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        with serializing():
+            return dumps(data)
+
+
+def _model_field(model, lookup):
+    """The model field a ``column_lookup`` result ends on."""
+    field = None
+    for part in lookup.split('__'):
+        field = model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _converter(field, model_field):
+    """How to turn a column value into ``field.to_representation(value)``; ``None`` is identity."""
+    if model_field.is_relation:
+        model_field = model_field.target_field
+    python_type = _python_type(model_field)
+    if isinstance(field, serializers.ReadOnlyField):
+        return None
+    if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    if isinstance(field, serializers.ChoiceField):
+        table = dict(field.choice_strings_to_values)
+        if python_type is str and all(key == value for key, value in table.items()):
+            return None
+        return lambda value: table.get(str(value), value)
+    for field_class, types in IDENTITY_FIELDS.items():
+        if isinstance(field, field_class) and python_type in types:
+            return None
+    return field.to_representation
+
+
+def _python_type(model_field):
+    internal = model_field.get_internal_type()
+    if internal in ('CharField', 'TextField', 'EmailField', 'SlugField', 'URLField'):
+        return str
+    if internal == 'BooleanField':
+        return bool
+    if internal.endswith('IntegerField') or internal.endswith('AutoField'):
+        return int
+    return object
+
+
+def _display_lookup(model, source):
+    """``(column, {value: label})`` for a ``get_<field>_display`` source, else ``None``."""
+    if not (source.startswith('get_') and source.endswith('_display')):
+        return None
+    try:
+        model_field = model._meta.get_field(source[4:-8])
+    except FieldDoesNotExist:
+        return None
+    if not model_field.choices:
+        return None
+    return model_field.attname, {key: str(label) for key, label in model_field.flatchoices}
+
+
+def _nullable_relations(model, lookup):
+    """Prefixes of ``lookup`` that are nullable forward relations, e.g. ``doctor`` in ``doctor__email``."""
+    parts = lookup.split('__')
+    prefixes = []
+    for end, part in enumerate(parts[:-1], start=1):
+        field = model._meta.get_field(part)
+        if field.null:
+            prefixes.append('__'.join(parts[:end]))
+        model = field.related_model
+    return prefixes
+
+
+class CompiledSerializer:
+    def __init__(self, names, lookups, conversions, guards):
+        self.names = names
+        # One column per name, then the guard columns.
+        self.lookups = lookups
+        # (position, converter) for the columns that are not passed through.
+        self.conversions = conversions
+        # (name, guard position, omit): when the guard column is NULL the
+        # source cannot be reached, and DRF omits the field or renders None.
+        self.guards = guards
+
+    def to_representation(self, rows):
+        names, conversions, guards = self.names, self.conversions, self.guards
+        if not conversions and not guards:
+            return [dict(zip(names, row)) for row in rows]
+        data = []
+        for row in rows:
+            row = list(row)
+            for index, convert in conversions:
+                value = row[index]
+                if value is not None:
+                    row[index] = convert(value)
+            item = dict(zip(names, row))
+            for name, index, omit in guards:
+                if row[index] is None and name in item:
+                    if omit:
+                        del item[name]
+                    else:
+                        item[name] = None
+            data.append(item)
+        return data
+
+    def serialize(self, queryset):
+        rows = queryset.values_list(*self.lookups).iterator(chunk_size=ITERATOR_CHUNK_SIZE)
+        return self.to_representation(rows)
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def compile_serializer(serializer_class, annotated=()):
+    """
+    The :class:`CompiledSerializer` for ``serializer_class``, or ``None`` if
+    some field needs a model instance. Fields named in ``annotated`` read the
+    queryset annotation of that name.
+    """
+    model = serializer_class.Meta.model
+    names, lookups, conversions, guarded = [], [], [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField)) or field.source == '*':
+            return None
+        if isinstance(field, serializers.SerializerMethodField):
+            return None
+
+        display = _display_lookup(model, field.source)
+        if name in annotated:
+            lookup, convert = name, None if isinstance(field, serializers.BooleanField) else field.to_representation
+        elif display is not None:
+            lookup, labels = display
+            convert = lambda value, labels=labels: labels.get(value, value)
+        else:
+            lookup = column_lookup(model, field.source)
+            if lookup is None:
+                return None
+            convert = _converter(field, _model_field(model, lookup))
+            nullable = _nullable_relations(model, lookup)
+            if nullable:
+                if field.default is not serializers.empty or (field.required and not field.allow_null):
+                    return None
+                guarded += [(name, prefix, not field.allow_null) for prefix in nullable]
+
+        if convert is not None:
+            conversions.append((len(names), convert))
+        names.append(name)
+        lookups.append(lookup)
+
+    guards = []
+    for name, prefix, omit in guarded:
+        if prefix not in lookups:
+            lookups.append(prefix)
+        guards.append((name, lookups.index(prefix), omit))
+    return CompiledSerializer(tuple(names), tuple(lookups), tuple(conversions), tuple(guards))
+
+
+class FastListMixin:
+    """
+    Serve ``list`` from :func:`compile_serializer` when the view's serializer
+    compiles; otherwise the regular serializer runs. Annotations in the view's
+    ``export_annotations`` back property fields, as for exports.
+    """
+
+    def list(self, request, *args, **kwargs):
+        annotations = getattr(self, 'export_annotations', {})
+        compiled = compile_serializer(self.get_serializer_class(), tuple(annotations))
+        if compiled is None or not isinstance(self.paginator, (KeysetPagination, type(None))):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        rows = self.paginator.paginate_values(queryset, request, compiled.lookups, self) if self.paginator else None
+        with serializing():
+            if rows is None:
+                return Response(compiled.serialize(queryset))
+            data = compiled.to_representation(rows)
+        return self.get_paginated_response(data)
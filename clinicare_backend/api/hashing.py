@@ -0,0 +1,70 @@
+"""
+Password hashing across processes.
+
+PBKDF2 is deliberately slow and holds the GIL, so hashing a roster's
+passwords in threads runs them one after another. :func:`hash_passwords`
+spreads them over a process pool of one worker per core, started on first
+use and kept for the life of the process, so a web worker pays for spawning
+and ``django.setup()`` once rather than per request. Workers are spawned
+rather than forked: a fork would copy the parent's threads' locks and its
+open database connections. Kept free of model imports so a spawned worker can
+import it before Django is set up.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.contrib.auth.hashers import make_password
+
+# Below this many passwords, handing them to the workers costs more than it saves.
+POOL_MIN_PASSWORDS = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _setup_worker():
+    import django
+    django.setup()
+
+
+def _hash_chunk(passwords):
+    return [make_password(password) for password in passwords]
+
+
+def get_pool(workers=None):
+    """The shared pool, started with at least ``workers`` (default: one per core) processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max(workers or 1, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context('spawn'), initializer=_setup_worker,
+            )
+        return _pool
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    ``make_password`` of each of ``passwords`` (``None`` gives an unusable
+    password), in order, on at most ``workers`` processes of the pool.
+    """
+    global _pool
+    passwords = list(passwords)
+    workers = min(workers or os.cpu_count() or 1, len(passwords))
+    if workers <= 1 or len(passwords) < POOL_MIN_PASSWORDS:
+        return _hash_chunk(passwords)
+    # One task per worker, so a request never occupies more of the pool than that.
+    size = -(-len(passwords) // workers)
+    chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    pool = get_pool(workers)
+    try:
+        return [password for chunk in pool.map(_hash_chunk, chunks) for password in chunk]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool next time.
+        with _pool_lock:
+            if _pool is pool:
+                _pool = None
+        return _hash_chunk(passwords)
@@ -0,0 +1,181 @@
+import datetime
+import json
+import logging
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import User
+from api.reports import REPORTS
+from api.throttling import unthrottled
+from clinicare_backend.urls import router
+
+# Query strings for router actions that need one.
+ACTION_PARAMS = {
+    "search": {"q": "an"},
+    "export": {"output": "ndjson"},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every GET route of the API router (list, detail and actions), doctor availability "
+        "and the reports against the current database, and report latency percentiles, sequential "
+        "throughput, queries and response size per endpoint. Seed data first with seed_clinic. "
+        "Results can be saved as JSON and compared against a stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50, help="Timed requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint")
+        parser.add_argument("--only", default="", help="Only endpoints whose name contains this text")
+        parser.add_argument("--user", help="Email of the user to authenticate as (default: first admin)")
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument("--baseline", help="JSON results to compare against")
+        parser.add_argument(
+            "--save-baseline", action="store_true", help="Write the results to the --baseline file instead"
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Relative p50 slowdown reported as a regression (default 0.2 = 20%%)",
+        )
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **options):
+        if options["save_baseline"] and not options["baseline"]:
+            raise CommandError("--save-baseline needs --baseline")
+        users = User.objects.filter(is_active=True)
+        user = (
+            users.filter(email=options["user"]) if options["user"] else users.filter(role="admin").order_by("pk")
+        ).first()
+        if user is None:
+            raise CommandError("No user to authenticate as; run seed_clinic or pass --user")
+
+        self.client = Client(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}", HTTP_HOST=settings.ALLOWED_HOSTS[0]
+        )
+        self.serial = 0
+        results = {
+            "created": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "requests": options["requests"],
+            "endpoints": {},
+        }
+        # Large unpaginated lists would otherwise log every request as slow.
+        slow_log = logging.getLogger("api.slow_requests")
+        slow_log.disabled = True
+        try:
+            with unthrottled():
+                for name, path, params in self.endpoints():
+                    if options["only"] not in name:
+                        continue
+                    results["endpoints"][name] = self.measure(path, params, options)
+                    self.stdout.write(self.format_row(name, results["endpoints"][name]))
+        finally:
+            slow_log.disabled = False
+
+        if options["output"]:
+            self.save(options["output"], results)
+        if options["baseline"] and options["save_baseline"]:
+            self.save(options["baseline"], results)
+        elif options["baseline"]:
+            regressions = self.compare(json.loads(Path(options["baseline"]).read_text()), results, options)
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{len(regressions)} endpoint(s) regressed: {', '.join(regressions)}")
+
+    def endpoints(self):
+        for prefix, viewset, _ in router.registry:
+            model = viewset.queryset.model
+            yield f"{prefix} list", f"/api/{prefix}/", {}
+            pk = model._default_manager.order_by("pk").values_list("pk", flat=True).first()
+            if pk is not None:
+                yield f"{prefix} detail", f"/api/{prefix}/{pk}/", {}
+            for action in viewset.get_extra_actions():
+                if "get" in action.mapping and not action.detail:
+                    yield f"{prefix} {action.url_path}", f"/api/{prefix}/{action.url_path}/", ACTION_PARAMS.get(
+                        action.url_path, {}
+                    )
+
+        day = timezone.localdate() + datetime.timedelta(days=1)
+        while day.weekday() >= 5:
+            day += datetime.timedelta(days=1)
+        doctor = User.objects.filter(role="doctor", is_active=True).order_by("pk").values_list("pk", flat=True).first()
+        if doctor is not None:
+            yield "availability", f"/api/doctors/{doctor}/availability/", {"date": day.isoformat()}
+        yield "availability bulk", "/api/doctors/availability/", {
+            "from": day.isoformat(), "to": (day + datetime.timedelta(days=6)).isoformat(),
+        }
+        for name in REPORTS:
+            yield f"report {name}", f"/api/reports/{name}/", {}
+
+    def request(self, path, params):
+        # A unique parameter per request keeps the response cache out of the measurement.
+        self.serial += 1
+        started = time.perf_counter()
+        response = self.client.get(path, {**params, "_": self.serial})
+        size = len(b"".join(response.streaming_content) if response.streaming else response.content)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise CommandError(f"GET {path} answered {response.status_code}")
+        return elapsed, size
+
+    def measure(self, path, params, options):
+        for _ in range(options["warmup"]):
+            self.request(path, params)
+        latencies = sorted(self.request(path, params)[0] for _ in range(options["requests"]))
+        # Counted on a separate request, so query capture does not skew the timings.
+        with CaptureQueriesContext(connection) as queries:
+            _, size = self.request(path, params)
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000
+
+        return {
+            "path": path,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "throughput": len(latencies) / sum(latencies),
+            "queries": len(queries.captured_queries),
+            "bytes": size,
+        }
+
+    def format_row(self, name, result):
+        return (
+            f"{name:<28}p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+            f"p99 {result['p99_ms']:8.2f} ms  {result['throughput']:8.1f} req/s  "
+            f"{result['queries']:3} queries  {result['bytes']:>9} B"
+        )
+
+    def save(self, path, results):
+        Path(path).write_text(json.dumps(results, indent=2) + "\n")
+        self.stdout.write(f"Results written to {path}")
+
+    def compare(self, baseline, results, options):
+        self.stdout.write(f"\nCompared with the baseline from {baseline.get('created', '?')}:")
+        regressions = []
+        for name, current in results["endpoints"].items():
+            before = baseline.get("endpoints", {}).get(name)
+            if before is None:
+                self.stdout.write(f"{name:<28}new endpoint")
+                continue
+            change = current["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0
+            queries = current["queries"] - before["queries"]
+            regressed = change > options["threshold"] or queries > 0
+            if regressed:
+                regressions.append(name)
+            line = (
+                f"{name:<28}p50 {before['p50_ms']:8.2f} -> {current['p50_ms']:8.2f} ms ({change:+.0%})  "
+                f"queries {before['queries']} -> {current['queries']}"
+            )
+            self.stdout.write(self.style.ERROR(line) if regressed else line)
+        return regressions
@@ -0,0 +1,137 @@
+import asyncio
+import datetime
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import User, Patient, Appointment
+from api.throttling import unthrottled
+
+PREFIX = "asyncbench"
+MODES = (("sync", "/api/"), ("async", "/api/async/"))
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a mix of long list requests and short availability requests concurrently through "
+        "the ASGI application, once against the DRF views and once against their /api/async/ "
+        "variants, and report throughput and latency percentiles per request kind. "
+        "The generated rows are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--appointments", type=int, default=20_000, help="Rows behind the long request")
+        parser.add_argument("--long-clients", type=int, default=4)
+        parser.add_argument("--short-clients", type=int, default=32)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+        parser.add_argument(
+            "--client-delay", type=float, default=0.0,
+            help="Seconds each client waits before accepting the response body, to emulate slow readers",
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__startswith=f"{PREFIX}-").exists():
+            raise CommandError(f"Rows from a previous run are still present (users named '{PREFIX}-...')")
+
+        from clinicare_backend.asgi import application
+
+        user = User.objects.create(email=f"{PREFIX}-admin@clinicare.test", role="admin")
+        doctor = User.objects.create(email=f"{PREFIX}-doctor@clinicare.test", role="doctor")
+        patients = Patient.objects.bulk_create(Patient(name=f"{PREFIX} patient {i}") for i in range(100))
+        rng = random.Random(7)
+        first_day = datetime.date(2099, 1, 1)
+        Appointment.objects.bulk_create(
+            (
+                Appointment(
+                    patient=rng.choice(patients),
+                    doctor=doctor,
+                    date=first_day + datetime.timedelta(days=i // 16),
+                    time=datetime.time(9 + i % 16 // 2, 30 * (i % 2)),
+                )
+                for i in range(options["appointments"])
+            ),
+            batch_size=5000,
+        )
+        self.token = str(AccessToken.for_user(user))
+        self.counter = 0
+        try:
+            with unthrottled():
+                for mode, prefix in MODES:
+                    long_path = (f"{prefix}appointments/", f"doctor_id={doctor.pk}")
+                    short_path = (f"{prefix}doctors/{doctor.pk}/availability/", "date=2099-01-02")
+                    results = asyncio.run(self.run(application, long_path, short_path, options))
+                    self.report(mode, results, options["duration"])
+        finally:
+            Appointment.objects.filter(doctor=doctor).delete()
+            Patient.objects.filter(pk__in=[patient.pk for patient in patients]).delete()
+            User.objects.filter(pk__in=[user.pk, doctor.pk]).delete()
+
+    async def request(self, application, path, query, delay):
+        # A unique parameter per request keeps the response cache out of the measurement.
+        self.counter += 1
+        query = f"{query}&_={self.counter}"
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "client": ("127.0.0.1", 0), "server": ("localhost", 80),
+            "headers": [(b"host", b"localhost"), (b"authorization", f"Bearer {self.token}".encode())],
+        }
+        sent = False
+        status = None
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Future()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if delay:
+                    await asyncio.sleep(delay)
+
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        if status != 200:
+            raise CommandError(f"{path}?{query} answered {status}")
+        return time.perf_counter() - started
+
+    async def run(self, application, long_path, short_path, options):
+        deadline = time.perf_counter() + options["duration"]
+        latencies = {"long": [], "short": []}
+        self.peak_threads = 0
+
+        async def client(kind, path, query):
+            while time.perf_counter() < deadline:
+                latencies[kind].append(await self.request(application, path, query, options["client_delay"]))
+
+        async def sample_threads():
+            while time.perf_counter() < deadline:
+                self.peak_threads = max(self.peak_threads, threading.active_count())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(
+            sample_threads(),
+            *[client("long", *long_path) for _ in range(options["long_clients"])],
+            *[client("short", *short_path) for _ in range(options["short_clients"])],
+        )
+        return latencies
+
+    def report(self, mode, results, duration):
+        self.stdout.write(f"{mode}: peak threads {self.peak_threads}")
+        for kind, latencies in results.items():
+            latencies.sort()
+
+            def percentile(p):
+                return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0
+
+            self.stdout.write(
+                f"  {kind:<6} {len(latencies) / duration:8.1f} req/s   "
+                f"p50 {percentile(0.5):8.1f} ms   p95 {percentile(0.95):8.1f} ms   p99 {percentile(0.99):8.1f} ms"
+            )
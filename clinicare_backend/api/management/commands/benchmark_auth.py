@@ -0,0 +1,82 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import CachedJWTAuthentication, get_user_cache
+from api.models import User
+
+BACKENDS = (
+    ("JWTAuthentication", JWTAuthentication),
+    ("CachedJWTAuthentication", CachedJWTAuthentication),
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class WhoAmI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response({"id": request.user.id, "role": request.user.role})
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare authenticated GET throughput and identity queries per request between "
+        "simplejwt's JWTAuthentication and the cached backend. The benchmark user is "
+        "created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000, help="Timed requests per backend")
+        parser.add_argument("--users", type=int, default=50, help="Distinct users sending requests")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(email=f"bench-auth-{i}@clinicare.test", role="doctor") for i in range(options["users"])
+                )
+                headers = [f"Bearer {AccessToken.for_user(user)}" for user in users]
+                results = [self.measure(name, backend, headers, options["requests"]) for name, backend in BACKENDS]
+                self.report(results)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def measure(self, name, backend, headers, count):
+        get_user_cache().clear()
+        view = WhoAmI.as_view(authentication_classes=[backend])
+        factory = RequestFactory()
+        requests = [factory.get("/bench/", HTTP_AUTHORIZATION=headers[i % len(headers)]) for i in range(count)]
+        for request in requests[:len(headers)]:
+            view(request)
+
+        started = time.perf_counter()
+        for request in requests:
+            response = view(request)
+            assert response.status_code == 200, response.data
+        elapsed = time.perf_counter() - started
+
+        sample = requests[:100]
+        with CaptureQueriesContext(connection) as queries:
+            for request in sample:
+                view(request)
+        return name, count / elapsed, len(queries.captured_queries) / len(sample)
+
+    def report(self, results):
+        self.stdout.write(f"{'backend':<26}{'req/s':>12}{'queries/req':>14}")
+        for name, rate, queries in results:
+            self.stdout.write(f"{name:<26}{rate:>12.0f}{queries:>14.2f}")
+        (_, base, _), (_, cached, _) = results
+        self.stdout.write(f"speedup: {cached / base:.2f}x")
@@ -0,0 +1,153 @@
+import datetime
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+
+from api.models import User, Patient, Appointment, Inventory, Prescription
+
+INDEXED_MODELS = (Appointment, Prescription, Inventory)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large synthetic dataset inside a transaction, then print the query plan "
+        "and timing of the hot filter paths with and without the api indexes. "
+        "Everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Number of appointments to seed")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per query")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            missing = [
+                index.name
+                for model in INDEXED_MODELS
+                for index in model._meta.indexes
+                if index.name not in connection.introspection.get_constraints(cursor, model._meta.db_table)
+            ]
+        if missing:
+            raise CommandError(f"Indexes missing from the database, run migrate first: {', '.join(missing)}")
+
+        self.rng = random.Random(options["seed"])
+        self.repeat = options["repeat"]
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"])
+                with_indexes = self.measure("with indexes")
+                self.drop_indexes()
+                without_indexes = self.measure("without indexes")
+                self.report(with_indexes, without_indexes)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def bulk(self, model, count, build, batch=10_000):
+        created = []
+        for start in range(0, count, batch):
+            created += model.objects.bulk_create(build(i) for i in range(start, min(start + batch, count)))
+        return created
+
+    def seed(self, rows):
+        self.stdout.write(f"Seeding {rows} appointments...")
+        first_day = datetime.date.today() - datetime.timedelta(days=3 * 365)
+        slots = [datetime.time(9 + i // 2, 30 * (i % 2)) for i in range(16)]
+        statuses = ["scheduled", "completed", "cancelled"]
+
+        doctors = self.bulk(User, 50, lambda i: User(email=f"bench-doctor-{i}@clinicare.test", role="doctor"))
+        patients = self.bulk(Patient, max(rows // 10, 1), lambda i: Patient(name=f"Bench Patient {i}"))
+        self.bulk(Appointment, rows, lambda i: Appointment(
+            patient=self.rng.choice(patients),
+            doctor=self.rng.choice(doctors),
+            date=first_day + datetime.timedelta(days=self.rng.randrange(3 * 365)),
+            time=self.rng.choice(slots),
+            status=self.rng.choice(statuses),
+        ))
+        self.bulk(Prescription, rows // 2, lambda i: Prescription(
+            patient=self.rng.choice(patients),
+            doctor=self.rng.choice(doctors),
+            medication=f"Medication {self.rng.randrange(200)}",
+            dosage="10mg",
+            instructions="Once daily",
+            is_active=self.rng.random() < 0.2,
+        ))
+        self.bulk(Inventory, max(rows // 100, 1), lambda i: Inventory(
+            medicine_name=f"Medicine {i}",
+            quantity=self.rng.randrange(500),
+            threshold=self.rng.randrange(5, 30),
+            expiry_date=first_day + datetime.timedelta(days=self.rng.randrange(5 * 365)),
+        ))
+
+        self.doctor = doctors[0]
+        self.patient = patients[0]
+        self.day = Appointment.objects.values_list("date", flat=True).first()
+        if connection.vendor in ("sqlite", "postgresql"):
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+    def queries(self):
+        return {
+            "appointments by doctor and date": Appointment.objects.filter(
+                doctor_id=self.doctor.pk, date=self.day
+            ).values_list("time", flat=True),
+            "appointments by date": Appointment.objects.filter(date=self.day),
+            "appointments by patient": Appointment.objects.filter(patient_id=self.patient.pk),
+            "active prescriptions by patient": Prescription.objects.filter(
+                patient_id=self.patient.pk, is_active=True
+            ),
+            "active prescriptions by doctor": Prescription.objects.filter(
+                doctor_id=self.doctor.pk, is_active=True
+            ),
+            "inventory needing restock": Inventory.objects.filter(quantity__lte=F("threshold")),
+        }
+
+    def explain(self, queryset, tag):
+        # The tag keeps the SQL text unique per run; SQLite would otherwise
+        # hand back a cached EXPLAIN compiled against the old schema.
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} /* {tag} */ {sql}", params)
+            return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+
+    def measure(self, tag):
+        results = {}
+        for label, queryset in self.queries().items():
+            list(queryset.all())
+            timings = []
+            for _ in range(self.repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = (self.explain(queryset, tag), statistics.median(timings))
+        return results
+
+    def drop_indexes(self):
+        editor = connection.schema_editor(atomic=False)
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    cursor.execute(editor.sql_delete_index % {
+                        "table": quote(model._meta.db_table),
+                        "name": quote(index.name),
+                    })
+
+    def report(self, with_indexes, without_indexes):
+        for label in with_indexes:
+            plan_on, ms_on = with_indexes[label]
+            plan_off, ms_off = without_indexes[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for name, plan, ms in (("without indexes", plan_off, ms_off), ("with indexes", plan_on, ms_on)):
+                self.stdout.write(f"  {name}: {ms:.2f} ms (median of {self.repeat})")
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
@@ -0,0 +1,74 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.metrics import registry
+from api.models import User, Inventory
+from api.throttling import unthrottled
+
+MIDDLEWARE = "api.metrics.MetricsMiddleware"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cost of MetricsMiddleware: time the same authenticated list request with and "
+        "without it in alternating rounds, and report the bookkeeping time it records about itself. "
+        "The benchmark rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per mode and round")
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--rows", type=int, default=50, help="Inventory rows in the listed page")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = User.objects.create(email="bench-metrics@clinicare.test", role="admin")
+                Inventory.objects.bulk_create(
+                    Inventory(medicine_name=f"bench medicine {i}", quantity=i, expiry_date="2099-01-01")
+                    for i in range(options["rows"])
+                )
+                self.run(f"Bearer {AccessToken.for_user(user)}", options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, header, options):
+        without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+        modes = (("without", without), ("with", [MIDDLEWARE, *without]))
+        totals = {name: 0.0 for name, _ in modes}
+        registry.reset()
+        for _ in range(options["rounds"]):
+            for name, middleware in modes:
+                with override_settings(MIDDLEWARE=middleware), unthrottled():
+                    totals[name] += self.measure(header, options)
+
+        count = options["requests"] * options["rounds"]
+        self.stdout.write(f"{'middleware':<12}{'req/s':>10}{'ms/req':>10}")
+        for name, _ in modes:
+            self.stdout.write(f"{name:<12}{count / totals[name]:>10.0f}{totals[name] / count * 1000:>10.3f}")
+        added = (totals["with"] - totals["without"]) / count
+        recorded = sum(registry.overhead.values.values()) / count
+        self.stdout.write(
+            f"added per request: {added * 1e6:.0f} us ({added / (totals['without'] / count):.1%}); "
+            f"self-reported bookkeeping: {recorded * 1e6:.0f} us"
+        )
+
+    def measure(self, header, options):
+        client = Client(HTTP_AUTHORIZATION=header, HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        # A unique query string per request keeps the response cache out of the measurement.
+        client.get("/api/inventory/", {"_": "warmup"})
+        started = time.perf_counter()
+        for i in range(options["requests"]):
+            response = client.get("/api/inventory/", {"_": f"{time.monotonic_ns()}-{i}"})
+            assert response.status_code == 200, response.content
+        return time.perf_counter() - started
@@ -0,0 +1,99 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.fastpath import compile_serializer, dumps
+from api.mixins import eager_loading_paths
+from api.models import User, Patient, Appointment, Prescription
+from api.serializers import (
+    AppointmentListSerializer, AppointmentSerializer, PrescriptionListSerializer, PrescriptionSerializer,
+)
+
+SERIALIZERS = (AppointmentSerializer, AppointmentListSerializer, PrescriptionSerializer, PrescriptionListSerializer)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of the DRF serializers with their compiled fast path (api.fastpath), "
+        "from query to JSON bytes, and check that both produce identical output. "
+        "The benchmark rows are created inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000, help="Appointments and prescriptions to list")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per path; the best is kept")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["rows"])
+                self.stdout.write(f"{'serializer':<28}{'DRF rows/s':>12}{'fast rows/s':>13}{'speedup':>9}  identical")
+                for serializer_class in SERIALIZERS:
+                    self.measure(serializer_class, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows):
+        rng = random.Random(1)
+        doctors = User.objects.bulk_create(
+            User(email=f"bench-serializer-{i}@clinicare.test", role="doctor") for i in range(20)
+        )
+        patients = Patient.objects.bulk_create(Patient(name=f"Bench Patient {i}") for i in range(1000))
+        first_day = datetime.date(2090, 1, 1)
+        Appointment.objects.bulk_create(
+            (
+                Appointment(
+                    patient=rng.choice(patients), doctor=doctors[i % 20], notes="Follow-up",
+                    # 16 slots a day for each of the 20 doctors.
+                    date=first_day + datetime.timedelta(days=i // 320),
+                    time=datetime.time(9 + i // 20 % 16 // 2, 30 * (i // 20 % 2)),
+                )
+                for i in range(rows)
+            ),
+            batch_size=5000,
+        )
+        Prescription.objects.bulk_create(
+            (
+                Prescription(
+                    patient=rng.choice(patients), doctor=rng.choice(doctors), medication="Amoxicillin",
+                    dosage="500mg", instructions="Three times daily",
+                )
+                for _ in range(rows)
+            ),
+            batch_size=5000,
+        )
+        self.doctor_ids = [doctor.pk for doctor in doctors]
+
+    def queryset(self, serializer_class):
+        select, _ = eager_loading_paths(serializer_class)
+        return serializer_class.Meta.model.objects.filter(doctor__in=self.doctor_ids).select_related(*select)
+
+    def best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            content = run()
+            timings.append(time.perf_counter() - started)
+        return min(timings), content
+
+    def measure(self, serializer_class, options):
+        queryset = self.queryset(serializer_class)
+        compiled = compile_serializer(serializer_class)
+        rows = queryset.count()
+        drf_time, drf_content = self.best(
+            lambda: JSONRenderer().render(serializer_class(queryset.all(), many=True).data), options["repeat"]
+        )
+        fast_time, fast_content = self.best(lambda: dumps(compiled.serialize(queryset.all())), options["repeat"])
+        self.stdout.write(
+            f"{serializer_class.__name__:<28}{rows / drf_time:>12.0f}{rows / fast_time:>13.0f}"
+            f"{drf_time / fast_time:>8.1f}x  {drf_content == fast_content}"
+        )
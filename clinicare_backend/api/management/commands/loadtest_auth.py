@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import User
+
+PREFIX = "authload"
+PHASES = (
+    # name, login flood, auth throttling
+    ("baseline", False, False),
+    ("flood, unthrottled", True, False),
+    ("flood, throttled", True, True),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure clinical read latency while other clients flood the login endpoint with wrong passwords: "
+        "once without a flood, once with the flood and auth throttling off, and once with it on. Only the "
+        "auth budgets apply; the read and write budgets are switched off so they do not limit the "
+        "clinical clients. The generated users are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each phase")
+        parser.add_argument("--clinical-threads", type=int, default=4)
+        parser.add_argument("--flood-threads", type=int, default=8)
+        parser.add_argument("--addresses", type=int, default=4, help="Client addresses the flood rotates through")
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__startswith=f"{PREFIX}-").exists():
+            raise CommandError(f"Rows from a previous run are still present (users named '{PREFIX}-...')")
+        target = User.objects.create(
+            email=f"{PREFIX}-target@clinicare.test", role="doctor", password=make_password("correct horse")
+        )
+        clinicians = [
+            User.objects.create(email=f"{PREFIX}-nurse{i}@clinicare.test", role="nurse")
+            for i in range(options["clinical_threads"])
+        ]
+        # Every rejected login would otherwise be logged as a warning or a slow request.
+        quiet = [logging.getLogger(name) for name in ("django.request", "api.slow_requests")]
+        for logger in quiet:
+            logger.disabled = True
+        try:
+            self.stdout.write(
+                f"{'phase':<22}{'reads/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'logins':>8}{'401':>7}{'429':>7}"
+            )
+            for name, flood, throttled in PHASES:
+                config = {
+                    **settings.THROTTLE,
+                    "ENABLED": throttled,
+                    "RATES": {**settings.THROTTLE["RATES"], "read": None, "write": None},
+                }
+                with override_settings(THROTTLE=config):
+                    self.report(name, self.run(target, clinicians, flood, options), options["seconds"])
+        finally:
+            for logger in quiet:
+                logger.disabled = False
+            User.objects.filter(email__startswith=f"{PREFIX}-").delete()
+
+    def run(self, target, clinicians, flood, options):
+        deadline = time.perf_counter() + options["seconds"]
+        outcomes, latencies = Counter(), []
+        lock = threading.Lock()
+
+        def clinical(user, seed):
+            client = Client(
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}", HTTP_HOST=settings.ALLOWED_HOSTS[0]
+            )
+            local, serial = [], 0
+            while time.perf_counter() < deadline:
+                serial += 1
+                started = time.perf_counter()
+                # Unique query strings keep the response cache out of the way.
+                client.get("/api/inventory/", {"needs_restock": "true", "_": f"{seed}-{serial}"})
+                local.append(time.perf_counter() - started)
+            connection.close()
+            with lock:
+                latencies.extend(local)
+
+        def flooder(seed):
+            client = Client(
+                raise_request_exception=False, HTTP_HOST=settings.ALLOWED_HOSTS[0],
+                REMOTE_ADDR=f"10.0.0.{seed % options['addresses'] + 1}",
+            )
+            local = Counter()
+            while time.perf_counter() < deadline:
+                response = client.post(
+                    "/api/token/", {"email": target.email, "password": "wrong"}, content_type="application/json"
+                )
+                local["logins"] += 1
+                local[response.status_code] += 1
+            connection.close()
+            with lock:
+                outcomes.update(local)
+
+        threads = [
+            threading.Thread(target=clinical, args=(user, seed)) for seed, user in enumerate(clinicians)
+        ]
+        if flood:
+            threads += [threading.Thread(target=flooder, args=(seed,)) for seed in range(options["flood_threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes, sorted(latencies)
+
+    def report(self, name, results, seconds):
+        outcomes, latencies = results
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0
+
+        self.stdout.write(
+            f"{name:<22}{len(latencies) / seconds:>9.1f}{percentile(0.5):>9.1f}{percentile(0.99):>9.1f}"
+            f"{outcomes['logins']:>8}{outcomes[401]:>7}{outcomes[429]:>7}"
+        )
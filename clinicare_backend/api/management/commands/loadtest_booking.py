@@ -0,0 +1,125 @@
+import datetime
+import random
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Count
+
+from api.booking import SlotUnavailable, book_appointment
+from api.models import User, Patient, Appointment
+
+PREFIX = "loadtest"
+
+
+class Command(BaseCommand):
+    help = (
+        "Book appointments from many threads at once against the configured database, "
+        "report throughput and check that no slot or patient was duplicated. "
+        "The generated doctors, patients and appointments are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--bookings", type=int, default=50, help="Booking attempts per thread")
+        parser.add_argument("--doctors", type=int, default=4)
+        parser.add_argument("--days", type=int, default=2, help="Days of slots to contend for")
+        parser.add_argument("--patients", type=int, default=40, help="Distinct patient names to draw from")
+        parser.add_argument("--keep", action="store_true", help="Leave the generated rows in place")
+
+    def handle(self, *args, **options):
+        if Patient.objects.filter(name__startswith=f"{PREFIX} ").exists():
+            raise CommandError(f"Rows from a previous run are still present (patients named '{PREFIX} ...')")
+
+        doctors = [
+            User.objects.create(email=f"{PREFIX}-doctor-{i}@clinicare.test", role="doctor")
+            for i in range(options["doctors"])
+        ]
+        first_day = datetime.date(2099, 1, 1)
+        slots = [
+            (doctor.pk, first_day + datetime.timedelta(days=day), datetime.time(9 + i // 2, 30 * (i % 2)))
+            for doctor in doctors
+            for day in range(options["days"])
+            for i in range(16)
+        ]
+        names = [f"{PREFIX} patient {i}" for i in range(options["patients"])]
+        outcomes = Counter()
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local, local_latencies = Counter(), []
+            try:
+                for _ in range(options["bookings"]):
+                    doctor_id, date, slot = rng.choice(slots)
+                    started = time.perf_counter()
+                    try:
+                        book_appointment(date, slot, rng.choice(names), doctor_id=doctor_id)
+                        local["booked"] += 1
+                    except SlotUnavailable:
+                        local["conflict"] += 1
+                    except OperationalError:
+                        local["error"] += 1
+                    local_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                outcomes.update(local)
+                latencies.extend(local_latencies)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            self.report(outcomes, latencies, elapsed)
+            self.check_invariants(doctors, names)
+        finally:
+            if not options["keep"]:
+                Appointment.objects.filter(doctor__in=doctors).delete()
+                Patient.objects.filter(name__in=names).delete()
+                User.objects.filter(pk__in=[doctor.pk for doctor in doctors]).delete()
+
+    def report(self, outcomes, latencies, elapsed):
+        attempts = sum(outcomes.values())
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0
+
+        self.stdout.write(f"backend:     {connection.vendor}")
+        self.stdout.write(f"attempts:    {attempts} in {elapsed:.2f}s ({attempts / elapsed:.1f}/s)")
+        self.stdout.write(
+            f"booked:      {outcomes['booked']}  conflicts: {outcomes['conflict']}  errors: {outcomes['error']}"
+        )
+        self.stdout.write(f"latency:     p50 {percentile(0.5):.1f} ms  p99 {percentile(0.99):.1f} ms")
+
+    def check_invariants(self, doctors, names):
+        double_booked = (
+            Appointment.objects.filter(doctor__in=doctors)
+            .exclude(status="cancelled")
+            .values("doctor", "date", "time")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .count()
+        )
+        duplicate_patients = (
+            Patient.objects.filter(name__in=names)
+            .values("name")
+            .annotate(count=Count("id"))
+            .filter(count__gt=1)
+            .count()
+        )
+        if double_booked or duplicate_patients:
+            raise CommandError(
+                f"Consistency violated: {double_booked} double-booked slots, "
+                f"{duplicate_patients} duplicated patients"
+            )
+        self.stdout.write(self.style.SUCCESS("No double bookings or duplicate patients"))
@@ -0,0 +1,147 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import User, Inventory
+
+PREFIX = "dbload"
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the same mixed read/write HTTP workload under each database profile "
+        "(settings.DATABASE_PROFILES) and report throughput, latency and errors. "
+        "SQLite profiles run against a fresh scratch database; server profiles use the "
+        "configured database and delete their rows afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profiles", default="sqlite-default,sqlite-tuned",
+            help="Comma-separated profile names from settings.DATABASE_PROFILES",
+        )
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10.0)
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument("--worker", action="store_true", help="Internal: run one profile in this process")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            self.stdout.write(json.dumps(self.work(options)))
+            return
+
+        profiles = [name.strip() for name in options["profiles"].split(",") if name.strip()]
+        unknown = [name for name in profiles if name not in settings.DATABASE_PROFILES]
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(unknown)}")
+
+        results = []
+        for profile in profiles:
+            self.stdout.write(f"Running {profile}...")
+            with tempfile.TemporaryDirectory() as scratch:
+                results.append((profile, self.run_profile(profile, Path(scratch) / "load.sqlite3", options)))
+        self.report(results)
+
+    def run_profile(self, profile, scratch_db, options):
+        # The workload measures the database, not the request budgets.
+        env = dict(os.environ, CLINICARE_DB_PROFILE=profile, CLINICARE_THROTTLE="0")
+        if settings.DATABASE_PROFILES[profile]["ENGINE"].endswith("sqlite3"):
+            env["CLINICARE_DB_NAME"] = str(scratch_db)
+        manage = [sys.executable, sys.argv[0]]
+        subprocess.run([*manage, "migrate", "-v", "0"], env=env, check=True)
+        worker = subprocess.run(
+            [
+                *manage, "loadtest_db", "--worker",
+                "--threads", str(options["threads"]),
+                "--seconds", str(options["seconds"]),
+                "--write-ratio", str(options["write_ratio"]),
+            ],
+            env=env, check=True, capture_output=True, text=True,
+        )
+        return json.loads(worker.stdout.strip().splitlines()[-1])
+
+    def work(self, options):
+        user = User.objects.create(email=f"{PREFIX}-admin@clinicare.test", role="admin")
+        items = Inventory.objects.bulk_create(
+            Inventory(medicine_name=f"{PREFIX} medicine {i}", quantity=100, expiry_date="2099-01-01")
+            for i in range(50)
+        )
+        header = f"Bearer {AccessToken.for_user(user)}"
+        deadline = time.perf_counter() + options["seconds"]
+        outcomes, latencies = Counter(), []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            client = Client(
+                raise_request_exception=False, HTTP_AUTHORIZATION=header, HTTP_HOST=settings.ALLOWED_HOSTS[0]
+            )
+            local, local_latencies = Counter(), []
+            serial = 0
+            while time.perf_counter() < deadline:
+                serial += 1
+                started = time.perf_counter()
+                if rng.random() < options["write_ratio"]:
+                    kind = "write"
+                    response = client.post(
+                        "/api/stock-movements/",
+                        {"item": rng.choice(items).pk, "kind": rng.choice(("receipt", "dispense")), "quantity": 1},
+                        content_type="application/json",
+                    )
+                else:
+                    kind = "read"
+                    # Unique query strings keep the response cache out of the way.
+                    response = client.get("/api/inventory/", {"needs_restock": "true", "_": f"{seed}-{serial}"})
+                local_latencies.append(time.perf_counter() - started)
+                local[kind if response.status_code < 400 else "error"] += 1
+            connection.close()
+            with lock:
+                outcomes.update(local)
+                latencies.extend(local_latencies)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options["threads"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        Inventory.objects.filter(pk__in=[item.pk for item in items]).delete()
+        user.delete()
+
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0
+
+        return {
+            "requests": sum(outcomes.values()),
+            "throughput": sum(outcomes.values()) / options["seconds"],
+            "reads": outcomes["read"],
+            "writes": outcomes["write"],
+            "errors": outcomes["error"],
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'profile':<18}{'req/s':>10}{'reads':>9}{'writes':>9}{'errors':>9}{'p50 ms':>10}{'p99 ms':>10}"
+        )
+        for profile, result in results:
+            self.stdout.write(
+                f"{profile:<18}{result['throughput']:>10.1f}{result['reads']:>9}{result['writes']:>9}"
+                f"{result['errors']:>9}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            )
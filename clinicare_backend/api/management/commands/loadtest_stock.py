@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+
+from api.models import Inventory, StockMovement
+from api.stock import InsufficientStock, move, record_opening
+
+PREFIX = "stockload"
+
+
+class Command(BaseCommand):
+    help = (
+        "Dispense (and occasionally receive) stock from many threads at once against the configured "
+        "database, report throughput and check that no update was lost: every item's quantity must equal "
+        "its ledger total and the units the threads saw succeed. The generated items are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--movements", type=int, default=100, help="Movements attempted per thread")
+        parser.add_argument("--items", type=int, default=3, help="Items to contend for")
+        parser.add_argument("--stock", type=int, default=500, help="Opening quantity per item")
+        parser.add_argument("--receipt-ratio", type=float, default=0.1)
+        parser.add_argument("--keep", action="store_true", help="Leave the generated rows in place")
+
+    def handle(self, *args, **options):
+        if Inventory.objects.filter(medicine_name__startswith=f"{PREFIX} ").exists():
+            raise CommandError(f"Rows from a previous run are still present (items named '{PREFIX} ...')")
+
+        items = [
+            Inventory.objects.create(
+                medicine_name=f"{PREFIX} item {i}", quantity=options["stock"], expiry_date="2099-01-01"
+            )
+            for i in range(options["items"])
+        ]
+        record_opening(items)
+        outcomes = Counter()
+        net = Counter()
+        latencies = []
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local, local_net, local_latencies = Counter(), Counter(), []
+            try:
+                for _ in range(options["movements"]):
+                    item = rng.choice(items)
+                    kind = "receipt" if rng.random() < options["receipt_ratio"] else "dispense"
+                    quantity = rng.randrange(1, 6)
+                    started = time.perf_counter()
+                    try:
+                        movement = move(item.pk, kind, quantity, note=PREFIX)
+                        local[kind] += 1
+                        local_net[item.pk] += movement.change
+                    except InsufficientStock:
+                        local["short"] += 1
+                    except OperationalError:
+                        local["error"] += 1
+                    local_latencies.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+            with lock:
+                outcomes.update(local)
+                net.update(local_net)
+                latencies.extend(local_latencies)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options["threads"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        try:
+            self.report(outcomes, latencies, elapsed)
+            self.check_invariants(items, net, options["stock"])
+        finally:
+            if not options["keep"]:
+                Inventory.objects.filter(pk__in=[item.pk for item in items]).delete()
+
+    def report(self, outcomes, latencies, elapsed):
+        attempts = sum(outcomes.values())
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)] * 1000 if latencies else 0
+
+        self.stdout.write(f"backend:     {connection.vendor}")
+        self.stdout.write(f"attempts:    {attempts} in {elapsed:.2f}s ({attempts / elapsed:.1f}/s)")
+        self.stdout.write(
+            f"dispensed:   {outcomes['dispense']}  received: {outcomes['receipt']}  "
+            f"out of stock: {outcomes['short']}  errors: {outcomes['error']}"
+        )
+        self.stdout.write(f"latency:     p50 {percentile(0.5):.1f} ms  p99 {percentile(0.99):.1f} ms")
+
+    def check_invariants(self, items, net, stock):
+        ledger = dict(
+            StockMovement.objects.filter(item__in=items).order_by().values("item").annotate(total=Sum("change"))
+            .values_list("item", "total")
+        )
+        problems = []
+        for item in Inventory.objects.filter(pk__in=[item.pk for item in items]):
+            expected = stock + net[item.pk]
+            if item.quantity != ledger.get(item.pk, 0) or item.quantity != expected:
+                problems.append(
+                    f"{item.medicine_name}: quantity {item.quantity}, ledger {ledger.get(item.pk, 0)}, "
+                    f"expected {expected}"
+                )
+            latest = StockMovement.objects.filter(item=item).order_by("-created_at", "-id").first()
+            if latest is not None and latest.balance != item.quantity:
+                problems.append(f"{item.medicine_name}: last balance {latest.balance}, quantity {item.quantity}")
+        if problems:
+            raise CommandError("Consistency violated:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS("No lost updates: quantities match the ledger and every movement"))
@@ -0,0 +1,47 @@
+import os
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import APIException, ValidationError
+
+from api import provisioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV (with an email,role,first_name,last_name,password header) or JSON roster. "
+        "Passwords are hashed in parallel across the cores; valid rows are created and invalid ones listed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("roster", help="Path of the roster file")
+        parser.add_argument("--format", choices=provisioning.FORMATS, help="Default: from the file extension")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Hashing processes")
+
+    def handle(self, *args, **options):
+        path = Path(options["roster"])
+        if not path.is_file():
+            raise CommandError(f"No such file: {path}")
+        format = options["format"] or ("json" if path.suffix.lower() == ".json" else "csv")
+        started = time.perf_counter()
+        try:
+            users, failures = provisioning.provision(
+                provisioning.read_roster(path.read_bytes(), format), options["workers"]
+            )
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+        except APIException as exc:
+            raise CommandError(str(exc.detail))
+        elapsed = time.perf_counter() - started
+
+        for failure in failures:
+            errors = "; ".join(
+                f"{field}: {' '.join(str(message) for message in messages)}"
+                for field, messages in failure["errors"].items()
+            )
+            self.stderr.write(f"row {failure['row']}: {errors}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(users)} users in {elapsed:.1f}s with {options['workers']} workers; "
+            f"{len(failures)} rows failed"
+        ))
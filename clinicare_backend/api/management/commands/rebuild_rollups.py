@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api import cache, rollups
+from api.models import User, Appointment, Prescription
+
+
+class Command(BaseCommand):
+    help = "Recompute the report rollup tables from the users, appointments and prescriptions tables."
+
+    def handle(self, *args, **options):
+        rollups.rebuild()
+        cache.invalidate(User, Appointment, Prescription)
+        self.stdout.write(self.style.SUCCESS("Report rollups rebuilt"))
@@ -0,0 +1,261 @@
+import datetime
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api import alerts, cache, rollups
+from api.availability import WorkingHours
+from api.models import User, Patient, Appointment, Inventory, Prescription, StockMovement
+
+# Seeded rows are recognisable by these markers, so --clear never touches real data.
+EMAIL_DOMAIN = "seed.clinicare.test"
+MARKER = "SEED-"
+
+SCALES = {
+    "small": {
+        "admins": 2, "doctors": 10, "nurses": 10, "staff": 5, "patients": 1_000,
+        "years": 1, "daily_appointments": 6, "prescriptions": 2, "inventory": 200,
+    },
+    "medium": {
+        "admins": 5, "doctors": 50, "nurses": 40, "staff": 20, "patients": 20_000,
+        "years": 3, "daily_appointments": 10, "prescriptions": 3, "inventory": 1_000,
+    },
+    "large": {
+        "admins": 10, "doctors": 200, "nurses": 150, "staff": 80, "patients": 200_000,
+        "years": 5, "daily_appointments": 12, "prescriptions": 4, "inventory": 5_000,
+    },
+}
+STAFF_ROLES = {"admins": "admin", "doctors": "doctor", "nurses": "nurse", "staff": "staff"}
+
+FIRST_NAMES = (
+    "Amina", "Ben", "Carla", "Dmitri", "Elena", "Farid", "Grace", "Hiro", "Ines", "Jonas", "Kofi", "Lena",
+    "Mateo", "Nadia", "Omar", "Priya", "Quinn", "Rosa", "Samuel", "Tara", "Umar", "Vera", "Wei", "Yara",
+)
+LAST_NAMES = (
+    "Adeyemi", "Brown", "Castillo", "Dubois", "Eriksen", "Fischer", "Garcia", "Haddad", "Ivanova", "Jensen",
+    "Kim", "Lopez", "Mensah", "Nakamura", "Okafor", "Patel", "Rossi", "Schmidt", "Tanaka", "Walsh",
+)
+CONDITIONS = ("", "", "", "Hypertension", "Type 2 diabetes", "Asthma", "Hypothyroidism", "Migraine")
+ALLERGIES = ("", "", "", "Penicillin", "Peanuts", "Latex", "Sulfa drugs")
+INSURERS = ("", "Acme Health", "CarePlus", "Mutual Medical", "NorthStar")
+BLOOD_TYPES = ("A+", "A-", "B+", "B-", "AB+", "AB-", "O+", "O-")
+MEDICATIONS = (
+    ("Amoxicillin", "500mg", "Three times daily for 7 days"),
+    ("Atorvastatin", "20mg", "Once daily at night"),
+    ("Ibuprofen", "400mg", "Every 8 hours with food as needed"),
+    ("Levothyroxine", "50mcg", "Once daily before breakfast"),
+    ("Lisinopril", "10mg", "Once daily"),
+    ("Metformin", "850mg", "Twice daily with meals"),
+    ("Omeprazole", "20mg", "Once daily before breakfast"),
+    ("Paracetamol", "500mg", "Up to four times daily as needed"),
+    ("Salbutamol", "100mcg", "Two puffs as needed"),
+    ("Sertraline", "50mg", "Once daily"),
+)
+NOTES = ("", "", "Follow-up", "Annual check-up", "Blood test results", "Vaccination", "Referral review")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic clinic data: staff users by role, patients (some with patient accounts), "
+        "years of appointments on the clinic's working-hour slots, prescriptions, and inventory with "
+        "90 days of stock movements. Seeded users log in with --password. Use --clear to remove "
+        "previously seeded rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="small")
+        for name in (*STAFF_ROLES, "patients", "inventory"):
+            parser.add_argument(f"--{name}", type=int, help=f"Override the scale's number of {name}")
+        parser.add_argument("--years", type=int, help="Years of appointment history")
+        parser.add_argument("--daily-appointments", type=int, help="Appointments per doctor per working day")
+        parser.add_argument("--prescriptions", type=int, help="Average prescriptions per patient")
+        parser.add_argument("--password", default="clinicare")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--clear", action="store_true", help="Delete seeded rows first")
+
+    def handle(self, *args, **options):
+        config = {
+            name: options[name] if options[name] is not None else value
+            for name, value in SCALES[options["scale"]].items()
+        }
+        if config["daily_appointments"] > len(WorkingHours.from_settings().labels()):
+            raise CommandError("--daily-appointments exceeds the number of slots in a working day")
+
+        self.rng = random.Random(options["seed"])
+        with transaction.atomic():
+            if options["clear"]:
+                self.clear()
+            elif User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").exists():
+                raise CommandError("Seeded data is already present; pass --clear to replace it")
+            self.today = timezone.localdate()
+            password = make_password(options["password"])
+            staff = self.seed_staff(config, password)
+            patients = self.seed_patients(config["patients"], password)
+            appointments = self.seed_appointments(staff["doctors"], patients, config)
+            prescriptions = self.seed_prescriptions(staff["doctors"], patients, config)
+            inventory = self.seed_inventory(config["inventory"])
+            # Bulk inserts send no signals: recompute the rollups and alerts and drop cached responses.
+            rollups.rebuild()
+            alerts.advance(full=True)
+            cache.invalidate(User, Patient, Appointment, Inventory, Prescription, StockMovement)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {sum(len(users) for users in staff.values())} staff users, {len(patients)} patients, "
+            f"{appointments} appointments, {prescriptions} prescriptions and {inventory} inventory items"
+        ))
+
+    def clear(self):
+        # Patients cascade to their appointments and prescriptions.
+        Patient.objects.filter(insurance_id__startswith=MARKER).delete()
+        User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+        Inventory.objects.filter(medicine_name__contains=f"lot {MARKER}").delete()
+
+    def bulk(self, model, rows, batch=5_000):
+        created = []
+        batch_rows = []
+        for row in rows:
+            batch_rows.append(row)
+            if len(batch_rows) == batch:
+                created += model.objects.bulk_create(batch_rows)
+                batch_rows = []
+        if batch_rows:
+            created += model.objects.bulk_create(batch_rows)
+        return created
+
+    def name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def joined(self, years):
+        days = self.rng.randrange(max(years, 1) * 365)
+        return timezone.now() - datetime.timedelta(days=days, minutes=self.rng.randrange(24 * 60))
+
+    def seed_staff(self, config, password):
+        staff = {}
+        for plural, role in STAFF_ROLES.items():
+            users = []
+            for i in range(config[plural]):
+                first, last = self.name()
+                users.append(User(
+                    email=f"{role}{i}@{EMAIL_DOMAIN}", role=role, password=password,
+                    first_name=first, last_name=last, is_staff=role == "admin",
+                    date_joined=self.joined(config["years"]),
+                ))
+            staff[plural] = self.bulk(User, users)
+        return staff
+
+    def seed_patients(self, count, password):
+        patients = []
+        for i in range(count):
+            first, last = self.name()
+            patients.append(Patient(
+                name=f"{first} {last}",
+                age=self.rng.randrange(0, 95),
+                gender=self.rng.choice(("Male", "Female")),
+                contact=f"+1555{self.rng.randrange(10 ** 7):07d}",
+                blood_type=self.rng.choice(BLOOD_TYPES),
+                allergies=self.rng.choice(ALLERGIES),
+                chronic_conditions=self.rng.choice(CONDITIONS),
+                medical_history=self.rng.choice(CONDITIONS),
+                last_physical=self.today - datetime.timedelta(days=self.rng.randrange(3 * 365)),
+                insurance_provider=self.rng.choice(INSURERS),
+                insurance_id=f"{MARKER}{i:07d}",
+            ))
+        # One patient in ten has a portal account.
+        accounts = {i: User(
+            email=f"patient{i}@{EMAIL_DOMAIN}", role="patient", password=password,
+            first_name=patient.name.split()[0], last_name=patient.name.split()[1],
+            date_joined=self.joined(3),
+        ) for i, patient in enumerate(patients) if i % 10 == 0}
+        self.bulk(User, accounts.values())
+        for i, user in accounts.items():
+            patients[i].user = user
+        return self.bulk(Patient, patients)
+
+    def seed_appointments(self, doctors, patients, config):
+        if not doctors or not patients:
+            return 0
+        slots = [datetime.time(*map(int, label.split(":"))) for label in WorkingHours.from_settings().labels()]
+        first_day = self.today - datetime.timedelta(days=config["years"] * 365)
+        last_day = self.today + datetime.timedelta(days=30)
+
+        def rows():
+            day = first_day
+            while day <= last_day:
+                if day.weekday() < 5:
+                    past = day < self.today
+                    for doctor in doctors:
+                        for time in self.rng.sample(slots, config["daily_appointments"]):
+                            if past:
+                                status = "cancelled" if self.rng.random() < 0.1 else "completed"
+                            else:
+                                status = "cancelled" if self.rng.random() < 0.05 else "scheduled"
+                            yield Appointment(
+                                patient=self.rng.choice(patients), doctor=doctor, date=day, time=time,
+                                status=status, notes=self.rng.choice(NOTES),
+                            )
+                day += datetime.timedelta(days=1)
+
+        return len(self.bulk(Appointment, rows()))
+
+    def seed_prescriptions(self, doctors, patients, config):
+        if not doctors or not patients:
+            return 0
+        total = len(patients) * config["prescriptions"]
+        created = self.bulk(Prescription, (
+            Prescription(
+                patient=self.rng.choice(patients), doctor=self.rng.choice(doctors),
+                medication=medication, dosage=dosage, instructions=instructions,
+                is_active=self.rng.random() < 0.3,
+            )
+            for medication, dosage, instructions in (self.rng.choice(MEDICATIONS) for _ in range(total))
+        ))
+        # date_prescribed is auto_now_add, so bulk_create stamps "now"; spread it over the history.
+        history = config["years"] * 365 * 24 * 60
+        for prescription in created:
+            prescription.date_prescribed = timezone.now() - datetime.timedelta(minutes=self.rng.randrange(history))
+        Prescription.objects.bulk_update(created, ["date_prescribed"], batch_size=2_000)
+        return len(created)
+
+    def seed_inventory(self, count):
+        def rows():
+            for i in range(count):
+                medication, dosage, _ = MEDICATIONS[i % len(MEDICATIONS)]
+                threshold = self.rng.choice((10, 20, 50))
+                yield Inventory(
+                    medicine_name=f"{medication} {dosage} lot {MARKER}{i:05d}",
+                    quantity=self.rng.randrange(0, threshold * 10),
+                    threshold=threshold,
+                    expiry_date=self.today + datetime.timedelta(days=self.rng.randrange(-60, 3 * 365)),
+                )
+
+        items = self.bulk(Inventory, rows())
+        self.seed_movements(items)
+        return len(items)
+
+    def seed_movements(self, items):
+        """An opening receipt 90 days ago and the dispenses since, ending at each item's quantity."""
+        movements, stamps = [], []
+        now = timezone.now()
+        for item in items:
+            dispenses = sorted(
+                (self.rng.randrange(90 * 24 * 60), self.rng.randrange(1, max(item.threshold // 5, 2)))
+                for _ in range(self.rng.randrange(0, 30))
+            )
+            balance = item.quantity + sum(units for _, units in dispenses)
+            if balance:
+                movements.append(StockMovement(
+                    item=item, kind="receipt", change=balance, balance=balance, note="Opening stock"
+                ))
+                stamps.append(now - datetime.timedelta(days=90))
+            for minutes, units in dispenses:
+                balance -= units
+                movements.append(StockMovement(item=item, kind="dispense", change=-units, balance=balance))
+                stamps.append(now - datetime.timedelta(days=90) + datetime.timedelta(minutes=minutes))
+        created = self.bulk(StockMovement, movements)
+        # created_at is auto_now_add, so bulk_create stamps "now"; spread it over the history.
+        for movement, stamp in zip(created, stamps):
+            movement.created_at = stamp
+        StockMovement.objects.bulk_update(created, ["created_at"], batch_size=2_000)
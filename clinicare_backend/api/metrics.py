@@ -0,0 +1,285 @@
+"""
+Request instrumentation.
+
+``MetricsMiddleware`` times every request and, per resolved view and method,
+feeds histograms of wall time, database queries and query time, serialization
+time (serializer ``.data`` plus JSON rendering) and response size.
+``/api/metrics/`` exposes them in the Prometheus text format. Requests slower
+than ``SLOW_REQUEST_SECONDS`` are logged to ``api.slow_requests`` together
+with the SQL they ran.
+
+Queries are counted by an execute wrapper installed on every connection,
+reporting to the current request through a context variable, so queries run
+from ``sync_to_async`` threads are attributed correctly. Metrics live in
+process memory; with several workers, scrape each one. The time spent in this
+module's own bookkeeping is exported as ``clinicare_metrics_overhead_seconds_total``.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework import renderers, serializers
+
+logger = logging.getLogger('api.slow_requests')
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+MAX_LOGGED_QUERIES = 50
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    return '{%s}' % ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.values = {}
+
+    def inc(self, labels=(), amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in sorted(self.values.items()):
+            yield f'{self.name}{_labels(self.labelnames, labels)} {value}'
+
+
+class Histogram:
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, labels, value):
+        series = self.values.get(labels)
+        if series is None:
+            # One slot per bucket plus +Inf, then the sum.
+            series = self.values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series):
+                cumulative += count
+                names, values = (*self.labelnames, 'le'), (*labels, bound)
+                yield f'{self.name}_bucket{_labels(names, values)} {cumulative}'
+            yield f'{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}'
+            yield f'{self.name}_count{_labels(self.labelnames, labels)} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        route = ('view', 'method')
+        self.requests = Counter(
+            'clinicare_http_requests_total', 'Requests by view, method and status.', (*route, 'status'))
+        self.duration = Histogram(
+            'clinicare_http_request_duration_seconds', 'Wall time per request.', TIME_BUCKETS, route)
+        self.queries = Histogram(
+            'clinicare_http_db_queries', 'Database queries per request.', QUERY_BUCKETS, route)
+        self.db_time = Histogram(
+            'clinicare_http_db_duration_seconds', 'Database time per request.', TIME_BUCKETS, route)
+        self.serialize_time = Histogram(
+            'clinicare_http_serialize_duration_seconds', 'Serializer and renderer time per request.',
+            TIME_BUCKETS, route)
+        self.size = Histogram(
+            'clinicare_http_response_bytes', 'Response body size.', SIZE_BUCKETS, route)
+        self.slow = Counter(
+            'clinicare_http_slow_requests_total', 'Requests over SLOW_REQUEST_SECONDS.', route)
+        self.overhead = Counter(
+            'clinicare_metrics_overhead_seconds_total', 'Time spent recording these metrics.')
+
+    @property
+    def metrics(self):
+        return (self.requests, self.duration, self.queries, self.db_time, self.serialize_time,
+                self.size, self.slow, self.overhead)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f'# HELP {metric.name} {metric.help}')
+                lines.append(f'# TYPE {metric.name} {metric.kind}')
+                lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics:
+                metric.values.clear()
+
+
+registry = Registry()
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time', 'serialize_time', 'sql')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.sql = []
+
+
+_current = ContextVar('request_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats.queries += 1
+        stats.db_time += elapsed
+        if len(stats.sql) < MAX_LOGGED_QUERIES:
+            stats.sql.append((elapsed, sql))
+
+
+@receiver(connection_created)
+def _install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializing():
+    """Count the enclosed work as serialization time of the current request."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialize_time += time.perf_counter() - started
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    @property
+    def data(self):
+        with serializing():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """Times ``.data`` of top-level serializers; nested fields are covered by their parent."""
+
+    @property
+    def data(self):
+        with serializing():
+            return super().data
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = getattr(cls, 'Meta', None)
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = TimedListSerializer
+
+
+class TimedJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializing():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started, stats, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, started, stats)
+        return response
+
+    async def __acall__(self, request):
+        started, stats, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, started, stats)
+        return response
+
+    def start(self):
+        stats = RequestStats()
+        return time.perf_counter(), stats, _current.set(stats)
+
+    def finish(self, request, response, started, stats):
+        wall = time.perf_counter() - started
+        match = request.resolver_match
+        route = (match.view_name if match else '<unmatched>', request.method)
+        with registry.lock:
+            registry.requests.inc((*route, str(response.status_code)))
+            registry.duration.observe(route, wall)
+            registry.queries.observe(route, stats.queries)
+            registry.db_time.observe(route, stats.db_time)
+            registry.serialize_time.observe(route, stats.serialize_time)
+            if not response.streaming:
+                registry.size.observe(route, len(response.content))
+            if wall >= getattr(settings, 'SLOW_REQUEST_SECONDS', 0.5):
+                registry.slow.inc(route)
+            registry.overhead.inc(amount=time.perf_counter() - started - wall)
+
+        if wall >= getattr(settings, 'SLOW_REQUEST_SECONDS', 0.5):
+            self.log_slow(request, response, wall, stats)
+
+    def log_slow(self, request, response, wall, stats):
+        statements = '\n'.join(
+            f'  {elapsed * 1000:8.1f} ms  {sql}' for elapsed, sql in sorted(stats.sql, reverse=True)
+        )
+        logger.warning(
+            'Slow request: %s %s -> %s in %.0f ms (%d queries, %.0f ms db, %.0f ms serializing)\n%s',
+            request.method, request.get_full_path(), response.status_code, wall * 1000,
+            stats.queries, stats.db_time * 1000, stats.serialize_time * 1000, statements,
+        )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs ``METRICS_TOKEN`` as a bearer token, or a loopback client if unset."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        allowed = request.META.get('HTTP_AUTHORIZATION', '') == f'Bearer {token}'
+    else:
+        allowed = request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
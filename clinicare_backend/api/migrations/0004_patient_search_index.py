@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from api import search
+    search.install(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    from api import search
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
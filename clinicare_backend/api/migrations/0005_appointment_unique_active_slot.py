@@ -0,0 +1,52 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:26
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_double_bookings(apps, schema_editor):
+    """
+    Stop before adding the constraint if a slot is already doubly booked.
+
+    Which of the bookings stands is for the clinic to decide, so the clashes
+    are listed for an operator to cancel or move before migrating again.
+    """
+    Appointment = apps.get_model('api', 'Appointment')
+    active = Appointment.objects.exclude(status='cancelled').exclude(doctor=None).exclude(time=None)
+    clashes = (
+        active.values('doctor', 'date', 'time')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .order_by('doctor', 'date', 'time')
+    )
+    lines = []
+    for clash in clashes:
+        ids = active.filter(doctor=clash['doctor'], date=clash['date'], time=clash['time']).order_by('id')
+        lines.append(
+            f"  doctor {clash['doctor']} on {clash['date']} at {clash['time']}: "
+            f"appointments {', '.join(str(pk) for pk in ids.values_list('id', flat=True))}"
+        )
+    if lines:
+        raise RuntimeError(
+            'Cannot add appointment_unique_active_slot: these slots are booked more than once. '
+            'Cancel or move all but one appointment of each, then migrate again.\n' + '\n'.join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_patient_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_double_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('status', 'cancelled'), _negated=True),
+                fields=('doctor', 'date', 'time'),
+                name='appointment_unique_active_slot',
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:33
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    from api import rollups
+    rollups.rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_appointment_unique_active_slot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MedicationRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('medication', models.CharField(max_length=255, unique=True)),
+                ('count', models.IntegerField(default=0)),
+                ('active', models.IntegerField(default=0)),
+                ('patients', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MedicationPatientRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('medication', models.CharField(max_length=255)),
+                ('patient_id', models.BigIntegerField()),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('medication', 'patient_id'), name='medication_patient_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyAppointmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'status'), name='appointment_rollup_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyUserRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('role', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('month', 'role'), name='user_rollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
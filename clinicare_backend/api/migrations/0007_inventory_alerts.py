@@ -0,0 +1,50 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    from api import alerts
+    alerts.rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_report_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryAlertRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checked_on', models.DateField()),
+                ('expiring_days', models.PositiveIntegerField()),
+                ('examined', models.IntegerField(default=0)),
+                ('raised', models.IntegerField(default=0)),
+                ('resolved', models.IntegerField(default=0)),
+                ('finished_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-checked_on', '-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('low_stock', 'Low stock'), ('expiring', 'Expiring soon'), ('expired', 'Expired')], max_length=20)),
+                ('raised_at', models.DateTimeField()),
+                ('resolved_at', models.DateTimeField(blank=True, null=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alerts', to='api.inventory')),
+            ],
+            options={
+                'ordering': ['-raised_at'],
+                'indexes': [models.Index(fields=['raised_at'], name='inventory_alert_raised_idx'), models.Index(fields=['resolved_at'], name='inventory_alert_resolved_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('resolved_at__isnull', True)), fields=('item', 'kind'), name='inventory_alert_open')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
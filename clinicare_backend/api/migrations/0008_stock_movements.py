@@ -0,0 +1,47 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def opening_balances(apps, schema_editor):
+    """Record each item's current quantity as its first movement, so quantities equal their ledger totals."""
+    Inventory = apps.get_model('api', 'Inventory')
+    StockMovement = apps.get_model('api', 'StockMovement')
+    StockMovement.objects.bulk_create(
+        (
+            StockMovement(item_id=pk, kind='adjustment', change=quantity, balance=quantity, note='Opening balance')
+            for pk, quantity in Inventory.objects.filter(quantity__gt=0).values_list('pk', 'quantity').iterator()
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_inventory_alerts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Receipt'), ('dispense', 'Dispense'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('change', models.IntegerField(help_text='Units added (positive) or removed (negative)')),
+                ('balance', models.PositiveIntegerField(help_text='Quantity on hand after this movement')),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='api.inventory')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['item', 'kind', 'created_at'], name='stock_item_kind_created_idx'), models.Index(fields=['item', 'created_at'], name='stock_item_created_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('change__gt', 0), ('kind', 'receipt')), models.Q(('change__lt', 0), ('kind', 'dispense')), models.Q(('kind', 'adjustment'), models.Q(('change', 0), _negated=True)), _connector='OR'), name='stock_movement_signed_change')],
+            },
+        ),
+        migrations.RunPython(opening_balances, migrations.RunPython.noop),
+    ]
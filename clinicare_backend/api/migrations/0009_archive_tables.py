@@ -0,0 +1,50 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_stock_movements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('time', models.TimeField(blank=True, null=True)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('archived_at', models.DateTimeField()),
+                ('doctor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_doctor_appointments', to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_appointments', to='api.patient')),
+            ],
+            options={
+                'ordering': ['-date', 'time'],
+                'indexes': [models.Index(fields=['patient', 'date'], name='archived_appt_patient_idx'), models.Index(fields=['doctor', 'date'], name='archived_appt_doctor_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedPrescription',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('medication', models.CharField(max_length=255)),
+                ('dosage', models.CharField(max_length=100)),
+                ('instructions', models.TextField()),
+                ('date_prescribed', models.DateTimeField()),
+                ('is_active', models.BooleanField(default=False)),
+                ('archived_at', models.DateTimeField()),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_prescriptions', to=settings.AUTH_USER_MODEL)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_prescriptions', to='api.patient')),
+            ],
+            options={
+                'ordering': ['-date_prescribed'],
+                'indexes': [models.Index(fields=['patient', 'date_prescribed'], name='archived_rx_patient_idx'), models.Index(fields=['doctor', 'date_prescribed'], name='archived_rx_doctor_idx')],
+            },
+        ),
+    ]
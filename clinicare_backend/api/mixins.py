@@ -0,0 +1,214 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+# Bound on every per-serializer-class cache here and in fastpath: each distinct
+# ?fields= selection is its own class, so an unbounded cache grows with them.
+SERIALIZER_CACHE_SIZE = 256
+
+
+def column_lookup(model, source):
+    """Translate a dotted serializer ``source`` into a ``values()`` lookup, or ``None``."""
+    parts = source.split('.')
+    for index, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many or not field.concrete:
+            return None
+        if field.is_relation and index < len(parts) - 1:
+            model = field.related_model
+            continue
+        if index < len(parts) - 1:
+            return None
+    return '__'.join(parts)
+
+
+def _walk_relations(model, parts):
+    """Follow ``parts`` through model relations, stopping at the first plain field."""
+    path, many = [], False
+    for part in parts:
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            break
+        if not field.is_relation or field.related_model is None:
+            break
+        path.append(part)
+        many = many or field.one_to_many or field.many_to_many
+        model = field.related_model
+    return path, many, model
+
+
+def _collect(serializer, model, prefix, prefix_many, select, prefetch):
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        nested = None
+        if isinstance(field, serializers.ListSerializer):
+            nested = field.child
+        elif isinstance(field, serializers.BaseSerializer):
+            nested = field
+
+        if field.source == '*':
+            if nested is not None:
+                _collect(nested, model, prefix, prefix_many, select, prefetch)
+            continue
+
+        parts = field.source.split('.')
+        if nested is None and not isinstance(field, serializers.ManyRelatedField):
+            parts = parts[:-1]
+        if not parts:
+            continue
+
+        path, many, related_model = _walk_relations(model, parts)
+        if not path:
+            continue
+        full_path = prefix + path
+        many = prefix_many or many
+        (prefetch if many else select).add('__'.join(full_path))
+
+        if nested is not None and len(path) == len(parts):
+            _collect(nested, related_model, full_path, many, select, prefetch)
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def eager_loading_paths(serializer_class):
+    """
+    Return the ``(select_related, prefetch_related)`` lookups a serializer needs.
+
+    Derived from dotted ``source`` attributes (``patient.name``), nested
+    serializers (including those generated by ``Meta.depth``) and many-related
+    fields, so a list of N rows serializes in a constant number of queries.
+    """
+    select, prefetch = set(), set()
+    model = serializer_class.Meta.model
+    _collect(serializer_class(), model, [], False, select, prefetch)
+    # Drop paths already implied by a longer select_related lookup.
+    select = {path for path in select if not any(other.startswith(path + '__') for other in select)}
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+class EagerLoadingMixin:
+    """Apply the serializer's eager-loading lookups to the view's queryset."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        select, prefetch = eager_loading_paths(self.get_serializer_class())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+def _field_list(params, name):
+    value = params.get(name, '')
+    return tuple(dict.fromkeys(part.strip() for part in value.split(',') if part.strip()))
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def readable_fields(serializer_class):
+    return tuple(name for name, field in serializer_class().fields.items() if not field.write_only)
+
+
+def selected_fields(serializer_class, fields=(), exclude=()):
+    """
+    The names ``serializer_class`` renders for ``fields`` (default all) minus
+    ``exclude``, in declaration order, so every spelling of one selection
+    maps to the same :func:`sparse_serializer`.
+    """
+    available = readable_fields(serializer_class)
+    unknown = [name for name in (*fields, *exclude) if name not in available]
+    if unknown:
+        raise ValidationError({'fields': [f'Unknown field(s): {", ".join(unknown)}.']})
+    names = tuple(name for name in available if (not fields or name in fields) and name not in exclude)
+    if not names:
+        raise ValidationError({'fields': ['No fields left to render.']})
+    return names
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def sparse_serializer(serializer_class, names):
+    """A subclass of ``serializer_class`` rendering only ``names``, as :func:`selected_fields` returns them."""
+    meta = type('Meta', (serializer_class.Meta,), {'fields': list(names), 'exclude': None})
+    return type(serializer_class.__name__, (serializer_class,), {'Meta': meta})
+
+
+def requested_serializer(serializer_class, params, compact_class=None):
+    """
+    The serializer for a read, honouring ``?fields=`` and ``?exclude=``.
+
+    ``compact_class`` is used when no ``fields`` are requested; an explicit
+    ``fields`` list may name anything ``serializer_class`` renders.
+    """
+    fields, exclude = _field_list(params, 'fields'), _field_list(params, 'exclude')
+    if compact_class is not None and not fields:
+        serializer_class = compact_class
+    if fields or exclude:
+        names = selected_fields(serializer_class, fields, exclude)
+        if names != readable_fields(serializer_class):
+            serializer_class = sparse_serializer(serializer_class, names)
+    return serializer_class
+
+
+@lru_cache(maxsize=SERIALIZER_CACHE_SIZE)
+def loaded_columns(serializer_class):
+    """
+    ``only()`` lookups covering what a serializer reads, or ``None`` when a
+    field (a model property, ``source='*'``, a to-many relation) may need the
+    whole row. The primary key and the ordering columns used by pagination
+    cursors are always loaded.
+    """
+    model = serializer_class.Meta.model
+    columns = {model._meta.pk.name, *(name.lstrip('-') for name in model._meta.ordering)}
+    fields = serializer_class().fields
+    for name in readable_fields(serializer_class):
+        field = fields[name]
+        lookup = column_lookup(model, field.source) if field.source != '*' else None
+        if lookup is None:
+            return None
+        parts = lookup.split('__')
+        # A select_related relation must itself be loaded.
+        columns.update('__'.join(parts[:end]) for end in range(1, len(parts) + 1))
+    return tuple(sorted(columns))
+
+
+def load_only(queryset, serializer_class):
+    columns = loaded_columns(serializer_class)
+    return queryset.only(*columns) if columns else queryset
+
+
+class SparseFieldsMixin:
+    """
+    ``?fields=a,b`` / ``?exclude=c`` on reads: the serializer renders only
+    those fields and the query loads only the columns they need. Actions in
+    ``compact_actions`` default to ``compact_serializer_class``, a lighter
+    serializer for lists; detail routes keep ``serializer_class``.
+
+    Goes before :class:`EagerLoadingMixin`, which then joins only the
+    relations the pruned serializer still reads.
+    """
+    compact_serializer_class = None
+    compact_actions = ('list',)
+
+    def is_read(self):
+        return self.request is not None and self.request.method in SAFE_METHODS
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if not self.is_read():
+            return serializer_class
+        compact_class = self.compact_serializer_class if self.action in self.compact_actions else None
+        return requested_serializer(serializer_class, self.request.query_params, compact_class)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_read():
+            queryset = load_only(queryset, self.get_serializer_class())
+        return queryset
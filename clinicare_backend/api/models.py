@@ -7,6 +7,13 @@ def default_time():
     return "12:00:00"
 
 
+APPOINTMENT_STATUS_CHOICES = [
+    ('scheduled', 'Scheduled'),
+    ('completed', 'Completed'),
+    ('cancelled', 'Cancelled')
+]
+
+
 class CustomUserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -95,11 +102,7 @@ class Appointment(models.Model):
         limit_choices_to={'role': 'doctor'}, related_name="doctor_appointments"
     )
     notes = models.TextField(blank=True, null=True)
-    status = models.CharField(max_length=20, default='scheduled', choices=[
-        ('scheduled', 'Scheduled'),
-        ('completed', 'Completed'),
-        ('cancelled', 'Cancelled')
-    ])
+    status = models.CharField(max_length=20, default='scheduled', choices=APPOINTMENT_STATUS_CHOICES)
 
     def __str__(self):
         doctor_name = self.doctor.email if self.doctor else "Unassigned"
@@ -109,6 +112,18 @@ class Appointment(models.Model):
         verbose_name = "Appointment"
         verbose_name_plural = "Appointments"
         ordering = ["-date", "time"]
+        indexes = [
+            models.Index(fields=["doctor", "date", "time"], name="appointment_doctor_slot_idx"),
+            models.Index(fields=["patient", "date"], name="appointment_patient_date_idx"),
+            models.Index(fields=["-date", "time"], name="appointment_date_time_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["doctor", "date", "time"],
+                condition=~models.Q(status="cancelled"),
+                name="appointment_unique_active_slot",
+            ),
+        ]
 
 
 class Prescription(models.Model):
@@ -125,6 +140,58 @@ class Prescription(models.Model):
 
     class Meta:
         ordering = ['-date_prescribed']
+        indexes = [
+            models.Index(fields=['patient', 'is_active'], name='prescription_patient_idx'),
+            models.Index(fields=['doctor', 'is_active'], name='prescription_doctor_idx'),
+            models.Index(fields=['-date_prescribed'], name='prescription_date_idx'),
+        ]
+
+
+class ArchivedAppointment(models.Model):
+    """A finished :class:`Appointment` moved out of the hot table by ``manage.py archive_history``; same id."""
+    id = models.BigIntegerField(primary_key=True)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name="archived_appointments")
+    date = models.DateField()
+    time = models.TimeField(null=True, blank=True)
+    doctor = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="archived_doctor_appointments"
+    )
+    notes = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=APPOINTMENT_STATUS_CHOICES)
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived appointment {self.pk}: {self.patient_id} on {self.date}"
+
+    class Meta:
+        ordering = ["-date", "time"]
+        indexes = [
+            models.Index(fields=["patient", "date"], name="archived_appt_patient_idx"),
+            models.Index(fields=["doctor", "date"], name="archived_appt_doctor_idx"),
+        ]
+
+
+class ArchivedPrescription(models.Model):
+    """An inactive :class:`Prescription` moved out of the hot table by ``manage.py archive_history``; same id."""
+    id = models.BigIntegerField(primary_key=True)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='archived_prescriptions')
+    doctor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_prescriptions')
+    medication = models.CharField(max_length=255)
+    dosage = models.CharField(max_length=100)
+    instructions = models.TextField()
+    date_prescribed = models.DateTimeField()
+    is_active = models.BooleanField(default=False)
+    archived_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Archived {self.medication} for {self.patient_id}"
+
+    class Meta:
+        ordering = ['-date_prescribed']
+        indexes = [
+            models.Index(fields=['patient', 'date_prescribed'], name='archived_rx_patient_idx'),
+            models.Index(fields=['doctor', 'date_prescribed'], name='archived_rx_doctor_idx'),
+        ]
 
 
 class Inventory(models.Model):
@@ -143,4 +210,134 @@ class Inventory(models.Model):
     class Meta:
         verbose_name = "Inventory Item"
         verbose_name_plural = "Inventory"
-        ordering = ["expiry_date"]
\ No newline at end of file
+        ordering = ["expiry_date"]
+        indexes = [
+            models.Index(fields=["expiry_date"], name="inventory_expiry_idx"),
+            models.Index(
+                fields=["expiry_date"],
+                condition=models.Q(quantity__lte=models.F("threshold")),
+                name="inventory_restock_idx",
+            ),
+        ]
+
+
+class StockMovement(models.Model):
+    """One change to an item's stock; ``Inventory.quantity`` is the running total of ``change``."""
+    KIND_CHOICES = [
+        ("receipt", "Receipt"),
+        ("dispense", "Dispense"),
+        ("adjustment", "Adjustment"),
+    ]
+
+    item = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name="movements")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    change = models.IntegerField(help_text="Units added (positive) or removed (negative)")
+    balance = models.PositiveIntegerField(help_text="Quantity on hand after this movement")
+    note = models.CharField(max_length=255, blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="stock_movements")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.change:+d}: {self.item_id}"
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(kind="receipt", change__gt=0)
+                    | models.Q(kind="dispense", change__lt=0)
+                    | (models.Q(kind="adjustment") & ~models.Q(change=0))
+                ),
+                name="stock_movement_signed_change",
+            ),
+        ]
+        indexes = [
+            # Per-item history and the dispense window behind consumption rates.
+            models.Index(fields=["item", "kind", "created_at"], name="stock_item_kind_created_idx"),
+            models.Index(fields=["item", "created_at"], name="stock_item_created_idx"),
+        ]
+
+
+class InventoryAlert(models.Model):
+    KIND_CHOICES = [
+        ("low_stock", "Low stock"),
+        ("expiring", "Expiring soon"),
+        ("expired", "Expired"),
+    ]
+
+    item = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name="alerts")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    raised_at = models.DateTimeField()
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.item_id}"
+
+    class Meta:
+        ordering = ["-raised_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["item", "kind"],
+                condition=models.Q(resolved_at__isnull=True),
+                name="inventory_alert_open",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["raised_at"], name="inventory_alert_raised_idx"),
+            models.Index(fields=["resolved_at"], name="inventory_alert_resolved_idx"),
+        ]
+
+
+class InventoryAlertRun(models.Model):
+    """One run of ``manage.py inventory_alerts``; the latest row is where the next run starts."""
+    checked_on = models.DateField()
+    expiring_days = models.PositiveIntegerField()
+    examined = models.IntegerField(default=0)
+    raised = models.IntegerField(default=0)
+    resolved = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-checked_on", "-id"]
+
+
+class MonthlyUserRollup(models.Model):
+    month = models.DateField()
+    role = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["month", "role"], name="user_rollup_bucket"),
+        ]
+
+
+class MonthlyAppointmentRollup(models.Model):
+    month = models.DateField()
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["month", "status"], name="appointment_rollup_bucket"),
+        ]
+
+
+class MedicationRollup(models.Model):
+    medication = models.CharField(max_length=255, unique=True)
+    count = models.IntegerField(default=0)
+    active = models.IntegerField(default=0)
+    patients = models.IntegerField(default=0)
+
+
+class MedicationPatientRollup(models.Model):
+    """Prescriptions per (medication, patient); lets ``MedicationRollup.patients`` stay a distinct count."""
+    medication = models.CharField(max_length=255)
+    patient_id = models.BigIntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["medication", "patient_id"], name="medication_patient_bucket"),
+        ]
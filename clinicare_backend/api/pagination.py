@@ -0,0 +1,222 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opt-in keyset (cursor) pagination.
+
+    Lists are only paginated when the client sends ``cursor`` or ``page_size``,
+    so existing callers keep receiving plain lists. Rows are ordered by the
+    view's ``ordering`` (falling back to the model's ``Meta.ordering``) with the
+    primary key appended as a tie-breaker, and each page is fetched with a
+    ``WHERE (a, b, id) > (...)`` style filter instead of an OFFSET, so deep
+    pages cost the same as the first one.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 500
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, fetching the page with the async ORM."""
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page([row async for row in queryset])
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """The query for one page plus a look-ahead row, or ``None`` when not paginating."""
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset, view)
+
+        queryset = queryset.order_by(*self.get_order_by(queryset.model))
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.get_cursor_filter(queryset.model, self.decode_cursor(cursor)))
+        return queryset[:self.page_size + 1]
+
+    def paginate_values(self, queryset, request, lookups, view=None):
+        """
+        ``paginate_queryset`` over ``values_list(*lookups)`` tuples, or ``None``
+        when not paginating. The cursor columns are fetched alongside and
+        stripped from the returned rows.
+        """
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        self.cursor_offset = len(lookups)
+        cursor_columns = [field.attname for field, _ in self.ordering]
+        page = self.set_page(list(queryset.values_list(*lookups, *cursor_columns)))
+        return [row[:self.cursor_offset] for row in page]
+
+    def paginate_union_values(self, querysets, request, lookups, view=None):
+        """
+        :meth:`paginate_values` over the ``UNION ALL`` of ``querysets``, whose
+        models share the ordering columns of the first. The cursor filter is
+        applied to each side, so every table is still read by range.
+        """
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        first = querysets[0]
+        self.ordering = self.get_ordering(first, view)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            condition = self.get_cursor_filter(first.model, self.decode_cursor(cursor))
+            querysets = [queryset.filter(condition) for queryset in querysets]
+        self.cursor_offset = len(lookups)
+        cursor_columns = [field.attname for field, _ in self.ordering]
+        parts = [queryset.order_by().values_list(*lookups, *cursor_columns) for queryset in querysets]
+        union = parts[0].union(*parts[1:], all=True).order_by(*self.get_order_by(first.model))
+        page = self.set_page(list(union[:self.page_size + 1]))
+        return [row[:self.cursor_offset] for row in page]
+
+    def set_page(self, rows):
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset, view):
+        ordering = getattr(view, 'ordering', None) or queryset.model._meta.ordering or []
+        if isinstance(ordering, str):
+            ordering = [ordering]
+
+        opts = queryset.model._meta
+        fields = []
+        for item in ordering:
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            if name == 'pk':
+                name = opts.pk.name
+            try:
+                field = opts.get_field(name)
+            except Exception:
+                raise ImproperlyConfigured(
+                    f"Keyset ordering on '{item}' is not a field of {opts.label}"
+                )
+            if not field.concrete or field.many_to_many or field.one_to_many:
+                raise ImproperlyConfigured(
+                    f"Keyset ordering on '{item}' must be a concrete field of {opts.label}"
+                )
+            fields.append((field, descending))
+
+        if not any(field.primary_key for field, _ in fields):
+            fields.append((opts.pk, False))
+        return fields
+
+    def get_order_by(self, model):
+        # NULL placement differs between backends, so pin it: NULLs sort as
+        # the smallest value in both directions.
+        order_by = []
+        for field, descending in self.ordering:
+            expression = F(field.attname)
+            if descending:
+                order_by.append(expression.desc(nulls_last=True))
+            else:
+                order_by.append(expression.asc(nulls_first=True))
+        return order_by
+
+    def get_cursor_filter(self, model, values):
+        """Build the lexicographic "row comes after the cursor" predicate."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            name = field.attname
+            if value is None:
+                after = Q(pk__in=[]) if descending else Q(**{f'{name}__isnull': False})
+                same = Q(**{f'{name}__isnull': True})
+            elif descending:
+                after = Q(**{f'{name}__lt': value})
+                if field.null:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            else:
+                after = Q(**{f'{name}__gt': value})
+                same = Q(**{name: value})
+            condition |= equal & after
+            equal &= same
+        return condition
+
+    def encode_cursor(self, instance):
+        if isinstance(instance, tuple):
+            columns = instance[self.cursor_offset:]
+        else:
+            columns = [getattr(instance, field.attname) for field, _ in self.ordering]
+        values = []
+        for value in columns:
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
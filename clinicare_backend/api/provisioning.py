@@ -0,0 +1,95 @@
+"""
+Bulk user provisioning.
+
+A staff roster, CSV with a header line or a JSON list of objects, becomes
+users in one pass: rows are validated together (one query for the emails
+already taken), their passwords hashed in parallel by
+:func:`~api.hashing.hash_passwords` and the valid rows inserted with
+``bulk_create``. Invalid rows are reported by position and do not hold back
+the others. Rows without a password get an unusable one.
+"""
+import csv
+import io
+import json
+
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import rollups
+from .bulk import BulkConflict
+from .cache import invalidate
+from .hashing import hash_passwords
+from .models import User
+from .serializers import RosterUserSerializer
+
+FORMATS = ('csv', 'json')
+BATCH_SIZE = 500
+# Per API request; the provision_users command takes rosters of any size.
+MAX_ROWS = 1000
+# Hashing processes one API request may occupy, leaving the rest of the pool
+# for concurrent requests; the command uses every core.
+API_WORKERS = 2
+
+
+def read_roster(content, format='csv'):
+    """The rows of a roster given as text or bytes."""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValidationError({'roster': ['Expected UTF-8 text.']})
+    if format == 'json':
+        try:
+            rows = json.loads(content)
+        except ValueError:
+            raise ValidationError({'roster': ['Expected a JSON list of users.']})
+    else:
+        rows = list(csv.DictReader(io.StringIO(content)))
+    return check_roster(rows)
+
+
+def check_roster(rows):
+    if not isinstance(rows, list):
+        raise ValidationError({'roster': ['Expected a list of users.']})
+    if not rows:
+        raise ValidationError({'roster': ['The roster is empty.']})
+    return rows
+
+
+def _email(row):
+    email = row.get('email') if isinstance(row, dict) else None
+    return User.objects.normalize_email(email) if isinstance(email, str) else None
+
+
+def provision(rows, workers=None):
+    """
+    Create users from roster ``rows``; returns ``(users, failures)``, where
+    each failure is ``{"row": <1-based position>, "errors": {...}}``.
+    """
+    taken = set(
+        User.objects.filter(email__in=[email for email in map(_email, rows) if email])
+        .values_list('email', flat=True)
+    )
+    valid, failures = [], []
+    for position, row in enumerate(rows, start=1):
+        serializer = RosterUserSerializer(data=row)
+        if not serializer.is_valid():
+            failures.append({'row': position, 'errors': serializer.errors})
+            continue
+        item = dict(serializer.validated_data, email=_email(serializer.validated_data))
+        if item['email'] in taken:
+            failures.append({'row': position, 'errors': {'email': ['A user with this email already exists.']}})
+            continue
+        taken.add(item['email'])
+        valid.append(item)
+
+    passwords = hash_passwords([item.pop('password', '') or None for item in valid], workers)
+    users = [User(**item, password=password) for item, password in zip(valid, passwords)]
+    try:
+        with transaction.atomic():
+            users = User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+            rollups.record_created(User, users)
+    except IntegrityError:
+        raise BulkConflict('An email in the roster was registered while it was processed; submit it again.')
+    invalidate(User)
+    return users, failures
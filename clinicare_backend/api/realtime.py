@@ -0,0 +1,336 @@
+"""
+Realtime updates over WebSockets.
+
+``/ws/updates/`` is a plain ASGI WebSocket endpoint mounted next to Django in
+``clinicare_backend/asgi.py``. A client authenticates with its access token
+(``?token=`` or a ``token`` key in the ``subscribe`` message) and subscribes
+to event types:
+
+    {"type": "subscribe", "events": ["appointment", "inventory.updated"]}
+
+A bare model name covers all of its ``created``/``updated``/``deleted``
+events and ``"*"`` covers everything the user's role may see. Saves and
+deletes of the models in :data:`DELTA_FIELDS` are published once their
+transaction commits as small deltas such as
+
+    {"type": "appointment.updated", "id": 7, "data": {"status": "completed", ...}}
+
+The hub encodes each message once and hands it to every matching socket of
+this process. Publishing goes through a backend: :class:`LocalBackend`
+delivers in-process only, which is enough for a single ASGI worker.
+:class:`RedisBackend` relays through Redis pub/sub so every worker sees every
+change; each worker subscribes when its first socket attaches and
+resubscribes after a dropped connection. Writes that bypass signals
+(``bulk_create``, ``bulk_update``) must call :func:`publish_changes`
+themselves. A socket that falls too far behind has its backlog replaced by
+one ``{"type": "resync"}`` message, telling the client to refetch instead of
+replaying.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Patient, Appointment, Inventory, InventoryAlert, Prescription
+
+logger = logging.getLogger('api.realtime')
+
+UPDATES_PATH = '/ws/updates/'
+QUEUE_SIZE = 256
+RECONNECT_SECONDS = (1, 2, 5, 10, 30)
+ACTIONS = ('created', 'updated', 'deleted')
+
+DELTA_FIELDS = {
+    Patient: ('name', 'age', 'gender', 'contact'),
+    Appointment: ('patient', 'doctor', 'date', 'time', 'status'),
+    Inventory: ('medicine_name', 'quantity', 'threshold', 'expiry_date'),
+    Prescription: ('patient', 'doctor', 'medication', 'dosage', 'is_active'),
+    InventoryAlert: ('item', 'kind', 'raised_at', 'resolved_at'),
+}
+
+ROLE_EVENTS = {
+    'admin': {'patient', 'appointment', 'inventory', 'inventoryalert', 'prescription'},
+    'doctor': {'patient', 'appointment', 'inventory', 'inventoryalert', 'prescription'},
+    'nurse': {'patient', 'appointment', 'inventory', 'inventoryalert', 'prescription'},
+    'staff': {'patient', 'appointment', 'inventory', 'inventoryalert'},
+}
+
+
+def event_name(model):
+    return model._meta.model_name
+
+
+EVENT_MODELS = {event_name(model) for model in DELTA_FIELDS}
+
+
+def known_event(event):
+    if event == '*':
+        return True
+    model, _, action = event.partition('.')
+    return model in EVENT_MODELS and (not action or action in ACTIONS)
+
+
+def delta(instance, action):
+    model = type(instance)
+    message = {'type': f'{event_name(model)}.{action}', 'id': instance.pk}
+    if action != 'deleted':
+        opts = instance._meta
+        message['data'] = {
+            name: getattr(instance, opts.get_field(name).attname) for name in DELTA_FIELDS[model]
+        }
+    return message
+
+
+class LocalBackend:
+    """In-process stand-in: messages reach only the sockets of this process."""
+
+    def __init__(self, deliver, **options):
+        self.deliver = deliver
+
+    def listen(self):
+        pass
+
+    def publish(self, message):
+        self.deliver(message)
+
+
+class RedisBackend:
+    """Relay through Redis pub/sub so sockets on every worker receive every change."""
+
+    def __init__(self, deliver, url='redis://127.0.0.1:6379/0', channel='clinicare:updates', **options):
+        import redis
+
+        self.deliver = deliver
+        self.channel = channel
+        self.client = redis.Redis.from_url(url)
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def listen(self):
+        """Start relaying the channel to this process's sockets, once."""
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._run, name='realtime-redis', daemon=True)
+                self._listener.start()
+
+    def publish(self, message):
+        self.client.publish(self.channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    def _run(self):
+        failures = 0
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                if failures:
+                    logger.info('Resubscribed to %s', self.channel)
+                    failures = 0
+                for item in pubsub.listen():
+                    self.deliver(json.loads(item['data']))
+            except Exception:
+                # Changes published while disconnected are lost; sockets stay open.
+                delay = RECONNECT_SECONDS[min(failures, len(RECONNECT_SECONDS) - 1)]
+                logger.exception('Lost the %s subscription; retrying in %ss', self.channel, delay)
+                failures += 1
+                time.sleep(delay)
+            finally:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+
+
+class Subscriber:
+    """One socket: who is listening, to what, and its outgoing queue."""
+
+    def __init__(self, loop, user=None):
+        self.loop = loop
+        self.user = user
+        self.events = set()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def allowed(self):
+        return ROLE_EVENTS.get(getattr(self.user, 'role', None), set())
+
+    def wants(self, event_type):
+        model = event_type.split('.', 1)[0]
+        if model not in self.allowed():
+            return False
+        return bool({'*', model, event_type} & self.events)
+
+    def offer(self, text):
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            text = json.dumps({'type': 'resync'})
+        self.queue.put_nowait(text)
+
+
+class Hub:
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._backend_lock = threading.Lock()
+        self._backend = None
+
+    @property
+    def backend(self):
+        with self._backend_lock:
+            if self._backend is None:
+                config = dict(getattr(settings, 'REALTIME_BACKEND', {}))
+                backend = import_string(config.pop('BACKEND', 'api.realtime.LocalBackend'))
+                self._backend = backend(self.deliver, **{key.lower(): value for key, value in config.items()})
+            return self._backend
+
+    def attach(self, subscriber):
+        # Workers that never hold a socket publish only and never subscribe.
+        self.backend.listen()
+        with self._lock:
+            self._subscribers.add(subscriber)
+
+    def detach(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, message):
+        # Runs after the write has committed; an unreachable broker must not fail it.
+        try:
+            self.backend.publish(message)
+        except Exception:
+            logger.exception('Could not publish %s', message['type'])
+
+    def deliver(self, message):
+        """Queue ``message`` on every local socket subscribed to it; safe from any thread."""
+        with self._lock:
+            targets = [subscriber for subscriber in self._subscribers if subscriber.wants(message['type'])]
+        if not targets:
+            return
+        text = json.dumps(message, cls=DjangoJSONEncoder)
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, text)
+            except RuntimeError:
+                self.detach(subscriber)
+
+
+hub = Hub()
+
+
+def publish_changes(model, objects, action):
+    """Publish deltas for rows written without model signals, once the transaction commits."""
+    if model not in DELTA_FIELDS:
+        return
+    messages = [delta(obj, action) for obj in objects]
+    transaction.on_commit(lambda: [hub.publish(message) for message in messages], robust=True)
+
+
+@receiver(post_save)
+def _publish_saved(sender, instance, created, raw=False, **kwargs):
+    if sender in DELTA_FIELDS and not raw:
+        publish_changes(sender, [instance], 'created' if created else 'updated')
+
+
+@receiver(post_delete)
+def _publish_deleted(sender, instance, **kwargs):
+    if sender in DELTA_FIELDS:
+        publish_changes(sender, [instance], 'deleted')
+
+
+@sync_to_async
+def authenticate(raw_token):
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+    if not raw_token:
+        return None
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+async def _handle(subscriber, text):
+    """Apply one client message; returns ``(reply, close_code)``."""
+    try:
+        message = json.loads(text or '')
+    except ValueError:
+        return {'type': 'error', 'detail': 'Messages must be JSON.'}, None
+    if not isinstance(message, dict):
+        return {'type': 'error', 'detail': 'Messages must be JSON objects.'}, None
+
+    kind = message.get('type')
+    if kind == 'ping':
+        return {'type': 'pong'}, None
+    if kind not in ('subscribe', 'unsubscribe'):
+        return {'type': 'error', 'detail': f'Unknown message type {kind!r}.'}, None
+
+    if subscriber.user is None:
+        subscriber.user = await authenticate(message.get('token'))
+        if subscriber.user is None:
+            return {'type': 'error', 'detail': 'Authentication required.'}, 4401
+
+    events = message.get('events') or []
+    if not isinstance(events, list) or not all(isinstance(event, str) for event in events):
+        return {'type': 'error', 'detail': 'events must be a list of strings.'}, None
+    unknown = [event for event in events if not known_event(event)]
+    if unknown:
+        return {'type': 'error', 'detail': f'Unknown events: {", ".join(unknown)}.'}, None
+
+    if kind == 'subscribe':
+        subscriber.events.update(events)
+    else:
+        subscriber.events.difference_update(events)
+    return {'type': 'subscribed', 'events': sorted(subscriber.events)}, None
+
+
+async def updates_socket(scope, receive, send):
+    """ASGI application for ``/ws/updates/``."""
+    if (await receive())['type'] != 'websocket.connect':
+        return
+    query = parse_qs(scope.get('query_string', b'').decode())
+    user = await authenticate((query.get('token') or [None])[0])
+    await send({'type': 'websocket.accept'})
+
+    subscriber = Subscriber(asyncio.get_running_loop(), user)
+    hub.attach(subscriber)
+    incoming = asyncio.ensure_future(receive())
+    outgoing = asyncio.ensure_future(subscriber.queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({incoming, outgoing}, return_when=asyncio.FIRST_COMPLETED)
+            if outgoing in done:
+                await send({'type': 'websocket.send', 'text': outgoing.result()})
+                outgoing = asyncio.ensure_future(subscriber.queue.get())
+            if incoming in done:
+                event = incoming.result()
+                if event['type'] == 'websocket.disconnect':
+                    break
+                reply, close_code = await _handle(subscriber, event.get('text'))
+                await send({'type': 'websocket.send', 'text': json.dumps(reply)})
+                if close_code:
+                    await send({'type': 'websocket.close', 'code': close_code})
+                    break
+                incoming = asyncio.ensure_future(receive())
+    finally:
+        hub.detach(subscriber)
+        incoming.cancel()
+        outgoing.cancel()
+
+
+async def websocket_router(scope, receive, send):
+    if scope['path'] == UPDATES_PATH:
+        return await updates_socket(scope, receive, send)
+    await receive()
+    await send({'type': 'websocket.close', 'code': 4404})
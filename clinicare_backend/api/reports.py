@@ -1,70 +1,127 @@
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models.functions import TruncMonth, TruncDay
-from django.db.models import Count, Sum, Case, When, IntegerField
+from datetime import datetime, time
+from django.db import models
+from django.db.models import Case, When
+from django.utils import timezone
+from .cache import cache_response
+from .export import CHUNK_SIZE, export_dicts, get_output
 from .models import User, Inventory, Prescription, Appointment
+from .models import MonthlyUserRollup, MonthlyAppointmentRollup, MedicationRollup
+
+STATUS_GROUPS = {'completed': 'Completed', 'cancelled': 'Cancelled'}
+
+
+def _user_registrations():
+    return (
+        MonthlyUserRollup.objects.filter(count__gt=0)
+        .order_by("month", "role")
+        .values("month", "role", "count")
+    )
+
+
+def _user_registration_rows(rows):
+    for row in rows:
+        yield {
+            "month": timezone.make_aware(datetime.combine(row["month"], time.min)),
+            "role": row["role"],
+            "count": row["count"],
+        }
+
+
+def _inventory_levels():
+    return Inventory.objects.annotate(
+        status=Case(
+            When(quantity__lte=models.F('threshold'), then=models.Value('Needs Restock')),
+            default=models.Value('OK'),
+            output_field=models.CharField()
+        )
+    ).values('medicine_name', 'quantity', 'threshold', 'status')
+
+
+def _medications():
+    return (
+        MedicationRollup.objects.filter(count__gt=0)
+        .order_by('-count', 'medication')
+        .values('medication', 'count', 'patients', 'active')
+    )
+
+
+def _appointment_months():
+    return MonthlyAppointmentRollup.objects.filter(count__gt=0).order_by('month').values('month', 'status', 'count')
+
+
+def _appointment_rows(rows):
+    buckets = {}
+    for row in rows:
+        key = (row['month'], STATUS_GROUPS.get(row['status'], 'Scheduled'))
+        buckets[key] = buckets.get(key, 0) + row['count']
+    return [
+        {'month': month, 'status_group': status_group, 'count': count}
+        for (month, status_group), count in buckets.items()
+    ]
+
+
+# name: (query, optional transform of the fetched rows)
+REPORTS = {
+    'users': (_user_registrations, _user_registration_rows),
+    'inventory': (_inventory_levels, None),
+    'prescriptions': (_medications, None),
+    'appointments': (_appointment_months, _appointment_rows),
+}
+
+
+def report_rows(name, stream=False):
+    """Rows of report ``name``; ``stream`` reads the query in chunks instead of all at once."""
+    query, transform = REPORTS[name]
+    rows = query()
+    if stream:
+        rows = rows.iterator(chunk_size=CHUNK_SIZE)
+    return transform(rows) if transform else rows
+
+
+async def areport_rows(name):
+    """``report_rows`` for async views, as a list fetched with the async ORM."""
+    query, transform = REPORTS[name]
+    rows = [row async for row in query()]
+    return list(transform(rows)) if transform else rows
+
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@cache_response(User)
 def user_registration_report(request):
     """Report on user registrations over time (monthly)."""
-    stats = (
-        User.objects.annotate(month=TruncMonth("date_joined"))
-        .values("month", "role")
-        .annotate(count=Count("id"))
-        .order_by("month")
-    )
-    return Response(stats)
+    return Response(list(report_rows("users")))
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@cache_response(Inventory)
 def inventory_report(request):
     """Report on current inventory stock levels."""
-    stats = Inventory.objects.annotate(
-        status=Case(
-            When(quantity__lte=models.F('threshold'), then=models.Value('Needs Restock')),
-            default=models.Value('OK'),
-            output_field=models.CharField()
-        )
-    ).values('medicine_name', 'quantity', 'threshold', 'status')
-    return Response(stats)
+    return Response(report_rows("inventory"))
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@cache_response(Prescription)
 def prescription_report(request):
     """Report on prescriptions by medication"""
-    stats = (
-        Prescription.objects.values('medication')
-        .annotate(
-            count=Count('id'),
-            patients=Count('patient', distinct=True),
-            active=Sum(Case(
-                When(is_active=True, then=1),
-                default=0,
-                output_field=IntegerField()
-            ))
-        )
-        .order_by('-count')
-    )
-    return Response(stats)
+    return Response(report_rows("prescriptions"))
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@cache_response(Appointment)
 def appointment_report(request):
     """Report on appointment trends"""
-    stats = (
-        Appointment.objects.annotate(
-            month=TruncMonth('date'),
-            status_group=Case(
-                When(status='completed', then=models.Value('Completed')),
-                When(status='cancelled', then=models.Value('Cancelled')),
-                default=models.Value('Scheduled'),
-                output_field=models.CharField()
-            )
-        )
-        .values('month', 'status_group')
-        .annotate(count=Count('id'))
-        .order_by('month')
-    )
-    return Response(stats)
\ No newline at end of file
+    return Response(report_rows("appointments"))
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def export_report(request):
+    """Stream a report as CSV or NDJSON (``?report=<name>&output=csv|ndjson``)."""
+    name = request.query_params.get('report')
+    if name not in REPORTS:
+        raise ValidationError({'report': [f'Choose one of: {", ".join(REPORTS)}.']})
+    return export_dicts(report_rows(name, stream=True), get_output(request), f'{name}-report')
@@ -0,0 +1,211 @@
+"""
+Report rollups.
+
+Counter tables behind the report endpoints, kept current from model signals
+so a report reads one row per bucket instead of aggregating whole tables.
+Writes that bypass signals (``QuerySet.update``, ``bulk_create``) must call
+:func:`record` themselves; ``manage.py rebuild_rollups`` recomputes every
+counter from scratch.
+
+Archived appointments and prescriptions (see :mod:`api.archive`) count in
+the same buckets as the hot rows they were moved from, so reports cover the
+whole history.
+"""
+import datetime
+from collections import Counter
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (
+    User, Appointment, Prescription, ArchivedAppointment, ArchivedPrescription,
+    MonthlyUserRollup, MonthlyAppointmentRollup, MedicationRollup, MedicationPatientRollup,
+)
+
+TRACKED_FIELDS = {
+    User: ('date_joined', 'role'),
+    Appointment: ('date', 'status'),
+    Prescription: ('medication', 'patient_id', 'is_active'),
+    ArchivedAppointment: ('date', 'status'),
+    ArchivedPrescription: ('medication', 'patient_id', 'is_active'),
+}
+
+
+def month_of(value):
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def _bump(model, lookup, **deltas):
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    increments = {name: F(name) + delta for name, delta in deltas.items()}
+    if model.objects.filter(**lookup).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**increments)
+
+
+def _count_user(row, sign):
+    _bump(MonthlyUserRollup, {'month': month_of(row['date_joined']), 'role': row['role']}, count=sign)
+
+
+def _count_appointment(row, sign):
+    _bump(MonthlyAppointmentRollup, {'month': month_of(row['date']), 'status': row['status']}, count=sign)
+
+
+def _count_prescription(row, sign):
+    pair = {'medication': row['medication'], 'patient_id': row['patient_id']}
+    _bump(MedicationPatientRollup, pair, count=sign)
+    remaining = MedicationPatientRollup.objects.filter(**pair).values_list('count', flat=True).first() or 0
+    # The distinct patient count only moves when a pair appears or disappears.
+    if sign > 0 and remaining == sign:
+        patients = 1
+    elif sign < 0 and remaining == 0:
+        patients = -1
+        MedicationPatientRollup.objects.filter(**pair).delete()
+    else:
+        patients = 0
+    _bump(
+        MedicationRollup, {'medication': row['medication']},
+        count=sign, active=sign if row['is_active'] else 0, patients=patients,
+    )
+
+
+COUNTERS = {
+    User: _count_user,
+    Appointment: _count_appointment,
+    Prescription: _count_prescription,
+    ArchivedAppointment: _count_appointment,
+    ArchivedPrescription: _count_prescription,
+}
+
+
+def snapshot(instance):
+    """The tracked field values of ``instance``, normalized to Python types."""
+    opts = instance._meta
+    return {
+        name: opts.get_field(name).to_python(getattr(instance, name))
+        for name in TRACKED_FIELDS[type(instance)]
+    }
+
+
+def record(model, old=None, new=None):
+    """Move one row's contribution from ``old`` to ``new`` (either may be ``None``)."""
+    if old == new:
+        return
+    counter = COUNTERS[model]
+    with transaction.atomic():
+        if old is not None:
+            counter(old, -1)
+        if new is not None:
+            counter(new, 1)
+
+
+def record_created(model, instances):
+    """:func:`record` for rows inserted with ``bulk_create``, one counter update per distinct bucket."""
+    buckets = Counter(tuple(snapshot(instance).items()) for instance in instances)
+    counter = COUNTERS[model]
+    with transaction.atomic():
+        for row, count in buckets.items():
+            counter(dict(row), count)
+
+
+@receiver(pre_save)
+def _remember_previous(sender, instance, raw=False, **kwargs):
+    if sender not in TRACKED_FIELDS or raw:
+        return
+    instance._rollup_previous = None
+    if not instance._state.adding and instance.pk is not None:
+        instance._rollup_previous = (
+            sender._default_manager.filter(pk=instance.pk).values(*TRACKED_FIELDS[sender]).first()
+        )
+
+
+@receiver(post_save)
+def _count_saved(sender, instance, created, raw=False, **kwargs):
+    if sender not in TRACKED_FIELDS or raw:
+        return
+    previous = None if created else getattr(instance, '_rollup_previous', None)
+    record(sender, previous, snapshot(instance))
+
+
+@receiver(post_delete)
+def _count_deleted(sender, instance, **kwargs):
+    if sender in TRACKED_FIELDS:
+        record(sender, snapshot(instance), None)
+
+
+def rebuild(apps=global_apps):
+    """Recompute every rollup table from the source tables."""
+    def get(name):
+        return apps.get_model('api', name)
+
+    def sources(*names):
+        # Migrations pass their historical apps, which predate the archive tables.
+        models = []
+        for name in names:
+            try:
+                models.append(get(name))
+            except LookupError:
+                pass
+        return models
+
+    with transaction.atomic():
+        for name in ('MonthlyUserRollup', 'MonthlyAppointmentRollup', 'MedicationRollup', 'MedicationPatientRollup'):
+            get(name).objects.all().delete()
+
+        users = (
+            get('User').objects.annotate(month=TruncMonth('date_joined'))
+            .order_by().values('month', 'role').annotate(count=Count('id'))
+        )
+        get('MonthlyUserRollup').objects.bulk_create(
+            get('MonthlyUserRollup')(month=month_of(row['month']), role=row['role'], count=row['count'])
+            for row in users
+        )
+
+        appointments = Counter()
+        for model in sources('Appointment', 'ArchivedAppointment'):
+            for row in (
+                model.objects.annotate(month=TruncMonth('date'))
+                .order_by().values('month', 'status').annotate(count=Count('id'))
+            ):
+                appointments[row['month'], row['status']] += row['count']
+        get('MonthlyAppointmentRollup').objects.bulk_create(
+            get('MonthlyAppointmentRollup')(month=month, status=status, count=count)
+            for (month, status), count in appointments.items()
+        )
+
+        pairs, medications = Counter(), {}
+        for model in sources('Prescription', 'ArchivedPrescription'):
+            for row in (
+                model.objects.order_by().values('medication', 'patient_id')
+                .annotate(count=Count('id'), active=Count('id', filter=Q(is_active=True)))
+            ):
+                pairs[row['medication'], row['patient_id']] += row['count']
+                totals = medications.setdefault(row['medication'], Counter())
+                totals['count'] += row['count']
+                totals['active'] += row['active']
+        get('MedicationPatientRollup').objects.bulk_create(
+            get('MedicationPatientRollup')(medication=medication, patient_id=patient_id, count=count)
+            for (medication, patient_id), count in pairs.items()
+        )
+        patients = Counter(medication for medication, _ in pairs)
+        get('MedicationRollup').objects.bulk_create(
+            get('MedicationRollup')(
+                medication=medication, count=totals['count'], active=totals['active'], patients=patients[medication],
+            )
+            for medication, totals in medications.items()
+        )
@@ -0,0 +1,202 @@
+"""
+Patient search index.
+
+On SQLite two FTS5 tables shadow ``api_patient`` (external content, kept in
+sync by triggers, so bulk writes are covered too): a word index for ranked
+prefix matching and a trigram index for substring and fuzzy matching. On
+PostgreSQL the same queries run against ``pg_trgm`` GIN indexes. Any other
+backend falls back to ``icontains``.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+from .models import Patient
+
+SOURCE_TABLE = 'api_patient'
+SEARCH_FIELDS = ('name', 'contact', 'insurance_id')
+WORD_TABLE = 'api_patient_fts'
+TRIGRAM_TABLE = 'api_patient_trigram'
+FUZZY_THRESHOLD = 0.3
+FUZZY_CANDIDATES = 200
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def trigrams(text):
+    text = ' '.join((text or '').lower().split())
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def word_trigrams(word):
+    # Padded like pg_trgm so that matching word starts and ends count.
+    word = f'  {word} '
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def similarity(query, text):
+    """Mean, over the query's words, of the best trigram similarity to any word in ``text``."""
+    words = [word_trigrams(word) for word in _TOKEN_RE.findall((text or '').lower())]
+    terms = [word_trigrams(term) for term in _TOKEN_RE.findall(query.lower())]
+    if not words or not terms:
+        return 0.0
+    return sum(
+        max(len(term & word) / len(term | word) for word in words) for term in terms
+    ) / len(terms)
+
+
+def _quote(term):
+    return '"%s"' % term.replace('"', '""')
+
+
+def _sqlite_statements(table):
+    columns = ', '.join(SEARCH_FIELDS)
+    new_values = ', '.join(f'new.{field}' for field in SEARCH_FIELDS)
+    old_values = ', '.join(f'old.{field}' for field in SEARCH_FIELDS)
+    source = SOURCE_TABLE
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE ON {source} BEGIN "
+        f"INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+def install(schema_editor):
+    """Create the search tables, triggers and indexes. Safe to run repeatedly."""
+    vendor = schema_editor.connection.vendor
+    columns = ', '.join(SEARCH_FIELDS)
+    source = SOURCE_TABLE
+    if vendor == 'sqlite':
+        tables = {
+            WORD_TABLE: "tokenize='unicode61 remove_diacritics 2', prefix='2 3'",
+            TRIGRAM_TABLE: "tokenize='trigram'",
+        }
+        existing = set(schema_editor.connection.introspection.table_names())
+        for table, options in tables.items():
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5("
+                f"{columns}, content='{source}', content_rowid='id', {options})"
+            )
+            for statement in _sqlite_statements(table):
+                schema_editor.execute(statement)
+            if table not in existing:
+                schema_editor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+    elif vendor == 'postgresql':
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS {source}_{field}_trgm "
+                f"ON {source} USING gin ({field} gin_trgm_ops)"
+            )
+
+
+def uninstall(schema_editor):
+    vendor = schema_editor.connection.vendor
+    source = SOURCE_TABLE
+    if vendor == 'sqlite':
+        for table in (WORD_TABLE, TRIGRAM_TABLE):
+            for suffix in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+    elif vendor == 'postgresql':
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(f"DROP INDEX IF EXISTS {source}_{field}_trgm")
+
+
+def ensure_installed(sender, using='default', **kwargs):
+    """``post_migrate`` hook: SQLite table rebuilds in later migrations drop the triggers."""
+    with connections[using].schema_editor() as schema_editor:
+        install(schema_editor)
+
+
+def _best_similarity(query, patient_row):
+    return max(similarity(query, value) for value in patient_row)
+
+
+def _search_sqlite(query, limit):
+    tokens = _TOKEN_RE.findall(query.lower())
+    ids = []
+    with connection.cursor() as cursor:
+        if tokens:
+            cursor.execute(
+                f"SELECT rowid FROM {WORD_TABLE} WHERE {WORD_TABLE} MATCH %s "
+                f"ORDER BY bm25({WORD_TABLE}, 10.0, 2.0, 2.0) LIMIT %s",
+                [' '.join(f'{_quote(token)}*' for token in tokens), limit],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+
+        # Fuzzy matching is the fallback for typos; it is only needed when
+        # the prefix index found nothing.
+        grams = sorted(trigrams(query))
+        if ids or not grams:
+            return ids
+
+        cursor.execute(
+            f"SELECT rowid, {', '.join(SEARCH_FIELDS)} FROM {TRIGRAM_TABLE} "
+            f"WHERE {TRIGRAM_TABLE} MATCH %s ORDER BY bm25({TRIGRAM_TABLE}, 10.0, 2.0, 2.0) LIMIT %s",
+            [' OR '.join(_quote(gram) for gram in grams), FUZZY_CANDIDATES],
+        )
+        scored = []
+        for rowid, *values in cursor.fetchall():
+            score = _best_similarity(query, values)
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, rowid))
+    return [rowid for _, rowid in sorted(scored)][:limit]
+
+
+def _search_postgresql(query, limit):
+    from django.contrib.postgres.lookups import TrigramSimilar
+    from django.contrib.postgres.search import TrigramSimilarity
+    from django.db.models import F
+    from django.db.models.functions import Greatest
+
+    condition = Q(name__istartswith=query)
+    for field in SEARCH_FIELDS:
+        condition |= Q(TrigramSimilar(F(field), query))
+    queryset = (
+        Patient.objects.filter(condition)
+        .annotate(
+            prefix=Case(When(name__istartswith=query, then=Value(1)), default=Value(0), output_field=IntegerField()),
+            score=Greatest(*(TrigramSimilarity(field, query) for field in SEARCH_FIELDS)),
+        )
+        .order_by('-prefix', '-score', 'name', 'id')
+    )
+    return list(queryset.values_list('id', flat=True)[:limit])
+
+
+def _search_fallback(query, limit):
+    condition = Q()
+    for field in SEARCH_FIELDS:
+        condition |= Q(**{f'{field}__icontains': query})
+    queryset = Patient.objects.filter(condition).annotate(
+        prefix=Case(When(name__istartswith=query, then=Value(1)), default=Value(0), output_field=IntegerField()),
+    ).order_by('-prefix', 'name', 'id')
+    return list(queryset.values_list('id', flat=True)[:limit])
+
+
+def search_patient_ids(query, limit=20):
+    """Return patient ids ranked by relevance, falling back to fuzzy matches on a miss."""
+    query = ' '.join((query or '').split())
+    if not query:
+        return []
+    if connection.vendor == 'sqlite':
+        return _search_sqlite(query, limit)
+    if connection.vendor == 'postgresql':
+        return _search_postgresql(query, limit)
+    return _search_fallback(query, limit)
+
+
+def filter_name_contains(queryset, term):
+    """Indexed equivalent of ``queryset.filter(name__icontains=term)``."""
+    # The trigram tokenizer only serves plain LIKE patterns of 3+ characters.
+    if connection.vendor != 'sqlite' or len(term) < 3 or any(char in term for char in '%_\\'):
+        return queryset.filter(name__icontains=term)
+    return queryset.filter(pk__in=RawSQL(
+        f"SELECT rowid FROM {TRIGRAM_TABLE} WHERE name LIKE %s", [f'%{term}%']
+    ))
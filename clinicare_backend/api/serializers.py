@@ -1,8 +1,10 @@
 from rest_framework import serializers
-from .models import User, Patient, Appointment, Inventory, Prescription
+from .metrics import TimedSerializerMixin
+from .models import User, Patient, Appointment, Inventory, InventoryAlert, Prescription, StockMovement
+from .stock import save_details
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'email', 'role', 'first_name', 'last_name', "password"]
@@ -11,7 +13,19 @@ class UserSerializer(serializers.ModelSerializer):
         }
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class RosterUserSerializer(serializers.ModelSerializer):
+    """One row of a provisioning roster; email uniqueness is checked for the whole roster at once."""
+    password = serializers.CharField(required=False, allow_blank=True, trim_whitespace=False)
+
+    class Meta:
+        model = User
+        fields = ['email', 'role', 'first_name', 'last_name', 'password']
+        extra_kwargs = {
+            'email': {'validators': []},
+        }
+
+
+class PatientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(required=False)
 
     class Meta:
@@ -27,7 +41,15 @@ class PatientSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class PatientListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """The columns patient lists show; the full record is on the detail route."""
+
+    class Meta:
+        model = Patient
+        fields = ['id', 'name', 'age', 'gender', 'contact', 'blood_type', 'last_physical']
+
+
+class AppointmentSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     patient_name = serializers.CharField(source='patient.name', read_only=True)
     doctor_name = serializers.CharField(source='doctor.email', read_only=True)
 
@@ -39,21 +61,106 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'date': {'required': True},
             'time': {'required': True}
         }
+        # The active-slot constraint is enforced by the database; a clash
+        # surfaces as a 409 from the view instead of a validation error.
+        validators = []
+
+
+class AppointmentListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    patient_name = serializers.CharField(source='patient.name', read_only=True)
+    doctor_name = serializers.CharField(source='doctor.email', read_only=True)
+
+    class Meta:
+        model = Appointment
+        fields = ['id', 'patient', 'patient_name', 'doctor', 'doctor_name', 'date', 'time', 'status']
+
 
+class AppointmentBookingSerializer(serializers.Serializer):
+    """Input of ``AppointmentViewSet.create``: the patient is given by name and resolved or created."""
+    date = serializers.DateField()
+    time = serializers.TimeField()
+    patient_name = serializers.CharField(max_length=255)
+    doctor = serializers.IntegerField(required=False, allow_null=True)
+    age = serializers.IntegerField(required=False, min_value=0, default=0)
 
-class InventorySerializer(serializers.ModelSerializer):
+
+class InventorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     needs_restock = serializers.BooleanField(read_only=True)
 
     class Meta:
         model = Inventory
         fields = '__all__'
 
+    def validate_quantity(self, value):
+        # The quantity is the total of the item's stock movements; only a new item sets it directly.
+        if self.instance is not None and value != self.instance.quantity:
+            raise serializers.ValidationError('Record a stock movement to change the quantity.')
+        return value
+
+    def validate(self, data):
+        if self.instance is not None:
+            # Not written on updates, including bulk ones; see stock.save_details.
+            data.pop('quantity', None)
+        return data
+
+    def update(self, instance, validated_data):
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        save_details(instance)
+        return instance
+
+
+class StockMovementSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    quantity = serializers.IntegerField(write_only=True, help_text='Units; signed for adjustments')
+    medicine_name = serializers.CharField(source='item.medicine_name', read_only=True)
+
+    class Meta:
+        model = StockMovement
+        fields = [
+            'id', 'item', 'medicine_name', 'kind', 'quantity', 'change', 'balance', 'note', 'user', 'created_at',
+        ]
+        read_only_fields = ('change', 'balance', 'user', 'created_at')
+
+    def validate(self, data):
+        if data['kind'] == 'adjustment':
+            if data['quantity'] == 0:
+                raise serializers.ValidationError({'quantity': ['An adjustment cannot be zero.']})
+        elif data['quantity'] <= 0:
+            raise serializers.ValidationError({'quantity': ['Must be a positive number of units.']})
+        return data
+
+
+class InventoryAlertSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    medicine_name = serializers.CharField(source='item.medicine_name', read_only=True)
+    quantity = serializers.IntegerField(source='item.quantity', read_only=True)
+    threshold = serializers.IntegerField(source='item.threshold', read_only=True)
+    expiry_date = serializers.DateField(source='item.expiry_date', read_only=True)
 
-class PrescriptionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InventoryAlert
+        fields = [
+            'id', 'item', 'kind', 'medicine_name', 'quantity', 'threshold', 'expiry_date',
+            'raised_at', 'resolved_at',
+        ]
+
+
+class PrescriptionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     patient_name = serializers.CharField(source='patient.name', read_only=True)
     doctor_name = serializers.CharField(source='doctor.email', read_only=True)
 
     class Meta:
         model = Prescription
         fields = '__all__'
-        read_only_fields = ('date_prescribed',)
\ No newline at end of file
+        read_only_fields = ('date_prescribed',)
+
+
+class PrescriptionListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    patient_name = serializers.CharField(source='patient.name', read_only=True)
+    doctor_name = serializers.CharField(source='doctor.email', read_only=True)
+
+    class Meta:
+        model = Prescription
+        fields = [
+            'id', 'patient', 'patient_name', 'doctor', 'doctor_name',
+            'medication', 'dosage', 'is_active', 'date_prescribed',
+        ]
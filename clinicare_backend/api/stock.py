@@ -0,0 +1,111 @@
+"""
+Stock movement ledger.
+
+Every change to an item's stock is a :class:`~api.models.StockMovement`:
+receipts add units, dispenses remove them and adjustments correct a count.
+``Inventory.quantity`` is the running total of an item's movements, kept as a
+cached aggregate: :func:`move` applies the change with one conditional
+``UPDATE ... SET quantity = quantity + change WHERE quantity + change >= 0``
+in the transaction that writes the movement. The database does the
+arithmetic under the row lock, so concurrent dispenses queue on the row
+instead of overwriting each other's result, and a dispense that would drive
+the stock negative fails with :class:`InsufficientStock` instead.
+
+:func:`consumption` sums the dispenses of a trailing window per item and
+:func:`with_rates` turns that into a daily use rate and days of stock left.
+The total comes from one range scan per item on
+``stock_item_kind_created_idx``, so it costs the window's movements rather
+than the item's whole history.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from . import alerts
+from .cache import invalidate
+from .db import writer_slot
+from .models import Inventory, StockMovement
+from .realtime import publish_changes
+
+CONSUMPTION_DAYS = 30
+
+
+class InsufficientStock(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Not enough stock on hand for this movement.'
+    default_code = 'insufficient_stock'
+
+
+def signed_change(kind, quantity):
+    """The ledger ``change`` for ``quantity`` units: dispenses remove, receipts add, adjustments are signed."""
+    return -quantity if kind == 'dispense' else quantity
+
+
+def move(item_id, kind, quantity, user=None, note=''):
+    """Record one movement and apply it to the item's quantity; returns the movement."""
+    change = signed_change(kind, quantity)
+    with writer_slot(), transaction.atomic():
+        updated = Inventory.objects.filter(pk=item_id, quantity__gte=-change).update(
+            quantity=F('quantity') + change
+        )
+        if not updated:
+            if Inventory.objects.filter(pk=item_id).exists():
+                raise InsufficientStock()
+            raise NotFound()
+        # The UPDATE holds the row lock until commit, so this reads our own result.
+        item = Inventory.objects.get(pk=item_id)
+        movement = StockMovement.objects.create(
+            item=item, kind=kind, change=change, balance=item.quantity, user=user, note=note
+        )
+        # QuerySet.update sends no signals.
+        alerts.evaluate([item.pk])
+        publish_changes(Inventory, [item], 'updated')
+    invalidate(Inventory, StockMovement)
+    return movement
+
+
+def save_details(item):
+    """
+    Save an existing item without its quantity, which only changes through
+    :func:`move`; writing back the value the instance loaded would undo the
+    movements committed since.
+    """
+    item.save(update_fields=[
+        field.name for field in Inventory._meta.concrete_fields if not field.primary_key and field.name != 'quantity'
+    ])
+
+
+def record_opening(items, user=None):
+    """Ledger entries for newly created items' starting quantities; call inside their transaction."""
+    StockMovement.objects.bulk_create(
+        StockMovement(item=item, kind='receipt', change=item.quantity, balance=item.quantity,
+                      user=user, note='Opening stock')
+        for item in items if item.quantity
+    )
+    invalidate(StockMovement)
+
+
+def consumption(queryset, days=CONSUMPTION_DAYS, now=None):
+    """``queryset`` annotated with ``dispensed``, the units dispensed over the last ``days``."""
+    since = (now or timezone.now()) - datetime.timedelta(days=days)
+    dispensed = (
+        StockMovement.objects.filter(item=OuterRef('pk'), kind='dispense', created_at__gte=since)
+        .order_by().values('item').annotate(total=Sum('change')).values('total')
+    )
+    return queryset.annotate(dispensed=Coalesce(Subquery(dispensed), 0) * -1)
+
+
+def with_rates(rows, days=CONSUMPTION_DAYS):
+    """
+    Add ``daily_use`` and ``days_left`` (``None`` when nothing was dispensed)
+    to :func:`consumption` rows, soonest out of stock first.
+    """
+    for row in rows:
+        row['daily_use'] = row['dispensed'] / days
+        row['days_left'] = row['quantity'] / row['daily_use'] if row['dispensed'] else None
+    return sorted(rows, key=lambda row: (row['days_left'] is None, row['days_left'] or 0))
@@ -1,3 +1,1467 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import io
+import json
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import throttling
+from .authentication import get_user_cache
+from .fastpath import compile_serializer, dumps
+from .metrics import registry
+from .models import (
+    User, Patient, Appointment, ArchivedAppointment, Inventory, InventoryAlert, InventoryAlertRun, Prescription,
+    ArchivedPrescription, StockMovement, MonthlyAppointmentRollup,
+)
+from .realtime import updates_socket
+from .serializers import PatientListSerializer, PatientSerializer
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_cache().clear()
+        throttling.reset()
+        self.user = User.objects.create_user(email="admin@clinicare.test", password="pass", role="admin")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        patient = Patient.objects.create(name="Jane Doe")
+        day = datetime.date(2025, 1, 1)
+        for offset in range(4):
+            for slot in ("09:00", "09:00", "10:30", None):
+                Appointment.objects.create(
+                    patient=patient, date=day + datetime.timedelta(days=offset), time=slot
+                )
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get("/api/appointments/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json(), list)
+        self.assertEqual(len(response.json()), 16)
+
+    def test_pages_follow_model_ordering_without_gaps(self):
+        # -date, time, id with NULL times first within a day.
+        expected = [
+            appointment.id for appointment in sorted(
+                Appointment.objects.all(),
+                key=lambda a: (-a.date.toordinal(), a.time is not None, a.time or datetime.time.min, a.id),
+            )
+        ]
+
+        seen = []
+        url = "/api/appointments/?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), 3)
+            seen.extend(row["id"] for row in page["results"])
+            url = page["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/appointments/?cursor=bogus")
+        self.assertEqual(response.status_code, 404)
+
+
+class ListQueryCountTests(APITestCase):
+    """List endpoints must not issue more queries as the row count grows."""
+
+    def setUp(self):
+        super().setUp()
+        self.counter = 0
+
+    def make_rows(self, count):
+        for _ in range(count):
+            self.counter += 1
+            n = self.counter
+            doctor = User.objects.create(email=f"doctor{n}@clinicare.test", role="doctor")
+            patient_user = User.objects.create(email=f"patient{n}@clinicare.test")
+            patient = Patient.objects.create(name=f"Patient {n}", user=patient_user)
+            Appointment.objects.create(patient=patient, doctor=doctor, date=datetime.date(2025, 1, 1))
+            Prescription.objects.create(
+                patient=patient, doctor=doctor, medication="Amoxicillin", dosage="500mg", instructions="Daily"
+            )
+            Inventory.objects.create(medicine_name=f"Medicine {n}", quantity=n, expiry_date=datetime.date(2026, 1, 1))
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_is_independent_of_row_count(self):
+        urls = [
+            "/api/users/", "/api/patients/", "/api/appointments/", "/api/inventory/", "/api/prescriptions/",
+            "/api/patients/?fields=id,user,medical_history", "/api/appointments/?exclude=patient_name",
+        ]
+        self.make_rows(2)
+        baseline = {url: self.count_queries(url) for url in urls}
+        self.make_rows(5)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), baseline[url])
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+        self.patient = Patient.objects.create(name="Jane Doe", medical_history="Asthma", insurance_id="X1")
+        Appointment.objects.create(patient=self.patient, doctor=doctor, date=datetime.date(2025, 1, 1), notes="Note")
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), " ".join(query["sql"] for query in queries.captured_queries)
+
+    def test_lists_are_compact_and_details_complete(self):
+        (row,), sql = self.get("/api/patients/")
+        self.assertEqual(set(row), {"id", "name", "age", "gender", "contact", "blood_type", "last_physical"})
+        self.assertNotIn("medical_history", sql)
+        detail, _ = self.get(f"/api/patients/{self.patient.id}/")
+        self.assertEqual(detail["medical_history"], "Asthma")
+        (appointment,), _ = self.get("/api/appointments/")
+        self.assertNotIn("notes", appointment)
+
+    def test_fields_and_exclude_prune_columns_and_joins(self):
+        (row,), sql = self.get("/api/patients/?fields=id,medical_history")
+        self.assertEqual(row, {"id": self.patient.id, "medical_history": "Asthma"})
+        self.assertNotIn("insurance_id", sql)
+
+        (row,), sql = self.get("/api/appointments/?fields=id,date")
+        self.assertEqual(set(row), {"id", "date"})
+        self.assertNotIn('"api_patient"', sql)
+
+        (row,), _ = self.get("/api/appointments/?exclude=patient_name,doctor_name,status")
+        self.assertEqual(set(row), {"id", "patient", "doctor", "date", "time"})
+
+        detail, _ = self.get(f"/api/patients/{self.patient.id}/?exclude=user,medical_history")
+        self.assertNotIn("medical_history", detail)
+        self.assertIn("insurance_id", detail)
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get("/api/patients/?fields=name,ssn")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"fields": ["Unknown field(s): ssn."]})
+
+    def test_selections_share_one_bounded_serializer_class(self):
+        from django.http import QueryDict
+
+        from .mixins import SERIALIZER_CACHE_SIZE, requested_serializer, sparse_serializer
+
+        def pick(query):
+            return requested_serializer(PatientSerializer, QueryDict(query), PatientListSerializer)
+
+        self.assertIs(pick("fields=name,id"), pick("fields=id,name,id"))
+        self.assertIs(pick("fields=id,name,age&exclude=age"), pick("fields=name,id"))
+        self.assertIs(pick("exclude="), PatientListSerializer)
+        self.assertEqual(list(pick("fields=name,id")().fields), ["id", "name"])
+        self.assertEqual(sparse_serializer.cache_info().maxsize, SERIALIZER_CACHE_SIZE)
+
+    def test_writes_use_the_full_serializer(self):
+        response = self.client.patch(
+            f"/api/patients/{self.patient.id}/?fields=id", {"age": 40}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["medical_history"], "Asthma")
+        self.patient.refresh_from_db()
+        self.assertEqual((self.patient.age, self.patient.medical_history), (40, "Asthma"))
+
+
+class FastPathTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        doctor = User.objects.create(email="doctor@clinicare.test", role="doctor", first_name="Zoë")
+        for n in range(3):
+            patient = Patient.objects.create(name=f"Patient {n}", gender="Female", age=n or None)
+            Appointment.objects.create(
+                patient=patient, doctor=doctor if n else None, date=datetime.date(2025, 1, n + 1), status="completed"
+            )
+            Prescription.objects.create(
+                patient=patient, doctor=doctor, medication="Amoxicillin", dosage="500mg", instructions="Daily\u2028"
+            )
+            Inventory.objects.create(medicine_name=f"Medicine {n}", quantity=n * 10, expiry_date="2026-01-01")
+
+    def drf_list(self, url):
+        # Without a compiled serializer the view takes the regular path, giving the reference output.
+        with mock.patch("api.fastpath.compile_serializer", return_value=None), mock.patch(
+            "api.fastpath.FastJSONRenderer.render", JSONRenderer.render
+        ):
+            return self.client.get(url).content
+
+    def test_lists_match_the_serializers(self):
+        for url in [
+            "/api/users/", "/api/patients/", "/api/appointments/", "/api/inventory/", "/api/prescriptions/",
+            "/api/appointments/?fields=id,status,doctor_name", "/api/inventory/?page_size=2",
+        ]:
+            with self.subTest(url=url):
+                cache.clear()
+                fast = self.client.get(url).content
+                cache.clear()
+                self.assertEqual(fast, self.drf_list(url))
+
+    def test_pagination_cursors(self):
+        first = self.client.get("/api/appointments/", {"page_size": 2}).json()
+        second = self.client.get(first["next"]).json()
+        self.assertEqual(
+            [row["date"] for row in first["results"] + second["results"]], ["2025-01-03", "2025-01-02", "2025-01-01"]
+        )
+        self.assertIsNone(second["next"])
+
+    def test_only_flat_serializers_compile(self):
+        self.assertIsNone(compile_serializer(PatientSerializer))
+        self.assertIsNotNone(compile_serializer(PatientListSerializer))
+
+    def test_display_sources_use_the_model_choices(self):
+        class RoleSerializer(serializers.ModelSerializer):
+            role_display = serializers.CharField(source="get_role_display")
+
+            class Meta:
+                model = User
+                fields = ["id", "role", "role_display"]
+
+        users = User.objects.order_by("pk")
+        self.assertEqual(
+            dumps(compile_serializer(RoleSerializer).serialize(users)),
+            dumps(RoleSerializer(users, many=True).data),
+        )
+        self.assertIn(b'"role_display":"Doctor"', dumps(compile_serializer(RoleSerializer).serialize(users)))
+
+
+class PatientSearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.jane = Patient.objects.create(name="Jane Doe", contact="0712345678", insurance_id="NHIF-001")
+        self.janet = Patient.objects.create(name="Janet Smith", contact="0799999999")
+        self.john = Patient.objects.create(name="John Janeway")
+
+    def search(self, query):
+        response = self.client.get("/api/patients/search/", {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()]
+
+    def test_prefix_match(self):
+        results = self.search("jane")
+        self.assertEqual(set(results), {self.jane.id, self.janet.id, self.john.id})
+        self.assertEqual(self.search("jane doe"), [self.jane.id])
+
+    def test_matches_contact_and_insurance(self):
+        self.assertEqual(self.search("NHIF"), [self.jane.id])
+        self.assertEqual(self.search("07999"), [self.janet.id])
+
+    def test_fuzzy_match_tolerates_typos(self):
+        self.assertIn(self.janet.id, self.search("Jannet Smyth"))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.jane.name = "Mary Poppins"
+        self.jane.save()
+        self.assertEqual(self.search("poppins"), [self.jane.id])
+        self.assertNotIn(self.jane.id, self.search("Jane Doe"))
+
+        self.jane.delete()
+        self.assertEqual(self.search("poppins"), [])
+
+    def test_name_filter_is_substring_match(self):
+        response = self.client.get("/api/patients/", {"name": "ANE"})
+        self.assertEqual({row["id"] for row in response.json()}, {self.jane.id, self.janet.id, self.john.id})
+        response = self.client.get("/api/patients/", {"name": "net"})
+        self.assertEqual([row["id"] for row in response.json()], [self.janet.id])
+
+
+class AvailabilityTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+        self.other = User.objects.create(email="other@clinicare.test", role="doctor")
+        patient = Patient.objects.create(name="Jane Doe")
+        self.day = datetime.date(2025, 3, 3)
+        Appointment.objects.create(patient=patient, doctor=self.doctor, date=self.day, time="09:00")
+        Appointment.objects.create(patient=patient, doctor=self.doctor, date=self.day, time="10:15")
+        Appointment.objects.create(
+            patient=patient, doctor=self.doctor, date=self.day, time="11:00", status="cancelled"
+        )
+
+    def test_single_day(self):
+        response = self.client.get(f"/api/doctors/{self.doctor.id}/availability/", {"date": "2025-03-03"})
+        self.assertEqual(response.status_code, 200)
+        slots = response.data["available_slots"]
+        self.assertEqual(len(slots), 13)
+        # 10:15 overlaps both the 10:00 and 10:30 slots; cancelled bookings free their slot.
+        for taken in ("09:00", "10:00", "10:30"):
+            self.assertNotIn(taken, slots)
+        self.assertIn("11:00", slots)
+
+    def test_bulk_grid(self):
+        response = self.client.get("/api/doctors/availability/", {
+            "from": "2025-03-03", "to": "2025-03-09", "slot_minutes": 60,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["slots"][0], "09:00")
+        self.assertEqual(len(response.data["slots"]), 8)
+        grid = {row["doctor_id"]: row["available_slots"] for row in response.data["doctors"]}
+        self.assertEqual(set(grid), {self.doctor.id, self.other.id})
+        self.assertEqual(len(grid[self.doctor.id]), 7)
+        self.assertEqual(grid[self.doctor.id]["2025-03-03"][:1], ["12:00"])
+        self.assertEqual(len(grid[self.other.id]["2025-03-03"]), 8)
+
+    def test_bulk_grid_is_one_query(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/api/doctors/availability/", {
+                "doctors": f"{self.doctor.id},{self.other.id}", "from": "2025-03-01", "to": "2025-03-31",
+            })
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_bulk_grid_validation(self):
+        self.assertEqual(self.client.get("/api/doctors/availability/").status_code, 400)
+        response = self.client.get("/api/doctors/availability/", {"from": "2025-01-01", "to": "2025-06-01"})
+        self.assertEqual(response.status_code, 400)
+
+
+class BookingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+
+    def book(self, name="Jane Doe", time="09:00"):
+        return self.client.post("/api/appointments/", {
+            "date": "2025-03-03", "time": time, "patient_name": name, "doctor": self.doctor.id,
+        }, format="json")
+
+    def test_double_booking_is_a_conflict(self):
+        self.assertEqual(self.book().status_code, 201)
+        response = self.book(name="John Smith")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_cancelled_slot_can_be_rebooked(self):
+        self.assertEqual(self.book().status_code, 201)
+        Appointment.objects.update(status="cancelled")
+        self.assertEqual(self.book().status_code, 201)
+
+    def test_existing_patient_is_reused(self):
+        self.book(time="09:00")
+        self.book(time="09:30")
+        self.assertEqual(Patient.objects.filter(name="Jane Doe").count(), 1)
+
+    def test_moving_into_a_taken_slot_is_a_conflict(self):
+        self.book(time="09:00")
+        other = self.book(time="09:30").data
+        response = self.client.patch(f"/api/appointments/{other['id']}/", {"time": "09:00"}, format="json")
+        self.assertEqual(response.status_code, 409)
+
+    def test_other_integrity_errors_are_not_slot_conflicts(self):
+        from django.db import IntegrityError
+
+        appointment = self.book().data
+        with mock.patch("api.models.Appointment.save", side_effect=IntegrityError("NOT NULL constraint failed")):
+            with self.assertRaises(IntegrityError):
+                self.client.patch(f"/api/appointments/{appointment['id']}/", {"notes": "x"}, format="json")
+
+
+class ArchiveTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+        self.jane = Patient.objects.create(name="Jane")
+        self.old = datetime.date.today() - datetime.timedelta(days=400)
+        recent = datetime.date.today() - datetime.timedelta(days=30)
+        self.appointments = {
+            key: Appointment.objects.create(patient=self.jane, doctor=self.doctor, date=date, time=time, status=status)
+            for key, date, time, status in [
+                ("old-completed", self.old, "09:00", "completed"),
+                ("old-cancelled", self.old, "09:30", "cancelled"),
+                ("old-scheduled", self.old, "10:00", "scheduled"),
+                ("recent-completed", recent, "09:00", "completed"),
+            ]
+        }
+        self.prescriptions = {
+            key: Prescription.objects.create(
+                patient=self.jane, doctor=self.doctor, medication="Amoxicillin", dosage="500mg",
+                instructions="Daily", is_active=active,
+            )
+            for key, active in [("old-inactive", False), ("old-active", True), ("recent-inactive", False)]
+        }
+        Prescription.objects.filter(pk__in=[self.prescriptions["old-inactive"].pk, self.prescriptions["old-active"].pk]).update(
+            date_prescribed=datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=400)
+        )
+
+    def archive(self, *args):
+        out = io.StringIO()
+        call_command("archive_history", *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_only_old_finished_rows_in_batches(self):
+        self.assertIn("Would archive 2 appointments, 1 prescriptions", self.archive("--dry-run"))
+        self.assertEqual(ArchivedAppointment.objects.count(), 0)
+
+        self.archive("--batch-size", "1")
+        self.assertEqual(
+            set(ArchivedAppointment.objects.values_list("id", flat=True)),
+            {self.appointments["old-completed"].pk, self.appointments["old-cancelled"].pk},
+        )
+        self.assertEqual(
+            list(ArchivedPrescription.objects.values_list("id", flat=True)), [self.prescriptions["old-inactive"].pk]
+        )
+        self.assertEqual(Appointment.objects.count(), 2)
+        self.assertEqual(Prescription.objects.count(), 2)
+        archived = ArchivedAppointment.objects.get(pk=self.appointments["old-completed"].pk)
+        self.assertEqual((archived.date, archived.status, archived.doctor), (self.old, "completed", self.doctor))
+
+    def test_lists_read_the_archive_on_request(self):
+        self.client.get("/api/appointments/")
+        self.archive()
+        hot = self.client.get("/api/appointments/").json()
+        self.assertEqual({row["id"] for row in hot}, {
+            self.appointments["old-scheduled"].pk, self.appointments["recent-completed"].pk,
+        })
+        everything = self.client.get("/api/appointments/", {"include_archived": "true"}).json()
+        self.assertEqual([row["id"] for row in everything], [
+            self.appointments[key].pk for key in ("recent-completed", "old-completed", "old-cancelled", "old-scheduled")
+        ])
+        self.assertEqual(set(everything[0]), set(hot[0]))
+
+        filtered = self.client.get("/api/prescriptions/", {"include_archived": "true", "patient_id": self.jane.pk})
+        self.assertEqual(len(filtered.json()), 3)
+        self.assertEqual(len(self.client.get("/api/prescriptions/").json()), 2)
+
+        url = f"/api/appointments/{self.appointments['old-completed'].pk}/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, {"include_archived": "true"}).json()["status"], "completed")
+        self.assertEqual(self.client.delete(f"{url}?include_archived=true").status_code, 404)
+
+        seen, url = [], "/api/appointments/?include_archived=true&page_size=1"
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page["results"]), 1)
+            seen += [row["id"] for row in page["results"]]
+            url = page["next"]
+        self.assertEqual(seen, [row["id"] for row in everything])
+
+    def test_rollups_cover_both_tables(self):
+        from . import rollups
+
+        reports = ["/api/reports/appointments/", "/api/reports/prescriptions/"]
+        before = {url: self.client.get(url).json() for url in reports}
+        self.archive()
+        cache.clear()
+        self.assertEqual({url: self.client.get(url).json() for url in reports}, before)
+        rollups.rebuild()
+        cache.clear()
+        self.assertEqual({url: self.client.get(url).json() for url in reports}, before)
+
+        self.jane.delete()
+        self.assertEqual(self.client.get("/api/reports/prescriptions/").json(), [])
+
+
+class CalendarTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+        self.other = User.objects.create(email="other@clinicare.test", role="doctor")
+        patient = Patient.objects.create(name="Jane Doe")
+        for date, time, doctor, status in [
+            ("2025-03-03", "09:00", self.doctor, "scheduled"),
+            ("2025-03-03", "09:30", self.doctor, "completed"),
+            ("2025-03-03", "09:00", self.other, "cancelled"),
+            ("2025-03-20", "10:00", None, "scheduled"),
+            ("2025-04-01", "10:00", self.doctor, "scheduled"),
+        ]:
+            Appointment.objects.create(patient=patient, date=date, time=time, doctor=doctor, status=status)
+
+    def test_month_counts_per_day_and_doctor(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/appointments/calendar/", {"month": "2025-03"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["from"], data["to"]), ("2025-03-01", "2025-03-31"))
+        self.assertEqual([day["date"] for day in data["days"]], ["2025-03-03", "2025-03-20"])
+        busy = data["days"][0]
+        self.assertEqual(busy["total"], 3)
+        self.assertEqual(busy["counts"], {"scheduled": 1, "completed": 1, "cancelled": 1})
+        self.assertEqual(
+            [(row["doctor"], row["total"]) for row in busy["doctors"]], [(self.doctor.pk, 2), (self.other.pk, 1)]
+        )
+        self.assertEqual(data["days"][1]["doctors"][0]["doctor"], None)
+
+    def test_last_month_of_the_calendar(self):
+        data = self.client.get("/api/appointments/calendar/", {"month": "9999-12"}).json()
+        self.assertEqual((data["from"], data["to"], data["days"]), ("9999-12-01", "9999-12-31", []))
+
+    def test_week_and_doctor_filter(self):
+        response = self.client.get("/api/appointments/calendar/", {"week": "2025-03-05", "doctor_id": self.other.pk})
+        data = response.json()
+        self.assertEqual((data["from"], data["to"]), ("2025-03-03", "2025-03-09"))
+        self.assertEqual([(day["date"], day["total"]) for day in data["days"]], [("2025-03-03", 1)])
+
+    def test_day_lists_compact_rows(self):
+        response = self.client.get("/api/appointments/calendar/", {"day": "2025-03-03", "doctor_id": self.doctor.pk})
+        self.assertEqual(response.status_code, 200)
+        rows = response.json()
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(set(rows[0]), {"id", "patient", "patient_name", "doctor", "doctor_name", "date", "time", "status"})
+
+    def test_invalid_windows_are_rejected(self):
+        for params in ({"month": "March"}, {"day": "2025-03-32"}, {"from": "2025-03-01"},
+                       {"from": "2025-01-01", "to": "2025-03-31"}, {"from": "2025-03-02", "to": "2025-03-01"},
+                       {"week": "9999-12-31"}):
+            self.assertEqual(self.client.get("/api/appointments/calendar/", params).status_code, 400, params)
+
+
+class DashboardTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = datetime.date.today()
+        self.doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+        other = User.objects.create(email="other@clinicare.test", role="doctor")
+        patient = Patient.objects.create(name="Jane Doe", allergies="Penicillin")
+        Patient.objects.create(name="John Smith")
+        for time, doctor, status in [("09:00", self.doctor, "scheduled"), ("10:00", self.doctor, "completed"),
+                                     ("09:00", other, "scheduled")]:
+            Appointment.objects.create(patient=patient, date=self.today, time=time, doctor=doctor, status=status)
+        Appointment.objects.create(
+            patient=patient, date=self.today + datetime.timedelta(days=3), time="09:00", doctor=self.doctor
+        )
+        Inventory.objects.create(medicine_name="Ibuprofen", quantity=5, threshold=10,
+                                 expiry_date=self.today + datetime.timedelta(days=200))
+
+    def get(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get("/api/dashboard/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_doctor_dashboard_is_scoped_to_the_doctor(self):
+        with self.assertNumQueries(6):
+            data = self.get(self.doctor)
+        self.assertEqual(list(data)[2:], ["patients", "appointments", "inventory"])
+        appointments = data["appointments"]
+        self.assertEqual((appointments["today"], appointments["today_completed"], appointments["upcoming"]), (2, 1, 1))
+        self.assertEqual([row["time"] for row in appointments["rows"]], ["09:00:00", "10:00:00"])
+        self.assertEqual((data["patients"]["total"], data["patients"]["with_allergies"]), (1, 1))
+        self.assertEqual(data["inventory"]["low_stock"], 1)
+        self.assertEqual([alert["medicine_name"] for alert in data["inventory"]["alerts"]], ["Ibuprofen"])
+
+    def test_sections_follow_the_role(self):
+        nurse = User.objects.create(email="nurse@clinicare.test", role="nurse")
+        self.assertEqual(list(self.get(nurse))[2:], ["patients", "inventory"])
+        data = self.get(self.user)
+        self.assertEqual(data["users"]["by_role"]["doctor"], 2)
+        self.assertEqual((data["patients"]["total"], data["appointments"]["today"]), (2, 3))
+
+    def test_cached_per_user(self):
+        self.assertEqual(self.get(self.doctor)["appointments"]["today"], 2)
+        other = User.objects.get(email="other@clinicare.test")
+        self.assertEqual(self.get(other)["appointments"]["today"], 1)
+
+    def test_stats_endpoints(self):
+        self.assertEqual(self.client.get("/api/patients/stats/").json()["total"], 2)
+        response = self.client.get("/api/appointments/stats/", {"doctor_id": self.doctor.pk})
+        self.assertEqual(response.json()["next_7_days"], 1)
+        self.assertEqual(self.client.get("/api/inventory/stats/").json()["items"], 1)
+
+
+class ProvisioningTests(APITestCase):
+    roster = [
+        {"email": "ada@Clinic.TEST", "role": "doctor", "first_name": "Ada", "password": "s3cret-pass"},
+        {"email": "ben@clinic.test", "role": "nurse"},
+        {"email": "not-an-email", "role": "nurse"},
+        {"email": "ada@clinic.test", "role": "staff"},
+        {"email": "admin@clinicare.test", "role": "staff"},
+    ]
+
+    def test_valid_rows_are_created_and_failures_reported(self):
+        response = self.client.post("/api/users/provision/", self.roster, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([user["email"] for user in response.data["created"]], ["ada@clinic.test", "ben@clinic.test"])
+        self.assertEqual([failure["row"] for failure in response.data["failed"]], [3, 4, 5])
+        self.assertTrue(User.objects.get(email="ada@clinic.test").check_password("s3cret-pass"))
+        self.assertFalse(User.objects.get(email="ben@clinic.test").has_usable_password())
+        report = self.client.get("/api/reports/users/").json()
+        self.assertEqual(sorted((row["role"], row["count"]) for row in report),
+                         [("admin", 1), ("doctor", 1), ("nurse", 1)])
+
+    def test_csv_upload(self):
+        roster = SimpleUploadedFile(
+            "roster.csv", b"email,role,first_name,last_name,password\ncara@clinic.test,staff,Cara,Diaz,pw-123456\n"
+        )
+        response = self.client.post("/api/users/provision/", {"roster": roster}, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(User.objects.get(email="cara@clinic.test").last_name, "Diaz")
+
+    def test_admins_only(self):
+        self.client.force_authenticate(User.objects.create(email="nurse@clinicare.test", role="nurse"))
+        response = self.client.post("/api/users/provision/", self.roster[:1], format="json")
+        self.assertEqual(response.status_code, 403)
+
+    def test_passwords_hash_in_a_process_pool(self):
+        from .hashing import hash_passwords
+
+        from . import hashing
+
+        hashes = hash_passwords([f"password-{i}" for i in range(8)] + [None], workers=2)
+        user = User(email="pool@clinic.test")
+        user.password = hashes[3]
+        self.assertTrue(user.check_password("password-3"))
+        self.assertTrue(hashes[-1].startswith("!"))
+        pool = hashing.get_pool()
+        hash_passwords([f"password-{i}" for i in range(8)], workers=2)
+        self.assertIs(hashing.get_pool(), pool)
+
+    def test_requests_use_a_capped_share_of_the_pool(self):
+        from . import provisioning
+
+        with mock.patch("api.provisioning.hash_passwords", side_effect=lambda passwords, workers: [
+            "!" for _ in passwords
+        ]) as hash_passwords:
+            self.client.post("/api/users/provision/", self.roster[:1], format="json")
+        self.assertEqual(hash_passwords.call_args.args[1], provisioning.API_WORKERS)
+
+    def test_create_hashes_the_password(self):
+        response = self.client.post(
+            "/api/users/", {"email": "dan@clinic.test", "role": "staff", "password": "pw-654321"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(email="dan@clinic.test").check_password("pw-654321"))
+
+
+class ReportRollupTests(APITestCase):
+    reports = ["/api/reports/users/", "/api/reports/appointments/", "/api/reports/prescriptions/"]
+
+    def fetch(self):
+        return {url: self.client.get(url).json() for url in self.reports}
+
+    def test_incremental_rollups_match_a_rebuild(self):
+        from . import rollups
+
+        doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+        nurse = User.objects.create(email="nurse@clinicare.test", role="nurse")
+        jane, john = Patient.objects.create(name="Jane"), Patient.objects.create(name="John")
+        first = Appointment.objects.create(patient=jane, doctor=doctor, date="2025-01-10", time="09:00")
+        Appointment.objects.create(patient=john, doctor=doctor, date="2025-02-10", time="09:00")
+        first.status = "completed"
+        first.save()
+        first.date = datetime.date(2025, 2, 11)
+        first.save()
+
+        amox = Prescription.objects.create(
+            patient=jane, doctor=doctor, medication="Amoxicillin", dosage="500mg", instructions="Daily"
+        )
+        Prescription.objects.create(
+            patient=jane, doctor=doctor, medication="Amoxicillin", dosage="250mg", instructions="Daily"
+        )
+        Prescription.objects.create(
+            patient=john, doctor=doctor, medication="Ibuprofen", dosage="200mg", instructions="As needed"
+        )
+        amox.is_active = False
+        amox.save()
+        nurse.role = "staff"
+        nurse.save()
+        john.delete()
+
+        incremental = self.fetch()
+        self.assertEqual(incremental["/api/reports/prescriptions/"], [
+            {"medication": "Amoxicillin", "count": 2, "patients": 1, "active": 1},
+        ])
+        self.assertEqual(incremental["/api/reports/appointments/"], [
+            {"month": "2025-02-01", "status_group": "Completed", "count": 1},
+        ])
+
+        rollups.rebuild()
+        cache.clear()
+        self.assertEqual(self.fetch(), incremental)
+
+    def test_report_reads_a_constant_number_of_queries(self):
+        for day in range(1, 20):
+            Appointment.objects.create(patient=Patient.objects.create(name=f"P{day}"), date=f"2025-01-{day:02d}")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/api/reports/appointments/")
+        self.assertEqual(len(context.captured_queries), 1)
+
+
+class InventoryAlertTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.today = datetime.date.today()
+        self.item = self.make("Amoxicillin", quantity=50, days=200)
+
+    def make(self, name, quantity, days):
+        return Inventory.objects.create(
+            medicine_name=name, quantity=quantity, threshold=10,
+            expiry_date=self.today + datetime.timedelta(days=days),
+        )
+
+    def open_alerts(self):
+        return set(InventoryAlert.objects.filter(resolved_at=None).values_list("item__medicine_name", "kind"))
+
+    def names(self, path, params=None):
+        response = self.client.get(path, params or {})
+        self.assertEqual(response.status_code, 200)
+        return [row["medicine_name"] for row in response.json()]
+
+    def test_views_filter_by_stock_and_expiry(self):
+        self.make("Ibuprofen", quantity=5, days=10)
+        self.make("Paracetamol", quantity=30, days=-3)
+        self.make("Salbutamol", quantity=30, days=45)
+        self.assertEqual(self.names("/api/inventory/low-stock/"), ["Ibuprofen"])
+        self.assertEqual(self.names("/api/inventory/expired/"), ["Paracetamol"])
+        self.assertEqual(self.names("/api/inventory/expiring/"), ["Ibuprofen"])
+        self.assertEqual(self.names("/api/inventory/expiring/", {"days": 60}), ["Ibuprofen", "Salbutamol"])
+        self.assertEqual(self.client.get("/api/inventory/expiring/", {"days": "soon"}).status_code, 400)
+
+    def test_saves_raise_and_resolve_alerts(self):
+        self.assertEqual(self.open_alerts(), set())
+        self.item.quantity = 4
+        self.item.expiry_date = self.today + datetime.timedelta(days=5)
+        self.item.save()
+        self.assertEqual(self.open_alerts(), {("Amoxicillin", "low_stock"), ("Amoxicillin", "expiring")})
+        before = InventoryAlert.objects.latest("raised_at").raised_at
+
+        response = self.client.post(
+            "/api/stock-movements/", {"item": self.item.pk, "kind": "receipt", "quantity": 36}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.open_alerts(), {("Amoxicillin", "expiring")})
+        self.assertEqual(
+            [row["kind"] for row in self.client.get("/api/inventory-alerts/").json()], ["expiring"]
+        )
+        changes = self.client.get("/api/inventory-alerts/", {"since": before.isoformat()}).json()
+        self.assertEqual([(row["kind"], row["resolved_at"] is not None) for row in changes], [("low_stock", True)])
+        changes = self.client.get(
+            "/api/inventory-alerts/", {"since": (before - datetime.timedelta(seconds=1)).isoformat()}
+        ).json()
+        self.assertEqual({row["kind"] for row in changes}, {"low_stock", "expiring"})
+        self.assertEqual(
+            self.client.get("/api/inventory-alerts/summary/").json(),
+            {"low_stock": 0, "expiring": 1, "expired": 0},
+        )
+
+    def test_bulk_writes_evaluate_alerts(self):
+        response = self.client.patch(
+            "/api/inventory/bulk/", [{"id": self.item.pk, "threshold": 60}], format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.open_alerts(), {("Amoxicillin", "low_stock")})
+
+    def test_command_only_examines_items_crossing_a_boundary(self):
+        self.make("Ibuprofen", quantity=30, days=2)
+        self.make("Salbutamol", quantity=30, days=32)
+        call_command("inventory_alerts", "--date", self.today.isoformat(), stdout=io.StringIO())
+        self.assertEqual(InventoryAlertRun.objects.get().examined, 3)
+        self.assertEqual(self.open_alerts(), {("Ibuprofen", "expiring")})
+
+        out = io.StringIO()
+        later = self.today + datetime.timedelta(days=3)
+        call_command("inventory_alerts", "--date", later.isoformat(), stdout=out)
+        run = InventoryAlertRun.objects.first()
+        self.assertEqual((run.examined, run.raised, run.resolved), (2, 2, 1))
+        self.assertEqual(self.open_alerts(), {("Ibuprofen", "expired"), ("Salbutamol", "expiring")})
+        self.assertIn("2 alerts raised, 1 resolved", out.getvalue())
+
+
+class StockLedgerTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        response = self.client.post(
+            "/api/inventory/", {"medicine_name": "Paracetamol", "quantity": 20, "expiry_date": "2099-01-01"},
+            format="json",
+        )
+        self.item = Inventory.objects.get(pk=response.json()["id"])
+
+    def move(self, kind, quantity):
+        return self.client.post(
+            "/api/stock-movements/", {"item": self.item.pk, "kind": kind, "quantity": quantity}, format="json"
+        )
+
+    def test_movements_apply_to_the_quantity(self):
+        self.assertEqual(self.move("dispense", 5).json()["balance"], 15)
+        self.assertEqual(self.move("receipt", 10).json()["balance"], 25)
+        self.assertEqual(self.move("adjustment", -3).json()["change"], -3)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 22)
+        self.assertEqual(sum(StockMovement.objects.values_list("change", flat=True)), 22)
+        history = self.client.get("/api/stock-movements/", {"item": self.item.pk}).json()
+        self.assertEqual([row["kind"] for row in history], ["adjustment", "receipt", "dispense", "receipt"])
+        self.assertEqual(history[-1]["user"], self.user.pk)
+
+    def test_overdrawn_and_invalid_movements_are_rejected(self):
+        self.assertEqual(self.move("dispense", 21).status_code, 409)
+        self.assertEqual(self.move("dispense", -2).status_code, 400)
+        self.assertEqual(self.move("adjustment", 0).status_code, 400)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 20)
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+    def test_quantity_cannot_be_overwritten(self):
+        response = self.client.patch(f"/api/inventory/{self.item.pk}/", {"quantity": 99}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("quantity", response.json())
+        response = self.client.patch(
+            f"/api/inventory/{self.item.pk}/", {"quantity": 20, "threshold": 5}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_updates_do_not_write_back_a_stale_quantity(self):
+        from . import stock
+        from .serializers import InventorySerializer
+
+        stale = Inventory.objects.get(pk=self.item.pk)
+        stock.move(self.item.pk, "dispense", 4)
+        serializer = InventorySerializer(stale, data={"quantity": 20, "threshold": 5}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        serializer.save()
+        stale.threshold = 7
+        stock.save_details(stale)
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.threshold), (16, 7))
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                "/api/inventory/bulk/", [{"id": self.item.pk, "quantity": 16, "threshold": 3}], format="json"
+            )
+        self.assertEqual(response.json()[0]["quantity"], 16)
+        updates = [query["sql"] for query in context.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertTrue(updates)
+        self.assertFalse(any('"quantity"' in sql for sql in updates))
+
+    def test_history_filters_are_validated(self):
+        self.move("dispense", 2)
+        history = self.client.get("/api/stock-movements/", {"item": self.item.pk, "kind": "dispense"}).json()
+        self.assertEqual([row["change"] for row in history], [-2])
+        for params in ({"item": "abc"}, {"item": "-1"}, {"kind": "theft"}):
+            self.assertEqual(self.client.get("/api/stock-movements/", params).status_code, 400, params)
+
+    def test_consumption_projects_days_left(self):
+        self.move("dispense", 6)
+        idle = Inventory.objects.create(medicine_name="Ibuprofen", quantity=5, expiry_date="2099-01-01")
+        rows = self.client.get("/api/inventory/consumption/", {"days": 3}).json()
+        self.assertEqual([row["id"] for row in rows], [self.item.pk, idle.pk])
+        self.assertEqual((rows[0]["dispensed"], rows[0]["daily_use"], rows[0]["days_left"]), (6, 2.0, 7.0))
+        self.assertIsNone(rows[1]["days_left"])
+
+
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = Patient.objects.create(name="Jane Doe")
+
+    def test_repeat_request_is_served_without_queries(self):
+        first = self.client.get("/api/patients/")
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get("/api/patients/")
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(second.content, first.content)
+
+    def test_write_invalidates_dependent_lists(self):
+        Appointment.objects.create(patient=self.patient, date="2025-01-01")
+        self.client.get("/api/appointments/")
+        self.patient.name = "Jane Smith"
+        self.patient.save()
+        self.assertEqual(self.client.get("/api/appointments/").json()[0]["patient_name"], "Jane Smith")
+
+    def test_unrelated_write_keeps_entry(self):
+        self.client.get("/api/patients/")
+        Inventory.objects.create(medicine_name="Paracetamol", quantity=5, expiry_date="2026-01-01")
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/api/patients/")
+        self.assertEqual(len(context.captured_queries), 0)
+
+    def test_etag_revalidation(self):
+        etag = self.client.get("/api/patients/")["ETag"]
+        response = self.client.get("/api/patients/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        Patient.objects.create(name="John Doe")
+        response = self.client.get("/api/patients/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_entries_are_separated_by_role(self):
+        nurse = User.objects.create(email="nurse@clinicare.test", role="nurse")
+        self.client.get("/api/patients/")
+        self.client.force_authenticate(nurse)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get("/api/patients/")
+        self.assertGreater(len(context.captured_queries), 0)
+
+
+class BulkEndpointTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = User.objects.create(email="doctor@clinicare.test", role="doctor")
+
+    def test_inventory_bulk_create_update_delete(self):
+        items = [
+            {"medicine_name": f"Medicine {i}", "quantity": i, "expiry_date": "2026-01-01"} for i in range(5)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post("/api/inventory/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertLess(len(context.captured_queries), 10)
+        ids = [row["id"] for row in response.json()]
+        self.assertEqual(Inventory.objects.count(), 5)
+
+        response = self.client.patch(
+            "/api/inventory/bulk/", [{"id": pk, "threshold": 100} for pk in ids], format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(Inventory.objects.values_list("threshold", flat=True)), {100})
+
+        response = self.client.delete("/api/inventory/bulk/", {"ids": ids[:2]}, format="json")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(Inventory.objects.count(), 3)
+
+    def test_invalid_item_rejects_the_whole_batch(self):
+        items = [
+            {"medicine_name": "Paracetamol", "quantity": 5, "expiry_date": "2026-01-01"},
+            {"medicine_name": "Ibuprofen", "quantity": -1, "expiry_date": "2026-01-01"},
+        ]
+        response = self.client.post("/api/inventory/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual(errors[0], {})
+        self.assertIn("quantity", errors[1])
+        self.assertEqual(Inventory.objects.count(), 0)
+
+    def test_delete_ids_must_be_integers(self):
+        item = Inventory.objects.create(medicine_name="Aspirin", quantity=5, expiry_date="2026-01-01")
+        response = self.client.delete("/api/inventory/bulk/", {"ids": [True, "1", item.pk]}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [
+            {"id": ["Expected an integer id."]}, {"id": ["Expected an integer id."]}, {},
+        ])
+        self.assertTrue(Inventory.objects.filter(pk=item.pk).exists())
+
+    def test_update_ids_must_be_integers(self):
+        item = Inventory.objects.create(medicine_name="Aspirin", quantity=5, expiry_date="2026-01-01")
+        items = [{"id": item.pk, "threshold": 1}, {"id": [item.pk]}, {"id": {"pk": 1}}, {"id": True}, {"id": 0}]
+        response = self.client.patch("/api/inventory/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [
+            {}, *[{"id": ["Expected an integer id."]}] * 3, {"id": ["Not found."]},
+        ])
+
+    def test_appointment_bulk_update_reports_slot_conflicts(self):
+        from django.db import IntegrityError
+
+        patient = Patient.objects.create(name="Jane Doe")
+        first, second, third = [
+            Appointment.objects.create(patient=patient, doctor=self.doctor, date="2025-03-03", time=time)
+            for time in ("09:00", "09:30", "10:00")
+        ]
+        response = self.client.patch("/api/appointments/bulk/", [
+            {"id": first.pk, "notes": "Same slot"},
+            {"id": second.pk, "time": "09:00"},
+            {"id": third.pk, "time": "09:30", "status": "cancelled"},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [
+            {}, {"time": ["This doctor already has an appointment at that time."]}, {},
+        ])
+
+        response = self.client.patch("/api/appointments/bulk/", [
+            {"id": first.pk, "time": "11:00"}, {"id": second.pk, "time": "09:00"},
+        ], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(Appointment.objects.values_list("time", flat=True)),
+            {datetime.time(11), datetime.time(9), datetime.time(10)},
+        )
+
+        with mock.patch("django.db.models.QuerySet.bulk_update", side_effect=IntegrityError("NOT NULL")):
+            with self.assertRaises(IntegrityError):
+                self.client.patch("/api/appointments/bulk/", [{"id": first.pk, "notes": "x"}], format="json")
+
+    def test_appointment_bulk_create_resolves_patients(self):
+        existing = Patient.objects.create(name="Jane Doe")
+        items = [
+            {"date": "2025-03-03", "time": "09:00", "patient_name": "Jane Doe", "doctor": self.doctor.id},
+            {"date": "2025-03-03", "time": "09:30", "patient_name": "John Smith", "doctor": self.doctor.id},
+            {"date": "2025-03-03", "time": "10:00", "patient_name": "John Smith", "age": 40},
+        ]
+        response = self.client.post("/api/appointments/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 201)
+        rows = response.json()
+        self.assertEqual(rows[0]["patient"], existing.id)
+        self.assertEqual(rows[1]["patient"], rows[2]["patient"])
+        self.assertEqual(rows[1]["doctor_name"], "doctor@clinicare.test")
+        self.assertEqual(Patient.objects.count(), 2)
+
+        report = self.client.get("/api/reports/appointments/").json()
+        self.assertEqual(report, [{"month": "2025-03-01", "status_group": "Scheduled", "count": 3}])
+
+    def test_appointment_bulk_create_reports_slot_conflicts(self):
+        Appointment.objects.create(
+            patient=Patient.objects.create(name="Jane Doe"), doctor=self.doctor, date="2025-03-03", time="09:00"
+        )
+        items = [
+            {"date": "2025-03-03", "time": "09:00", "patient_name": "A", "doctor": self.doctor.id},
+            {"date": "2025-03-03", "time": "10:00", "patient_name": "B", "doctor": self.doctor.id},
+            {"date": "2025-03-03", "time": "10:00", "patient_name": "C", "doctor": self.doctor.id},
+            {"date": "2025-03-03", "time": "11:00", "patient_name": "D", "doctor": 999999},
+        ]
+        response = self.client.post("/api/appointments/bulk/", items, format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertIn("time", errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertIn("time", errors[2])
+        self.assertIn("doctor", errors[3])
+        self.assertEqual(Appointment.objects.count(), 1)
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.patient = Patient.objects.create(name="Jane Doe")
+        for day in (1, 2, 3):
+            Appointment.objects.create(patient=self.patient, date=datetime.date(2025, 4, day), time="09:00")
+        Inventory.objects.create(
+            medicine_name="Aspirin", quantity=2, threshold=5, expiry_date=datetime.date(2026, 1, 1)
+        )
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_list_export_streams_csv_with_list_filters(self):
+        response = self.client.get("/api/appointments/export/", {"date": "2025-04-02"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('filename="appointments.csv"', response["Content-Disposition"])
+        header, row = self.read(response).splitlines()
+        self.assertIn("patient_name", header.split(","))
+        record = dict(zip(header.split(","), row.split(",")))
+        self.assertEqual(record["date"], "2025-04-02")
+        self.assertEqual(record["patient_name"], "Jane Doe")
+        self.assertEqual(record["doctor"], "")
+
+    def test_ndjson_export_includes_annotated_properties(self):
+        response = self.client.get("/api/inventory/export/", {"output": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = self.read(response).splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record["medicine_name"], "Aspirin")
+        self.assertIs(record["needs_restock"], True)
+
+    def test_write_only_fields_are_not_exported(self):
+        header = self.read(self.client.get("/api/users/export/")).splitlines()[0]
+        self.assertEqual(header, "id,email,role,first_name,last_name")
+
+    def test_report_export(self):
+        response = self.client.get("/api/reports/export/", {"report": "appointments"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.read(response).splitlines(), ["month,status_group,count", "2025-04-01,Scheduled,3"]
+        )
+        self.assertEqual(self.client.get("/api/reports/export/", {"report": "nope"}).status_code, 400)
+        self.assertEqual(
+            self.client.get("/api/reports/export/", {"report": "users", "output": "xml"}).status_code, 400
+        )
+
+
+class WebSocket:
+    """Drives ``updates_socket`` the way an ASGI server would."""
+
+    def __init__(self, query_string=b""):
+        self.inbound = asyncio.Queue()
+        self.outbound = asyncio.Queue()
+        self.inbound.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.ensure_future(
+            updates_socket({"type": "websocket", "path": "/ws/updates/", "query_string": query_string},
+                           self.inbound.get, self.outbound.put)
+        )
+
+    async def send(self, message):
+        await self.inbound.put({"type": "websocket.receive", "text": json.dumps(message)})
+
+    async def receive(self):
+        event = await asyncio.wait_for(self.outbound.get(), timeout=5)
+        return json.loads(event["text"]) if event["type"] == "websocket.send" else event
+
+    async def close(self):
+        await self.inbound.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(self.task, timeout=5)
+
+
+class RealtimeTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(email="staff@clinicare.test", password="pass", role="staff")
+        self.patient = Patient.objects.create(name="Jane Doe")
+
+    def write(self, func):
+        def run():
+            with self.captureOnCommitCallbacks(execute=True):
+                func()
+        return sync_to_async(run)()
+
+    def test_subscriber_receives_deltas_for_its_events(self):
+        async def scenario():
+            socket = WebSocket()
+            self.assertEqual((await socket.receive())["type"], "websocket.accept")
+            await socket.send({"type": "subscribe", "token": str(AccessToken.for_user(self.user)),
+                               "events": ["appointment"]})
+            self.assertEqual(await socket.receive(), {"type": "subscribed", "events": ["appointment"]})
+
+            await self.write(lambda: Inventory.objects.create(
+                medicine_name="Aspirin", quantity=2, expiry_date=datetime.date(2026, 1, 1)))
+            await self.write(lambda: Appointment.objects.create(
+                patient=self.patient, date=datetime.date(2025, 5, 1), time="09:00"))
+            message = await socket.receive()
+            self.assertEqual(message["type"], "appointment.created")
+            self.assertEqual(message["data"]["patient"], self.patient.id)
+            self.assertEqual(message["data"]["date"], "2025-05-01")
+
+            await self.write(lambda: Appointment.objects.all().delete())
+            self.assertEqual((await socket.receive())["type"], "appointment.deleted")
+            await socket.close()
+
+        async_to_sync(scenario)()
+
+    def test_events_are_filtered_by_role(self):
+        async def scenario():
+            socket = WebSocket(f"token={AccessToken.for_user(self.staff)}".encode())
+            await socket.receive()
+            await socket.send({"type": "subscribe", "events": ["*"]})
+            await socket.receive()
+
+            doctor = await sync_to_async(User.objects.create)(email="doctor@clinicare.test", role="doctor")
+            await self.write(lambda: Prescription.objects.create(
+                patient=self.patient, doctor=doctor, medication="Aspirin", dosage="1", instructions=""))
+            await self.write(lambda: Patient.objects.filter(pk=self.patient.pk).first().save())
+            self.assertEqual((await socket.receive())["type"], "patient.updated")
+            await socket.close()
+
+        async_to_sync(scenario)()
+
+    def test_redis_backend_subscribes_on_attach_and_reconnects(self):
+        import queue
+        import sys
+        import types
+
+        from . import realtime
+
+        published, listens = queue.Queue(), []
+
+        class PubSub:
+            def __init__(self):
+                self.failed = len(listens) == 0
+                listens.append(self)
+
+            def subscribe(self, channel):
+                self.channel = channel
+
+            def listen(self):
+                if self.failed:
+                    raise ConnectionError("connection dropped")
+                while True:
+                    yield {"data": published.get()}
+
+            def close(self):
+                pass
+
+        client = mock.Mock(pubsub=lambda **kwargs: PubSub())
+        fake_redis = types.SimpleNamespace(Redis=mock.Mock(from_url=lambda url: client))
+        hub = realtime.Hub()
+        subscriber = mock.Mock(wants=lambda event_type: True)
+        with mock.patch.dict(sys.modules, redis=fake_redis), \
+                mock.patch.object(realtime, "RECONNECT_SECONDS", (0,)), \
+                self.assertLogs("api.realtime", "ERROR"), \
+                override_settings(REALTIME_BACKEND={"BACKEND": "api.realtime.RedisBackend"}):
+            hub.attach(subscriber)
+            published.put(json.dumps({"type": "patient.updated", "id": 1}))
+            for _ in range(100):
+                if subscriber.loop.call_soon_threadsafe.called:
+                    break
+                time.sleep(0.01)
+        self.assertEqual(len(listens), 2)
+        self.assertEqual(listens[1].channel, "clinicare:updates")
+        offer, text = subscriber.loop.call_soon_threadsafe.call_args.args
+        self.assertEqual(json.loads(text), {"type": "patient.updated", "id": 1})
+
+    def test_publishing_neither_subscribes_nor_fails_the_write(self):
+        import sys
+        import types
+
+        from . import realtime
+
+        client = mock.Mock()
+        client.publish.side_effect = ConnectionError("broker down")
+        fake_redis = types.SimpleNamespace(Redis=mock.Mock(from_url=lambda url: client))
+        with mock.patch.dict(sys.modules, redis=fake_redis), \
+                mock.patch.object(realtime, "hub", realtime.Hub()), \
+                self.assertLogs("api.realtime", "ERROR"), \
+                override_settings(REALTIME_BACKEND={"BACKEND": "api.realtime.RedisBackend"}):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post("/api/patients/", {"name": "John Roe"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        client.publish.assert_called_once()
+        client.pubsub.assert_not_called()
+
+    def test_subscription_requires_a_valid_token(self):
+        async def scenario():
+            socket = WebSocket()
+            await socket.receive()
+            await socket.send({"type": "subscribe", "token": "bogus", "events": ["appointment"]})
+            self.assertEqual((await socket.receive())["type"], "error")
+            self.assertEqual(await socket.receive(), {"type": "websocket.close", "code": 4401})
+            await asyncio.wait_for(socket.task, timeout=5)
+
+        async_to_sync(scenario)()
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_reads_do_not_query_for_the_user(self):
+        self.assertEqual(self.client.get("/api/users/").status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/users/").status_code, 200)
+
+    def test_writes_load_the_user(self):
+        self.client.get("/api/users/")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post("/api/inventory/", {
+                "medicine_name": "Aspirin", "quantity": 5, "expiry_date": "2026-01-01"
+            }, format="json")
+        self.assertTrue(any('"api_user"' in query["sql"] for query in queries.captured_queries))
+
+    def test_deactivation_and_role_changes_take_effect_immediately(self):
+        self.client.get("/api/users/")
+        self.user.role = "nurse"
+        self.user.save()
+        self.assertEqual(self.client.get("/api/users/").status_code, 200)
+        self.assertEqual(get_user_cache().get(self.user.id).role, "nurse")
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/users/").status_code, 401)
+
+
+def throttle_rates(**rates):
+    return override_settings(THROTTLE={**settings.THROTTLE, "RATES": {**settings.THROTTLE["RATES"], **rates}})
+
+
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user.set_password("right-password")
+        self.user.save()
+        self.anonymous = APIClient()
+
+    def login(self, email="admin@clinicare.test", password="wrong", address="10.0.0.1"):
+        return self.anonymous.post(
+            "/api/token/", {"email": email, "password": password}, format="json", REMOTE_ADDR=address
+        )
+
+    @throttle_rates(auth_account="2/min")
+    def test_logins_per_account_are_rejected_before_hashing(self):
+        self.assertEqual(self.login(address="10.0.0.1").status_code, 401)
+        self.assertEqual(self.login(address="10.0.0.2").status_code, 401)
+        with mock.patch("django.contrib.auth.hashers.PBKDF2PasswordHasher.verify") as verify:
+            response = self.login(password="right-password", address="10.0.0.3")
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response["Retry-After"]) > 0)
+        verify.assert_not_called()
+        self.assertEqual(self.login(email="other@clinicare.test").status_code, 401)
+
+    @throttle_rates(auth_ip="2/min")
+    def test_auth_endpoints_share_a_budget_per_address(self):
+        self.assertEqual(self.login(email="a@clinicare.test").status_code, 401)
+        self.assertEqual(self.login(email="b@clinicare.test").status_code, 401)
+        response = self.anonymous.post("/api/token/refresh/", {"refresh": "x"}, REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.login(email="c@clinicare.test", address="10.0.0.9").status_code, 401)
+
+    @throttle_rates(auth_ip="2/min")
+    def test_forwarded_for_headers_do_not_pick_the_address(self):
+        def login(forwarded):
+            return self.anonymous.post(
+                "/api/token/", {"email": f"{forwarded}@clinicare.test", "password": "wrong"}, format="json",
+                REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=forwarded,
+            )
+
+        self.assertEqual([login(f"203.0.113.{i}").status_code for i in range(3)], [401, 401, 429])
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}):
+            self.assertEqual(login("198.51.100.7, 203.0.113.9").status_code, 401)
+            self.assertEqual(login("198.51.100.8, 203.0.113.9").status_code, 401)
+            self.assertEqual(login("198.51.100.9, 203.0.113.9").status_code, 429)
+
+    @throttle_rates(read="2/min", write=None)
+    def test_reads_and_writes_have_separate_budgets(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get("/api/inventory/").status_code, 200)
+        self.assertEqual(self.client.get("/api/patients/").status_code, 429)
+        response = self.client.post(
+            "/api/inventory/", {"medicine_name": "Aspirin", "quantity": 5, "expiry_date": "2026-01-01"}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_buckets_refill_over_time(self):
+        capacity, refill = throttling.parse_rate("2/min")
+        for store in (throttling.MemoryStore(), throttling.CacheStore()):
+            self.assertEqual([store.consume("k", capacity, refill, now=100.0) for _ in range(2)], [0, 0])
+            self.assertAlmostEqual(store.consume("k", capacity, refill, now=100.0), 30.0)
+            self.assertEqual(store.consume("k", capacity, refill, now=130.0), 0)
+
+    def test_disabled(self):
+        with throttle_rates(read="1/min"), throttling.unthrottled():
+            for _ in range(3):
+                self.assertEqual(self.client.get("/api/inventory/").status_code, 200)
+
+
+class AsyncEndpointTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.doctor = User.objects.create_user(email="doctor@clinicare.test", password="pass", role="doctor")
+        patient = Patient.objects.create(name="Jane Doe")
+        for slot in ("09:00", "10:00", "11:30"):
+            Appointment.objects.create(patient=patient, doctor=self.doctor, date=datetime.date(2025, 6, 2), time=slot)
+
+    def assertSameJSON(self, sync_path, async_path, params=None):
+        expected = self.client.get(sync_path, params)
+        actual = self.client.get(async_path, params)
+        self.assertEqual(actual.status_code, expected.status_code)
+        content = actual.content if not actual.streaming else async_to_sync(self.collect)(actual)
+        # Pagination links point back at the endpoint that served them.
+        self.assertEqual(json.loads(content.decode().replace("/api/async/", "/api/")), expected.json())
+
+    async def collect(self, response):
+        return b"".join([chunk async for chunk in response.streaming_content])
+
+    def test_responses_match_the_sync_views(self):
+        self.assertSameJSON("/api/appointments/", "/api/async/appointments/", {"date": "2025-06-02"})
+        self.assertSameJSON("/api/appointments/", "/api/async/appointments/", {"date": "2020-01-01"})
+        self.assertSameJSON("/api/appointments/", "/api/async/appointments/", {"page_size": 2})
+        self.assertSameJSON("/api/patients/search/", "/api/async/patients/search/", {"q": "jane"})
+        self.assertSameJSON(
+            f"/api/doctors/{self.doctor.id}/availability/",
+            f"/api/async/doctors/{self.doctor.id}/availability/", {"date": "2025-06-02"},
+        )
+        self.assertSameJSON(
+            "/api/doctors/availability/", "/api/async/doctors/availability/",
+            {"from": "2025-06-02", "to": "2025-06-03"},
+        )
+        self.assertSameJSON(
+            "/api/doctors/availability/", "/api/async/doctors/availability/", {"from": "2025-06-03", "to": "2025-06-02"}
+        )
+        for name in ("users", "inventory", "prescriptions", "appointments"):
+            self.assertSameJSON(f"/api/reports/{name}/", f"/api/async/reports/{name}/")
+
+    def test_requires_a_token(self):
+        self.assertEqual(APIClient().get("/api/async/appointments/").status_code, 401)
+        self.assertEqual(self.client.post("/api/async/appointments/").status_code, 405)
+        self.assertEqual(self.client.get("/api/async/reports/nope/").status_code, 404)
+
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        Inventory.objects.create(medicine_name="Aspirin", quantity=5, expiry_date="2026-01-01")
+
+    def test_requests_are_recorded_per_route(self):
+        self.client.get("/api/inventory/")
+        labels = ("inventory-list", "GET")
+        self.assertEqual(registry.requests.values[(*labels, "200")], 1)
+        self.assertGreater(registry.queries.values[labels][-1], 0)
+        self.assertGreater(registry.serialize_time.values[labels][-1], 0)
+        self.assertGreater(registry.size.values[labels][-1], 0)
+
+        body = self.client.get("/api/metrics/", REMOTE_ADDR="127.0.0.1").content.decode()
+        self.assertIn("# TYPE clinicare_http_request_duration_seconds histogram", body)
+        self.assertIn('clinicare_http_requests_total{view="inventory-list",method="GET",status="200"} 1', body)
+        self.assertIn('clinicare_http_db_queries_count{view="inventory-list",method="GET"} 1', body)
+
+    def test_endpoint_is_restricted(self):
+        self.assertEqual(self.client.get("/api/metrics/", REMOTE_ADDR="10.0.0.1").status_code, 403)
+        with override_settings(METRICS_TOKEN="secret"):
+            self.assertEqual(self.client.get("/api/metrics/").status_code, 403)
+            response = self.client.get("/api/metrics/", REMOTE_ADDR="10.0.0.1", HTTP_AUTHORIZATION="Bearer secret")
+            self.assertEqual(response.status_code, 200)
+
+    @override_settings(SLOW_REQUEST_SECONDS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs("api.slow_requests", "WARNING") as logs:
+            self.client.get("/api/inventory/")
+        self.assertIn("GET /api/inventory/ -> 200", logs.output[0])
+        self.assertIn('FROM "api_inventory"', logs.output[0])
+        self.assertEqual(registry.slow.values[("inventory-list", "GET")], 1)
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_connections_apply_profile_pragmas(self):
+        pragmas = connection.settings_dict.get("PRAGMAS")
+        if connection.vendor != "sqlite" or not pragmas:
+            self.skipTest("profile has no SQLite pragmas")
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], pragmas["busy_timeout"])
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+
+
+class BenchmarkCommandTests(TestCase):
+    def seed(self, *args):
+        call_command(
+            "seed_clinic", "--doctors", "2", "--patients", "30", "--years", "1", "--daily-appointments", "2",
+            "--inventory", "10", *args, stdout=io.StringIO(),
+        )
+
+    def test_seeds_and_clears_synthetic_data(self):
+        self.seed()
+        self.assertEqual(User.objects.filter(role="doctor").count(), 2)
+        self.assertEqual(Patient.objects.count(), 30)
+        self.assertEqual(Inventory.objects.count(), 10)
+        self.assertEqual(
+            sum(MonthlyAppointmentRollup.objects.values_list("count", flat=True)), Appointment.objects.count()
+        )
+        self.assertTrue(Prescription.objects.exists())
+
+        real = Patient.objects.create(name="Real Patient")
+        self.seed("--clear", "--patients", "5")
+        self.assertEqual(Patient.objects.count(), 6)
+        self.assertTrue(Patient.objects.filter(pk=real.pk).exists())
+
+    def test_runner_saves_and_compares_results(self):
+        self.seed()
+        with tempfile.TemporaryDirectory() as scratch:
+            baseline = Path(scratch) / "baseline.json"
+            options = {"requests": 2, "warmup": 0, "stdout": io.StringIO()}
+            call_command("benchmark_api", "--baseline", str(baseline), "--save-baseline", **options)
+            endpoints = json.loads(baseline.read_text())["endpoints"]
+            for name in ("patients list", "patients search", "availability bulk", "report appointments"):
+                self.assertIn(name, endpoints)
+            self.assertEqual(endpoints["inventory detail"]["queries"], 1)
+
+            out = io.StringIO()
+            call_command("benchmark_api", "--baseline", str(baseline), "--only", "report", requests=2, stdout=out)
+            self.assertIn("Compared with the baseline", out.getvalue())
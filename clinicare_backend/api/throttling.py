@@ -0,0 +1,171 @@
+"""
+Token-bucket request throttling.
+
+Each budget is a bucket of ``capacity`` tokens refilled at ``capacity`` per
+period (``settings.THROTTLE["RATES"]``, e.g. ``"10/min"``); a request takes
+one token or is rejected with 429 and a ``Retry-After``. DRF checks throttles
+in ``APIView.initial``, after the cheap token authentication and before the
+handler runs, so a rejected login never reaches the password hash.
+
+Scopes: ``auth_ip`` and ``auth_account`` (the login's email) guard the token
+endpoints, so neither one address nor a flood aimed at one account can occupy
+the workers with PBKDF2; ``read`` and ``write`` give every user (or anonymous
+address) separate budgets for safe and unsafe methods elsewhere. Addresses
+come from ``REMOTE_ADDR``, or from ``X-Forwarded-For`` only as far back as
+``REST_FRAMEWORK["NUM_PROXIES"]`` trusted proxies reach.
+
+Buckets live in a store: :class:`MemoryStore` keeps them in this process,
+which is exact but per worker. :class:`CacheStore` keeps them in a Django
+cache, so Redis makes the budgets shared across workers; its read-modify-write
+is not atomic, so concurrent requests can overshoot a budget by a few.
+"""
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"10/min"`` as ``(capacity, tokens per second)``; ``None`` stays ``None``."""
+    if rate is None:
+        return None
+    count, _, period = rate.partition('/')
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+def _take(tokens, stamp, capacity, refill, now):
+    """Refill a bucket to ``now`` and take one token; returns ``(tokens, wait)``."""
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / refill
+
+
+class MemoryStore:
+    """Buckets in a dict of this process; full (idle) buckets are pruned once there are ``max_keys``."""
+
+    def __init__(self, max_keys=10_000, **options):
+        self.max_keys = max_keys
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, stamp, _ = self._buckets.get(key, (capacity, now, now))
+            tokens, wait = _take(tokens, stamp, capacity, refill, now)
+            if len(self._buckets) >= self.max_keys and key not in self._buckets:
+                self._prune(now)
+            self._buckets[key] = (tokens, now, now + (capacity - tokens) / refill)
+        return wait
+
+    def _prune(self, now):
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheStore:
+    """Buckets in a Django cache (``alias``); point it at Redis to share budgets between workers."""
+
+    def __init__(self, alias='default', prefix='throttle', **options):
+        self.cache = caches[alias]
+        self.prefix = prefix
+
+    def consume(self, key, capacity, refill, now=None):
+        now = time.time() if now is None else now
+        key = f'{self.prefix}:{key}'
+        tokens, stamp = self.cache.get(key) or (capacity, now)
+        tokens, wait = _take(tokens, stamp, capacity, refill, now)
+        # Expires once it would have refilled anyway.
+        self.cache.set(key, (tokens, now), int(capacity / refill) + 1)
+        return wait
+
+
+def unthrottled():
+    """Settings override switching throttling off, for benchmarks timing the endpoints themselves."""
+    from django.test import override_settings
+
+    return override_settings(THROTTLE={**settings.THROTTLE, 'ENABLED': False})
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        config = dict(settings.THROTTLE['STORE'])
+        backend = import_string(config.pop('BACKEND', 'api.throttling.MemoryStore'))
+        _store = backend(**{key.lower(): value for key, value in config.items()})
+    return _store
+
+
+def reset():
+    """Forget every bucket; the store is rebuilt from settings on next use."""
+    global _store
+    _store = None
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    if setting == 'THROTTLE':
+        reset()
+
+
+class BucketThrottle(BaseThrottle):
+    """Take a token from every bucket :meth:`get_buckets` names; reject when any is empty."""
+
+    def get_buckets(self, request, view):
+        """``(scope, identity)`` pairs; an identity of ``None`` skips that scope."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self.wait_seconds = 0.0
+        if not settings.THROTTLE['ENABLED']:
+            return True
+        store = get_store()
+        for scope, identity in self.get_buckets(request, view):
+            rate = parse_rate(settings.THROTTLE['RATES'].get(scope))
+            if rate is None or identity is None:
+                continue
+            self.wait_seconds = max(self.wait_seconds, store.consume(f'{scope}:{identity}', *rate))
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class AuthThrottle(BucketThrottle):
+    """Token endpoints: one budget per client address and one per account named in the body."""
+
+    def get_buckets(self, request, view):
+        email = request.data.get('email') if isinstance(request.data, dict) else None
+        return [
+            ('auth_ip', self.get_ident(request)),
+            ('auth_account', email.strip().lower() if isinstance(email, str) and email.strip() else None),
+        ]
+
+
+class ReadWriteThrottle(BucketThrottle):
+    """Every other API view: separate read and write budgets per user, or per address when anonymous."""
+
+    def get_buckets(self, request, view):
+        user = request.user
+        identity = f'user-{user.pk}' if user and user.is_authenticated else f'ip-{self.get_ident(request)}'
+        return [('read' if request.method in SAFE_METHODS else 'write', identity)]
@@ -1,17 +1,40 @@
-from rest_framework import viewsets
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, ExpressionWrapper, F, Q
 from django.http import JsonResponse
 from rest_framework.views import APIView
 from django.utils import timezone
-from datetime import datetime, timedelta, time as dt_time
-
-from .models import User, Patient, Appointment, Inventory, Prescription
+from django.utils.dateparse import parse_datetime
+from datetime import datetime
+
+from . import alerts, calendar, dashboard, provisioning, stock
+
+from .archive import ArchiveMixin
+from .availability import WorkingHours, availability
+from .booking import SlotUnavailable, book_appointment, book_appointments, slot_conflicts, slot_taken
+from .bulk import BulkModelMixin
+from .cache import CachedListMixin, cached_response
+from .export import ExportMixin
+from .fastpath import FastListMixin
+from .mixins import EagerLoadingMixin, SparseFieldsMixin
+from .search import filter_name_contains, search_patient_ids
+from .models import (
+    User, Patient, Appointment, ArchivedAppointment, Inventory, InventoryAlert, Prescription, ArchivedPrescription,
+    StockMovement,
+)
 from .serializers import (
-    UserSerializer, PatientSerializer,
-    AppointmentSerializer, InventorySerializer,
-    PrescriptionSerializer)
+    UserSerializer, PatientSerializer, PatientListSerializer,
+    AppointmentSerializer, AppointmentListSerializer, AppointmentBookingSerializer,
+    InventorySerializer, InventoryAlertSerializer, PrescriptionSerializer, PrescriptionListSerializer,
+    StockMovementSerializer)
+
+MAX_DAYS = 365
 
 
 def get_modules(request):
@@ -19,13 +42,16 @@ def get_modules(request):
     return JsonResponse(modules)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(
+    ExportMixin, CachedListMixin, FastListMixin, SparseFieldsMixin, EagerLoadingMixin, viewsets.ModelViewSet
+):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    cache_models = (User,)
 
     def create(self, request, *args, **kwargs):
-        data = request.data
+        data = request.data.copy()
         if "password" in data:
             data["password"] = make_password(data["password"])
 
@@ -35,23 +61,88 @@ class UserViewSet(viewsets.ModelViewSet):
             return Response(UserSerializer(user).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class PatientViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'])
+    def provision(self, request):
+        """
+        Create users from a roster: a JSON list, or a CSV or JSON file uploaded
+        as ``roster``. Valid rows are created and invalid ones listed in
+        ``failed``; admins only.
+        """
+        if request.user.role != 'admin':
+            raise PermissionDenied()
+        upload = request.FILES.get('roster')
+        if upload is not None:
+            rows = provisioning.read_roster(upload.read(), 'json' if upload.name.endswith('.json') else 'csv')
+        else:
+            rows = provisioning.check_roster(request.data)
+        if len(rows) > provisioning.MAX_ROWS:
+            raise ValidationError({'roster': [f'At most {provisioning.MAX_ROWS} users per request.']})
+        users, failures = provisioning.provision(rows, workers=provisioning.API_WORKERS)
+        return Response(
+            {'created': UserSerializer(users, many=True).data, 'failed': failures},
+            status=status.HTTP_201_CREATED if users else status.HTTP_400_BAD_REQUEST,
+        )
+
+class PatientViewSet(
+    ExportMixin, CachedListMixin, FastListMixin, SparseFieldsMixin, EagerLoadingMixin, viewsets.ModelViewSet
+):
     queryset = Patient.objects.all()
     serializer_class = PatientSerializer
+    compact_serializer_class = PatientListSerializer
+    compact_actions = ('list', 'search')
     permission_classes = [IsAuthenticated]
+    cache_models = (Patient, User)
 
     def get_queryset(self):
         queryset = super().get_queryset()
         name = self.request.query_params.get('name')
         if name:
-            queryset = queryset.filter(name__icontains=name)
+            queryset = filter_name_contains(queryset, name)
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ids = search_patient_ids(request.query_params.get('q', ''), limit=limit)
+        patients = self.get_queryset().in_bulk(ids)
+        ranked = [patients[pk] for pk in ids if pk in patients]
+        return Response(self.get_serializer(ranked, many=True).data)
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        return cached_response(request, (Patient,), lambda: Response(dashboard.patient_stats()))
+
+
+def filter_appointments(queryset, params):
+    date = params.get('date')
+    patient_id = params.get('patient_id')
+    doctor_id = params.get('doctor_id')
+
+    if date:
+        queryset = queryset.filter(date=date)
+    if patient_id:
+        queryset = queryset.filter(patient_id=patient_id)
+    if doctor_id:
+        queryset = queryset.filter(doctor_id=doctor_id)
+    return queryset
+
+
+class AppointmentViewSet(
+    BulkModelMixin, ExportMixin, CachedListMixin, ArchiveMixin, FastListMixin, SparseFieldsMixin,
+    EagerLoadingMixin, viewsets.ModelViewSet,
+):
     queryset = Appointment.objects.all()
     serializer_class = AppointmentSerializer
+    compact_serializer_class = AppointmentListSerializer
+    compact_actions = ('list', 'calendar')
     permission_classes = [IsAuthenticated]
+    cache_models = (Appointment, ArchivedAppointment, Patient, User)
+    archive_model = ArchivedAppointment
+    bulk_conflict_exception = SlotUnavailable
 
     def create(self, request, *args, **kwargs):
         data = request.data
@@ -64,104 +155,392 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if not date or not time or not patient_name:
             return Response({"error": "Missing required fields"}, status=status.HTTP_400_BAD_REQUEST)
 
-        patient, created = Patient.objects.get_or_create(
-            name=patient_name,
-            defaults={"age": patient_age}
-        )
-
-        appointment = Appointment.objects.create(
-            date=date,
-            time=time,
-            patient=patient,
-            doctor_id=doctor_id if doctor_id else None,
-        )
+        appointment = book_appointment(date, time, patient_name, doctor_id=doctor_id, age=patient_age)
 
         serializer = AppointmentSerializer(appointment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def create_many(self, request):
+        serializer = AppointmentBookingSerializer(data=self.get_bulk_items(request.data), many=True)
+        if not serializer.is_valid():
+            return self.bulk_error_response(serializer.errors)
+        items = serializer.validated_data
+
+        doctor_ids = {item['doctor'] for item in items if item.get('doctor')}
+        known_doctors = set(User.objects.filter(pk__in=doctor_ids).values_list('pk', flat=True))
+        conflicts = slot_conflicts([(item.get('doctor') or None, item['date'], item['time']) for item in items])
+        errors = []
+        for item, conflict in zip(items, conflicts):
+            if item.get('doctor') and item['doctor'] not in known_doctors:
+                errors.append({'doctor': [f'Invalid pk "{item["doctor"]}" - object does not exist.']})
+            elif conflict:
+                errors.append({'time': [SlotUnavailable.default_detail]})
+            else:
+                errors.append({})
+        if any(errors):
+            return self.bulk_error_response(errors)
+
+        appointments = book_appointments([
+            {
+                'date': item['date'],
+                'time': item['time'],
+                'patient_name': item['patient_name'],
+                'doctor_id': item.get('doctor'),
+                'age': item['age'],
+            }
+            for item in items
+        ])
+        return Response(
+            AppointmentSerializer(self.reload(appointments), many=True).data, status=status.HTTP_201_CREATED
+        )
+
+    def update_conflicts(self, changes):
+        slots = []
+        for appointment, data in changes:
+            doctor = data['doctor'] if 'doctor' in data else appointment.doctor
+            # A cancelled appointment holds no slot.
+            active = data.get('status', appointment.status) != 'cancelled'
+            slots.append((
+                doctor.pk if doctor is not None and active else None,
+                data.get('date', appointment.date), data.get('time', appointment.time),
+            ))
+        conflicts = slot_conflicts(slots, exclude_pks=[appointment.pk for appointment, _ in changes])
+        return [{'time': [SlotUnavailable.default_detail]} if conflict else {} for conflict in conflicts]
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            appointment = serializer.instance
+            if appointment.status != 'cancelled' and slot_taken(
+                appointment.doctor_id, appointment.date, appointment.time, exclude_pk=appointment.pk
+            ):
+                raise SlotUnavailable()
+            raise
+
     def get_queryset(self):
-        queryset = super().get_queryset()
-        date = self.request.query_params.get('date')
-        patient_id = self.request.query_params.get('patient_id')
-        doctor_id = self.request.query_params.get('doctor_id')
-
-        if date:
-            queryset = queryset.filter(date=date)
-        if patient_id:
-            queryset = queryset.filter(patient_id=patient_id)
-        if doctor_id:
-            queryset = queryset.filter(doctor_id=doctor_id)
+        return self.filter_for_action(super().get_queryset())
+
+    def get_archive_queryset(self):
+        return self.filter_for_action(super().get_archive_queryset())
+
+    def filter_for_action(self, queryset):
+        queryset = filter_appointments(queryset, self.request.query_params)
+        if self.action == 'calendar':
+            queryset = queryset.filter(date=calendar.parse_day(self.request.query_params, 'day'))
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Appointment counts by status per day and per doctor for ``?month=``,
+        ``?week=`` or ``?from=&to=``; ``?day=`` lists that day's appointments
+        instead. ``doctor_id`` and ``patient_id`` filter both.
+        """
+        if 'day' in request.query_params:
+            return self.list(request)
+
+        def produce():
+            first, last = calendar.window(request.query_params)
+            queryset = filter_appointments(Appointment.objects.all(), request.query_params)
+            return Response({'from': first, 'to': last, 'days': calendar.counts(queryset, first, last)})
+
+        return cached_response(request, self.cache_models, produce)
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Today's, upcoming and next-week counts; ``doctor_id`` and ``patient_id`` filter."""
+        return cached_response(
+            request, (Appointment,), lambda: Response(dashboard.appointment_stats(
+                filter_appointments(Appointment.objects.all(), request.query_params)
+            ))
+        )
+
 
-class InventoryViewSet(viewsets.ModelViewSet):
+class InventoryViewSet(
+    BulkModelMixin, ExportMixin, CachedListMixin, FastListMixin, SparseFieldsMixin, EagerLoadingMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Inventory.objects.all()
     serializer_class = InventorySerializer
     permission_classes = [IsAuthenticated]
+    cache_models = (Inventory,)
+    export_annotations = {
+        'needs_restock': ExpressionWrapper(Q(quantity__lte=F('threshold')), output_field=BooleanField()),
+    }
 
     def get_queryset(self):
         queryset = super().get_queryset()
         needs_restock = self.request.query_params.get('needs_restock')
         if needs_restock and needs_restock.lower() == 'true':
-            queryset = queryset.filter(quantity__lte=models.F('threshold'))
+            queryset = alerts.low_stock(queryset)
+        if self.action == 'low_stock':
+            queryset = alerts.low_stock(queryset)
+        elif self.action == 'expiring':
+            queryset = alerts.expiring(queryset, self.get_days(alerts.expiring_days()))
+        elif self.action == 'expired':
+            queryset = alerts.expired(queryset)
+        return queryset
+
+    def get_days(self, default, minimum=0):
+        days = self.request.query_params.get('days')
+        if days is None:
+            return default
+        try:
+            days = int(days)
+        except ValueError:
+            days = -1
+        if not minimum <= days <= MAX_DAYS:
+            raise ValidationError({'days': [f'Expected a whole number of days from {minimum} to {MAX_DAYS}.']})
+        return days
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            stock.record_opening([serializer.save()], self.request.user)
+
+    def perform_update(self, serializer):
+        # The save leaves the quantity alone; answer with the current one.
+        serializer.save().refresh_from_db(fields=['quantity'])
+
+    def bulk_written(self, objects, created):
+        if created:
+            alerts.evaluate_created(objects)
+            stock.record_opening(objects, self.request.user)
+        else:
+            alerts.evaluate([obj.pk for obj in objects])
+
+    @action(detail=False, methods=['get'], url_path='low-stock')
+    def low_stock(self, request):
+        return self.list(request)
+
+    @action(detail=False, methods=['get'])
+    def expiring(self, request):
+        return self.list(request)
+
+    @action(detail=False, methods=['get'])
+    def expired(self, request):
+        return self.list(request)
+
+    @action(detail=False, methods=['get'])
+    def consumption(self, request):
+        """Daily use over the last ``?days=`` (default 30) and days of stock left, soonest out first."""
+        days = self.get_days(stock.CONSUMPTION_DAYS, minimum=1)
+        rows = stock.consumption(Inventory.objects.order_by('medicine_name'), days).values(
+            'id', 'medicine_name', 'quantity', 'threshold', 'dispensed'
+        )
+        return Response(stock.with_rates(list(rows), days))
+
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Item, low-stock, expired and expiring (within ``?days=``) counts."""
+        days = self.get_days(alerts.expiring_days())
+        return cached_response(request, self.cache_models, lambda: Response(dashboard.inventory_stats(days=days)))
+
+
+class StockMovementViewSet(
+    CachedListMixin, FastListMixin, SparseFieldsMixin, EagerLoadingMixin,
+    mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet,
+):
+    """
+    The stock ledger, newest first, filterable by ``?item=`` and ``?kind=``.
+    Movements are append-only: POST ``{item, kind, quantity, note}`` applies
+    one to the item's quantity (409 if a dispense exceeds the stock on hand);
+    a wrong movement is corrected with an adjustment.
+    """
+    queryset = StockMovement.objects.all()
+    serializer_class = StockMovementSerializer
+    permission_classes = [IsAuthenticated]
+    cache_models = (StockMovement, Inventory)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        item = params.get('item')
+        if item:
+            if not item.isdigit():
+                raise ValidationError({'item': ['Expected an item id.']})
+            queryset = queryset.filter(item=int(item))
+        kind = params.get('kind')
+        if kind:
+            kinds = [value for value, _ in StockMovement.KIND_CHOICES]
+            if kind not in kinds:
+                raise ValidationError({'kind': [f'Expected one of: {", ".join(kinds)}.']})
+            queryset = queryset.filter(kind=kind)
         return queryset
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        movement = stock.move(
+            data['item'].pk, data['kind'], data['quantity'], user=request.user, note=data.get('note', '')
+        )
+        return Response(self.get_serializer(movement).data, status=status.HTTP_201_CREATED)
+
+
+class InventoryAlertViewSet(
+    CachedListMixin, FastListMixin, SparseFieldsMixin, EagerLoadingMixin, viewsets.ReadOnlyModelViewSet
+):
+    """
+    Open inventory alerts, newest first; ``?kind=`` narrows them to one kind.
+    With ``?since=<ISO 8601 datetime>`` the list instead holds every alert
+    raised or resolved after that moment, so dashboards can poll for changes.
+    """
+    queryset = InventoryAlert.objects.all()
+    serializer_class = InventoryAlertSerializer
+    permission_classes = [IsAuthenticated]
+    cache_models = (InventoryAlert, Inventory)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        since = params.get('since')
+        if since:
+            moment = parse_datetime(since)
+            if moment is None:
+                raise ValidationError({'since': ['Expected an ISO 8601 date and time.']})
+            if timezone.is_naive(moment):
+                moment = timezone.make_aware(moment)
+            queryset = queryset.filter(Q(raised_at__gt=moment) | Q(resolved_at__gt=moment))
+        elif self.action == 'list':
+            queryset = queryset.filter(resolved_at__isnull=True)
+        kind = params.get('kind')
+        if kind:
+            queryset = queryset.filter(kind=kind)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        return Response(alerts.summary())
+
+
+def filter_prescriptions(queryset, params):
+    patient_id = params.get('patient_id')
+    doctor_id = params.get('doctor_id')
+    active = params.get('active')
 
-class PrescriptionViewSet(viewsets.ModelViewSet):
+    if patient_id:
+        queryset = queryset.filter(patient_id=patient_id)
+    if doctor_id:
+        queryset = queryset.filter(doctor_id=doctor_id)
+    if active and active.lower() == 'true':
+        queryset = queryset.filter(is_active=True)
+    return queryset
+
+
+class PrescriptionViewSet(
+    ExportMixin, CachedListMixin, ArchiveMixin, FastListMixin, SparseFieldsMixin, EagerLoadingMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Prescription.objects.all()
     serializer_class = PrescriptionSerializer
+    compact_serializer_class = PrescriptionListSerializer
     permission_classes = [IsAuthenticated]
+    cache_models = (Prescription, ArchivedPrescription, Patient, User)
+    archive_model = ArchivedPrescription
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        patient_id = self.request.query_params.get('patient_id')
-        doctor_id = self.request.query_params.get('doctor_id')
-        active = self.request.query_params.get('active')
-
-        if patient_id:
-            queryset = queryset.filter(patient_id=patient_id)
-        if doctor_id:
-            queryset = queryset.filter(doctor_id=doctor_id)
-        if active and active.lower() == 'true':
-            queryset = queryset.filter(is_active=True)
-        return queryset
+        return filter_prescriptions(super().get_queryset(), self.request.query_params)
+
+    def get_archive_queryset(self):
+        return filter_prescriptions(super().get_archive_queryset(), self.request.query_params)
+
+
+def working_hours(request):
+    return WorkingHours.from_settings(
+        start=request.query_params.get('start'),
+        end=request.query_params.get('end'),
+        slot_minutes=request.query_params.get('slot_minutes'),
+    )
+
+
+def parse_availability_day(params):
+    date_str = params.get('date')
+    if not date_str:
+        raise ValueError('Date parameter required')
+    try:
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+
+
+def parse_availability_range(params, max_days):
+    try:
+        start_date = datetime.strptime(params.get('from', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(params.get('to', params.get('from', '')), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('from and to are required. Use YYYY-MM-DD')
+    if end_date < start_date:
+        raise ValueError('to must not be before from')
+    if (end_date - start_date).days >= max_days:
+        raise ValueError(f'Date range is limited to {max_days} days')
+    return start_date, end_date
+
+
+def parse_doctor_ids(params):
+    """Ids from ``?doctors=1,2``, or ``None`` for every active doctor."""
+    doctors = params.get('doctors')
+    if not doctors:
+        return None
+    try:
+        return sorted({int(pk) for pk in doctors.split(',') if pk.strip()})
+    except ValueError:
+        raise ValueError('doctors must be a comma-separated list of ids')
+
+
+def active_doctors():
+    return User.objects.filter(role='doctor', is_active=True).order_by('id').values_list('id', flat=True)
+
+
+def availability_grid_data(grid, start_date, end_date, hours):
+    return {
+        'from': start_date.isoformat(),
+        'to': end_date.isoformat(),
+        'slot_minutes': hours.slot_minutes,
+        'slots': hours.labels(),
+        'doctors': [
+            {
+                'doctor_id': doctor_id,
+                'available_slots': {day.isoformat(): slots for day, slots in days.items()},
+            }
+            for doctor_id, days in grid.items()
+        ],
+    }
 
 
 class DoctorAvailabilityView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, doctor_id):
-        date_str = request.query_params.get('date')
-        if not date_str:
-            return Response({'error': 'Date parameter required'}, status=400)
-
         try:
-            date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
+            date = parse_availability_day(request.query_params)
+            hours = working_hours(request)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
 
-        # Standard working hours
-        start_time = dt_time(9, 0)  # 9 AM
-        end_time = dt_time(17, 0)  # 5 PM
-
-        # Get existing appointments
-        booked_slots = Appointment.objects.filter(
-            doctor_id=doctor_id,
-            date=date
-        ).values_list('time', flat=True)
-
-        slots = []
-        current_time = datetime.combine(date, start_time)
-        end_datetime = datetime.combine(date, end_time)
-
-        while current_time < end_datetime:
-            slot_time = current_time.time()
-            if slot_time not in booked_slots:
-                slots.append(slot_time.strftime('%H:%M'))
-            current_time += timedelta(minutes=30)
+        slots = availability([doctor_id], date, date, hours)[doctor_id][date]
 
         return Response({
             'doctor_id': doctor_id,
-            'date': date_str,
+            'date': request.query_params['date'],
             'available_slots': slots
-        })
\ No newline at end of file
+        })
+
+
+class BulkDoctorAvailabilityView(APIView):
+    permission_classes = [IsAuthenticated]
+    max_days = 31
+
+    def get(self, request):
+        try:
+            start_date, end_date = parse_availability_range(request.query_params, self.max_days)
+            hours = working_hours(request)
+            doctor_ids = parse_doctor_ids(request.query_params)
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=400)
+        if doctor_ids is None:
+            doctor_ids = list(active_doctors())
+
+        grid = availability(doctor_ids, start_date, end_date, hours)
+        return Response(availability_grid_data(grid, start_date, end_date, hours))
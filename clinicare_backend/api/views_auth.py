@@ -1,7 +1,8 @@
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework import serializers
 from .models import User
+from .throttling import AuthThrottle
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
@@ -14,8 +15,6 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def validate(self, attrs):
         data = super().validate(attrs)
 
-        print("Generated Tokens:", data)
-
         if "access" not in data or "refresh" not in data:
             raise serializers.ValidationError("Token generation failed! Access or refresh token missing.")
 
@@ -26,3 +25,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [AuthThrottle]
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    throttle_classes = [AuthThrottle]
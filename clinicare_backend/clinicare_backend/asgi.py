@@ -2,6 +2,8 @@
 ASGI config for clinicare_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the realtime hub in
+``api/realtime.py``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +15,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'clinicare_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from api.realtime import websocket_router  # noqa: E402 (needs the app registry loaded)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_router(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -21,10 +22,10 @@ INSTALLED_APPS = [
     'corsheaders',
     'rest_framework_simplejwt',
     'api',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -33,16 +34,34 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+# The toolbar instruments every query and template, so it is opt-in.
+DEBUG_TOOLBAR = DEBUG and os.environ.get("CLINICARE_DEBUG_TOOLBAR") == "1"
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+    INTERNAL_IPS = ["127.0.0.1"]
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.fastpath.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "api.throttling.ReadWriteThrottle",
+    ),
+    # Reverse proxies in front of the app. Throttling identifies anonymous
+    # clients by the address that many hops back in X-Forwarded-For; with 0
+    # the header is ignored, so clients cannot pick their own identity.
+    "NUM_PROXIES": int(os.environ.get("CLINICARE_NUM_PROXIES", 0)),
 }
 
 SIMPLE_JWT = {
@@ -53,6 +72,43 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
 }
 
+SLOW_REQUEST_SECONDS = float(os.environ.get("CLINICARE_SLOW_REQUEST_SECONDS", 0.5))
+METRICS_TOKEN = os.environ.get("CLINICARE_METRICS_TOKEN", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api.slow_requests": {"handlers": ["console"], "level": "WARNING", "propagate": False},
+    },
+}
+
+AUTH_USER_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "TIMEOUT": 60,
+}
+
+INVENTORY_ALERTS = {
+    # Items expiring within this many days raise an "expiring" alert.
+    "EXPIRING_DAYS": int(os.environ.get("CLINICARE_EXPIRING_DAYS", 30)),
+}
+
+CLINIC_HOURS = {
+    "START": "09:00",
+    "END": "17:00",
+    "SLOT_MINUTES": 30,
+}
+
+ARCHIVE = {
+    # manage.py archive_history moves finished appointments and inactive
+    # prescriptions older than this many days to the archive tables.
+    "RETENTION_DAYS": int(os.environ.get("CLINICARE_ARCHIVE_RETENTION_DAYS", 365)),
+    "BATCH_SIZE": 1000,
+}
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 CORS_ALLOWED_ORIGINS = [
@@ -80,11 +136,128 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'clinicare_backend.wsgi.application'
 
+SQLITE_NAME = os.environ.get("CLINICARE_DB_NAME", BASE_DIR / "db.sqlite3")
+
+SERVER_DATABASE = {
+    "NAME": os.environ.get("CLINICARE_DB_NAME", "clinicare"),
+    "USER": os.environ.get("CLINICARE_DB_USER", "clinicare"),
+    "PASSWORD": os.environ.get("CLINICARE_DB_PASSWORD", ""),
+    "HOST": os.environ.get("CLINICARE_DB_HOST", "127.0.0.1"),
+    "PORT": os.environ.get("CLINICARE_DB_PORT", "5432"),
+}
+
+# Selected with CLINICARE_DB_PROFILE; ``manage.py loadtest_db`` compares them.
+DATABASE_PROFILES = {
+    # Django's defaults: rollback journal and a new connection per request.
+    "sqlite-default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": SQLITE_NAME,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+        },
+    },
+    # WAL lets readers proceed while a write commits. PRAGMAS are applied to
+    # every new connection by api/db.py.
+    "sqlite-tuned": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": SQLITE_NAME,
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 5,
+        },
+        "PRAGMAS": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "mmap_size": 268435456,
+            "cache_size": -20000,
+            "temp_store": "MEMORY",
+        },
+    },
+    # Persistent connections, checked before reuse.
+    "postgres": {
+        "ENGINE": "django.db.backends.postgresql",
+        **SERVER_DATABASE,
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+    },
+    # A psycopg pool per process; needs psycopg[pool] and CONN_MAX_AGE 0.
+    "postgres-pooled": {
+        "ENGINE": "django.db.backends.postgresql",
+        **SERVER_DATABASE,
+        "OPTIONS": {
+            "pool": {
+                "min_size": 2,
+                "max_size": int(os.environ.get("CLINICARE_DB_POOL_SIZE", 20)),
+                "timeout": 10,
+            },
+        },
+    },
+}
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / "db.sqlite3",
-    }
+    "default": DATABASE_PROFILES[os.environ.get("CLINICARE_DB_PROFILE", "sqlite-tuned")],
+}
+
+CACHE_BACKENDS = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "clinicare",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get("CLINICARE_CACHE_LOCATION", BASE_DIR / ".cache"),
+    },
+    "redis": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("CLINICARE_CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+    },
+}
+
+CACHES = {
+    "default": CACHE_BACKENDS[os.environ.get("CLINICARE_CACHE", "locmem")],
+}
+
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
+
+REALTIME_BACKENDS = {
+    "local": {
+        "BACKEND": "api.realtime.LocalBackend",
+    },
+    "redis": {
+        "BACKEND": "api.realtime.RedisBackend",
+        "URL": os.environ.get("CLINICARE_REALTIME_URL", "redis://127.0.0.1:6379/0"),
+    },
+}
+
+REALTIME_BACKEND = REALTIME_BACKENDS[os.environ.get("CLINICARE_REALTIME", "local")]
+
+THROTTLE_STORES = {
+    # Per process: each worker enforces its own copy of every budget.
+    "memory": {
+        "BACKEND": "api.throttling.MemoryStore",
+    },
+    # Shared by every worker using the same cache (e.g. CLINICARE_CACHE=redis).
+    "cache": {
+        "BACKEND": "api.throttling.CacheStore",
+        "ALIAS": "default",
+    },
+}
+
+THROTTLE = {
+    "ENABLED": os.environ.get("CLINICARE_THROTTLE", "1") == "1",
+    "STORE": THROTTLE_STORES[os.environ.get("CLINICARE_THROTTLE_STORE", "memory")],
+    # Token buckets: "N/period" holds N tokens and refills N per period; None turns a scope off.
+    "RATES": {
+        "auth_ip": os.environ.get("CLINICARE_THROTTLE_AUTH_IP", "30/min"),
+        "auth_account": os.environ.get("CLINICARE_THROTTLE_AUTH_ACCOUNT", "10/min"),
+        "read": os.environ.get("CLINICARE_THROTTLE_READ", "1200/min"),
+        "write": os.environ.get("CLINICARE_THROTTLE_WRITE", "300/min"),
+    },
 }
 
 AUTH_USER_MODEL = "api.User"
@@ -1,39 +1,64 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from api.views import (
     UserViewSet, PatientViewSet,
-    AppointmentViewSet, InventoryViewSet,
+    AppointmentViewSet, InventoryViewSet, InventoryAlertViewSet, StockMovementViewSet,
     PrescriptionViewSet, DoctorAvailabilityView,
+    BulkDoctorAvailabilityView,
     get_modules
 )
 from api.reports import (
     user_registration_report,
     inventory_report,
     prescription_report,
-    appointment_report
+    appointment_report,
+    export_report
 )
-from rest_framework_simplejwt.views import TokenRefreshView
-from api.views_auth import CustomTokenObtainPairView
+from api import async_views
+from api.dashboard import dashboard
+from api.metrics import metrics_view
+from api.views_auth import CustomTokenObtainPairView, CustomTokenRefreshView
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename="users")
 router.register(r'patients', PatientViewSet, basename="patients")
 router.register(r'appointments', AppointmentViewSet, basename="appointments")
 router.register(r'inventory', InventoryViewSet, basename="inventory")
+router.register(r'inventory-alerts', InventoryAlertViewSet, basename="inventory-alerts")
+router.register(r'stock-movements', StockMovementViewSet, basename="stock-movements")
 router.register(r'prescriptions', PrescriptionViewSet, basename="prescriptions")
 
 urlpatterns = [
     path('api/token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
     path("api/", include(router.urls)),
+    path("api/doctors/availability/",
+         BulkDoctorAvailabilityView.as_view(),
+         name='doctors-availability'),
     path("api/doctors/<int:doctor_id>/availability/",
          DoctorAvailabilityView.as_view(),
          name='doctor-availability'),
+    path("api/dashboard/", dashboard, name="dashboard"),
     path("api/reports/users/", user_registration_report, name="user_reports"),
     path("api/reports/inventory/", inventory_report, name="inventory_reports"),
     path("api/reports/prescriptions/", prescription_report, name="prescription_reports"),
     path("api/reports/appointments/", appointment_report, name="appointment_reports"),
+    path("api/reports/export/", export_report, name="export_reports"),
+    path("api/async/appointments/", async_views.appointment_list, name="async_appointments"),
+    path("api/async/patients/search/", async_views.patient_search, name="async_patient_search"),
+    path("api/async/doctors/availability/",
+         async_views.bulk_doctor_availability,
+         name='async_doctors_availability'),
+    path("api/async/doctors/<int:doctor_id>/availability/",
+         async_views.doctor_availability,
+         name='async_doctor_availability'),
+    path("api/async/reports/<str:name>/", async_views.report, name="async_reports"),
     path("admin/", admin.site.urls),
     path("api/modules/", get_modules, name="get_modules"),
-]
\ No newline at end of file
+    path("api/metrics/", metrics_view, name="metrics"),
+]
+
+if settings.DEBUG_TOOLBAR:
+    urlpatterns.append(path("__debug__/", include("debug_toolbar.urls")))
\ No newline at end of file